@@ -1,2 +1,9 @@
 from .pomset import POMSet
-from .hypergraph import Hypergraph
+from .hypergraph import Hypergraph, DualHypergraph
+from .incidence import Incidence
+from .sparse import SparseHypergraph
+from .traversal import (breadth_first_search, distance_matrix, iter_distances,
+                        random_walks, iter_random_walks)
+from .centrality import pagerank, eigenvector_centrality
+from .components import connected_components, s_connected_components
+from .interning import Interner
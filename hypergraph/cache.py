@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+hypergraph.cache: Caching of results derived from a hypergraph.
+"""
+# Author: Leland McInnes <leland.mcinnes@gmail.com>
+#
+# License: LGPL v2
+import functools
+
+from collections import OrderedDict
+
+
+class LRUCache(object):
+    """A cache of at most `maxsize` entries which, when full, evicts the
+    least recently used entry to make room for a new one.
+
+    Parameters
+    ----------
+
+    maxsize : int, optional
+        The maximum number of entries, or 0 to cache nothing.
+        (default 16)
+    """
+
+    def __init__(self, maxsize=16):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        """Return the entry for `key`, marking it as most recently used,
+        or `default` if there is none."""
+        try:
+            value = self._entries.pop(key)
+        except KeyError:
+            return default
+        self._entries[key] = value
+        return value
+
+    def put(self, key, value):
+        """Add (or replace) the entry for `key`, evicting the least
+        recently used entries beyond `maxsize`."""
+        self._entries.pop(key, None)
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = value
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """Remove all entries."""
+        self._entries.clear()
+
+
+# Marks a missing cache entry, since None is a valid result.
+_MISSING = object()
+
+
+def cached(method):
+    """Decorate a method of a hypergraph so that its results are cached,
+    keyed by the method and its arguments, until the hypergraph is next
+    modified (see `Hypergraph._cached_result`). Calls with unhashable
+    arguments, such as arrays of weights, are not cached."""
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = (method.__name__, args, tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            return method(self, *args, **kwargs)
+        return self._cached_result(key, method, self, *args, **kwargs)
+
+    return wrapper
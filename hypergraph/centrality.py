@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+"""
+hypergraph.centrality: Centrality measures of hypergraphs computed by
+sparse power iteration over their integer incidence arrays.
+"""
+# Author: Leland McInnes <leland.mcinnes@gmail.com>
+#
+# License: LGPL v2
+import numpy as np
+import scipy.sparse as sp
+
+from warnings import warn
+
+from .traversal import _DIRECTEDNESS, _check_directedness, _ranges, _step_table
+
+
+def pagerank(incidence, alpha=0.85, directed='undirected', weighting='count',
+             personalization=None, initial=None, tol=1e-6, max_iter=100):
+    """PageRank of the nodes of a hypergraph, as the stationary
+    distribution of a random walk that at each step either, with
+    probability `alpha`, moves to an incident edge (chosen in proportion
+    to its weight) and on to a node of that edge chosen uniformly, or
+    jumps to a node chosen by `personalization`.
+
+    Undirected, this is power iteration with the transition matrix
+    `D_v^-1 H W D_e^-1 H^T` of the incidence matrix `H`, applied as
+    products with the incidence arrays, so no projection of the
+    hypergraph onto its nodes is built. Each iteration takes
+    O(n_nodes + n_incidences) time.
+
+    Parameters
+    ----------
+
+    incidence : Incidence
+        The incidence arrays of the hypergraph.
+
+    alpha : float, optional
+        The probability of following an edge rather than jumping.
+        (default 0.85)
+
+    directed : string, optional
+        One of 'undirected', to step to any node of the chosen edge,
+        'weakly', to step to a node greater than or unrelated to the
+        current node in the edge, or 'strictly', to step to a strictly
+        greater node, as for `random_walks`. Nodes with nothing to step
+        to jump instead. (default 'undirected')
+
+    weighting : string or array, optional
+        The edge weights, as for `Incidence.edge_weights`: 'count',
+        'inverse', 'size' or an array of weights, one per edge.
+        (default 'count')
+
+    personalization : numpy ndarray (n_nodes,), optional
+        The relative probability of jumping to each node, or None to
+        jump uniformly. (default None)
+
+    initial : numpy ndarray (n_nodes,), optional
+        A starting estimate, such as the PageRank of a previous version
+        of the hypergraph, or None to start from uniform. (default None)
+
+    tol : float, optional
+        The iteration stops once the total absolute change is less than
+        `n_nodes * tol`. (default 1e-6)
+
+    max_iter : int, optional
+        The maximum number of iterations; if it is reached a warning is
+        given and the last estimate returned. (default 100)
+
+    Returns
+    -------
+
+    pagerank : numpy ndarray (n_nodes,)
+        The PageRank of each node, summing to 1.
+    """
+    _check_directedness(directed)
+    n_nodes = incidence.n_nodes
+    if n_nodes == 0:
+        return np.zeros(0)
+    steps = _Steps(incidence, directed)
+    weights = _usable_weights(incidence, steps, weighting)
+    node_weights = np.bincount(steps.incidence_nodes, weights=weights,
+                               minlength=n_nodes)
+    dangling = node_weights == 0
+    # The share of a node's rank sent through each of its incidences, split
+    # evenly over the nodes the incidence steps to.
+    split = np.zeros(weights.shape[0])
+    usable = weights > 0
+    split[usable] = (weights[usable] / steps.counts[usable] /
+                     node_weights[steps.incidence_nodes[usable]])
+
+    jump = _distribution(personalization, n_nodes)
+    rank = _distribution(initial, n_nodes)
+    for _ in range(max_iter):
+        previous = rank
+        rank = alpha * steps.push(previous[steps.incidence_nodes] * split)
+        rank += (alpha * previous[dangling].sum() + 1.0 - alpha) * jump
+        if np.abs(rank - previous).sum() < n_nodes * tol:
+            return rank
+    warn('PageRank did not converge in {} iterations'.format(max_iter))
+    return rank
+
+
+def eigenvector_centrality(incidence, directed='undirected', weighting='count',
+                           initial=None, tol=1e-6, max_iter=100):
+    """Eigenvector centrality of the nodes of a hypergraph: the principal
+    eigenvector of the adjacency matrix of its clique expansion, or of
+    its directed projection, with each node's centrality the sum of that
+    of the nodes it is joined to (or below, when directed).
+
+    Undirected, the adjacency `H W H^T` of the incidence matrix `H`, less
+    its diagonal, is applied as products with the incidence arrays, so
+    the clique expansion is never built. As in NetworkX the iteration is
+    with the adjacency plus the identity, which has the same principal
+    eigenvector, so that it converges on bipartite structures too.
+
+    Parameters
+    ----------
+
+    incidence : Incidence
+        The incidence arrays of the hypergraph.
+
+    directed : string, optional
+        One of 'undirected', 'weakly' or 'strictly'. Directed, each node
+        takes the centrality of the nodes it is above (or weakly above)
+        in some edge. (default 'undirected')
+
+    weighting : string or array, optional
+        The edge weights, as for `Incidence.edge_weights`: 'count',
+        'inverse', 'size' or an array of weights, one per edge.
+        (default 'count')
+
+    initial : numpy ndarray (n_nodes,), optional
+        A starting estimate, such as the centrality of a previous version
+        of the hypergraph, or None to start from uniform. (default None)
+
+    tol : float, optional
+        The iteration stops once the total absolute change is less than
+        `n_nodes * tol`. (default 1e-6)
+
+    max_iter : int, optional
+        The maximum number of iterations; if it is reached a warning is
+        given and the last estimate returned. (default 100)
+
+    Returns
+    -------
+
+    centrality : numpy ndarray (n_nodes,)
+        The eigenvector centrality of each node, with unit Euclidean norm.
+    """
+    _check_directedness(directed)
+    n_nodes = incidence.n_nodes
+    if n_nodes == 0:
+        return np.zeros(0)
+    steps = _Steps(incidence, directed)
+    weights = _usable_weights(incidence, steps, weighting)
+
+    # The steps from each incidence to itself (and undirected, to other
+    # copies of the same node in the edge) are not adjacencies.
+    if directed == 'undirected':
+        matrix = incidence.matrix
+        self_weights = matrix.multiply(matrix).dot(
+            incidence.edge_weights(weighting).astype(np.float64))
+    elif directed == 'weakly':
+        self_weights = np.bincount(steps.incidence_nodes, weights=weights,
+                                   minlength=n_nodes)
+    else:
+        self_weights = np.zeros(n_nodes)
+
+    centrality = _distribution(initial, n_nodes)
+    for _ in range(max_iter):
+        previous = centrality
+        centrality = (previous + steps.push(previous[steps.incidence_nodes] * weights) -
+                      self_weights * previous)
+        norm = np.sqrt(np.dot(centrality, centrality))
+        if norm > 0:
+            centrality /= norm
+        if np.abs(centrality - previous).sum() < n_nodes * tol:
+            return centrality
+    warn('Eigenvector centrality did not converge in {} iterations'.format(max_iter))
+    return centrality
+
+
+def _distribution(values, size):
+    """`values` as a probability vector, or the uniform one if None."""
+    if values is None:
+        return np.full(size, 1.0 / size)
+    values = np.asarray(values, dtype=np.float64)
+    if values.shape != (size,):
+        raise ValueError('Expected one value per node')
+    total = values.sum()
+    if total <= 0:
+        raise ValueError('Values must have a positive sum')
+    return values / total
+
+
+def _usable_weights(incidence, steps, weighting):
+    """The weight of each incidence of a node, aligned with `node_edges`,
+    or 0 for incidences with no node to step to."""
+    weights = incidence.edge_weights(weighting).astype(np.float64)[incidence.node_edges]
+    weights[steps.counts == 0] = 0.0
+    return weights
+
+
+class _Steps(object):
+    """The steps of a walk on a hypergraph from each incidence of a node,
+    aligned with `node_edges`, to the nodes of the edge (or, directed,
+    those above the node in the edge), with `push` sending an amount from
+    each incidence to every node it steps to.
+
+    Directed steps from edges ordered by rank go to a prefix of the edge
+    in `_RankIndex` order, so the amount each incidence of the edge
+    receives is a suffix sum, computed for all edges with one cumulative
+    sum. Steps from edges with other orders are held as a sparse matrix.
+    """
+
+    def __init__(self, incidence, directed):
+        self.incidence = incidence
+        self.incidence_nodes = np.repeat(np.arange(incidence.n_nodes),
+                                         incidence.degrees)
+        side, method = _DIRECTEDNESS[directed]
+        self.directed = side is not None
+        if not self.directed:
+            self.counts = incidence.edge_sizes[incidence.node_edges]
+            return
+
+        n_incidences = incidence.n_incidences
+        begin, lengths, targets = _step_table(incidence, side, method)
+        slots = incidence.node_slots
+        self.counts = lengths[slots]
+        general = begin[slots] >= n_incidences
+        ranked = ~general & (self.counts > 0)
+        self.ranked = np.flatnonzero(ranked)
+        self.run_ends = (begin + lengths - 1)[slots][ranked]
+        self.sorted_nodes = incidence.edge_nodes[targets[:n_incidences]]
+        self.edge_ends = np.repeat(incidence.edge_indptr[1:], incidence.edge_sizes)
+
+        general = np.flatnonzero(general)
+        counts = self.counts[general]
+        runs = _ranges(begin[slots[general]], counts)
+        self.general = sp.csr_matrix(
+            (np.ones(runs.shape[0]),
+             (incidence.edge_nodes[targets[runs]], np.repeat(general, counts))),
+            shape=(incidence.n_nodes, n_incidences))
+
+    def push(self, amounts):
+        """The total amount received by each node when every incidence
+        sends its amount to each node it steps to."""
+        incidence = self.incidence
+        if not self.directed:
+            per_edge = np.bincount(incidence.node_edges, weights=amounts,
+                                   minlength=incidence.n_edges)
+            return np.bincount(incidence.edge_nodes,
+                               weights=np.repeat(per_edge, incidence.edge_sizes),
+                               minlength=incidence.n_nodes)
+
+        n_incidences = incidence.n_incidences
+        at_ends = np.bincount(self.run_ends, weights=amounts[self.ranked],
+                              minlength=n_incidences)
+        suffix = np.zeros(n_incidences + 1)
+        suffix[:n_incidences] = np.cumsum(at_ends[::-1])[::-1]
+        received = suffix[:n_incidences] - suffix[self.edge_ends]
+        result = np.bincount(self.sorted_nodes, weights=received,
+                             minlength=incidence.n_nodes)
+        return result + self.general.dot(amounts)
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+hypergraph.components: Connected components of hypergraphs computed with
+scipy's sparse graph routines over their integer incidence arrays.
+"""
+# Author: Leland McInnes <leland.mcinnes@gmail.com>
+#
+# License: LGPL v2
+import numpy as np
+import scipy.sparse as sp
+
+from scipy.sparse import csgraph
+
+from .incidence import INDEX_DTYPE, codes_by_first_appearance
+
+# The number of products of pairs of incidences in each block of the
+# overlap product computed by `s_connected_components`.
+BLOCK_PRODUCTS = 1 << 24
+
+
+def connected_components(incidence):
+    """The connected components of the nodes of a hypergraph, where two
+    nodes are connected if some edge contains both. The orders of the
+    edges are ignored.
+
+    The components are those of the bipartite graph of nodes and edges,
+    whose adjacency is the incidence arrays themselves, so this takes
+    O(n_nodes + n_edges + n_incidences) time.
+
+    Parameters
+    ----------
+
+    incidence : Incidence
+        The incidence arrays of the hypergraph.
+
+    Returns
+    -------
+
+    labels : numpy ndarray (n_nodes,)
+        The component of each node, numbered in order of the first node
+        of each component.
+    """
+    n_nodes = incidence.n_nodes
+    size = n_nodes + incidence.n_edges
+    indptr = np.concatenate([incidence.node_indptr,
+                             np.full(incidence.n_edges, incidence.node_indptr[-1])])
+    bipartite = sp.csr_matrix((np.ones(incidence.n_incidences, dtype=np.int8),
+                               incidence.node_edges + n_nodes, indptr),
+                              shape=(size, size))
+    _, labels = csgraph.connected_components(bipartite, directed=False)
+    return codes_by_first_appearance(labels[:n_nodes])[1]
+
+
+def s_connected_components(incidence, s=1):
+    """The s-connected components of the edges of a hypergraph, where two
+    edges are s-adjacent if they share at least `s` distinct nodes, and
+    s-connected if joined by a chain of s-adjacent edges. The orders of
+    the edges are ignored. The s-connected components of the nodes are
+    those of the edges of the dual hypergraph (see `Incidence.transpose`).
+
+    For `s == 1` these follow from the components of the nodes. Otherwise
+    the number of nodes each pair of edges share is computed as the
+    sparse product `H^T H` of the incidence matrix `H`, restricted to the
+    edges with at least `s` nodes and the nodes in at least two of them.
+    A node in `d` such edges adds `d ** 2` products, so the product is
+    computed for blocks of edges of about `BLOCK_PRODUCTS` products at a
+    time, keeping only the pairs sharing at least `s` nodes.
+
+    Parameters
+    ----------
+
+    incidence : Incidence
+        The incidence arrays of the hypergraph.
+
+    s : int, optional
+        The number of nodes two edges must share to be adjacent.
+        (default 1)
+
+    Returns
+    -------
+
+    labels : numpy ndarray (n_edges,)
+        The component of each edge, numbered in order of the first edge
+        of each component, or -1 for edges with fewer than `s` distinct
+        nodes, which are in no component.
+    """
+    if s < 1:
+        raise ValueError('s must be at least 1')
+    matrix = incidence.matrix
+    matrix.data[:] = 1
+    eligible = np.flatnonzero(matrix.sum(axis=0).A1 >= s)
+    labels = np.full(incidence.n_edges, -1, dtype=INDEX_DTYPE)
+    if eligible.shape[0] == 0:
+        return labels
+
+    if s == 1:
+        first_nodes = incidence.edge_nodes[incidence.edge_indptr[eligible]]
+        components = connected_components(incidence)[first_nodes]
+    else:
+        components = _overlap_components(matrix[:, eligible], s)
+    labels[eligible] = codes_by_first_appearance(components)[1]
+    return labels
+
+
+def _overlap_components(matrix, s):
+    """The components of the columns of the binary matrix `matrix`, with
+    columns adjacent when at least `s` rows are non-zero in both."""
+    matrix = matrix[matrix.getnnz(axis=1) >= 2]
+    columns = matrix.T.tocsr()
+    costs = np.cumsum(columns @ matrix.getnnz(axis=1).astype(np.int64))
+    bounds = np.searchsorted(costs, np.arange(BLOCK_PRODUCTS, costs[-1],
+                                              BLOCK_PRODUCTS))
+    bounds = np.unique(np.concatenate([[0], bounds, [columns.shape[0]]]))
+
+    rows = []
+    cols = []
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        block = (columns[start:stop] @ matrix).tocoo()
+        adjacent = block.data >= s
+        rows.append(block.row[adjacent] + start)
+        cols.append(block.col[adjacent])
+    rows = np.concatenate(rows)
+    adjacency = sp.csr_matrix((np.ones(rows.shape[0], dtype=np.int8),
+                               (rows, np.concatenate(cols))),
+                              shape=(columns.shape[0], columns.shape[0]))
+    return csgraph.connected_components(adjacency, directed=False)[1]
@@ -9,11 +9,21 @@ hypergraph.hypergraph: Basic hypergraph class.
 import networkx as nx
 import itertools as itr
 import numpy as np
+import scipy.sparse as sp
 
 from warnings import warn
 
-from collections import Counter, defaultdict
 from .pomset import POMSet
+from .orders import order_from_dense
+from .cache import LRUCache, cached, _MISSING
+from .centrality import pagerank, eigenvector_centrality
+from .components import connected_components, s_connected_components
+from .incidence import (Incidence, codes_by_first_appearance, group_bounds,
+                        object_array, INDEX_DTYPE)
+from .interning import Interner
+from .io import save_incidence, load_incidence, read_incidences, CHUNK_SIZE
+from .traversal import (breadth_first_search, distance_matrix, iter_distances,
+                        random_walks, iter_random_walks)
 
 
 class Hypergraph(object):
@@ -49,20 +59,326 @@ class Hypergraph(object):
 
     edges : iterable
         An iterable of all the edge objects in the hypergraph.
+
+    cache_size : int
+        The number of derived results, such as the incidence, projections
+        and size distributions, kept in a least recently used cache. The
+        cache is emptied whenever the hypergraph, or one of its POMSets,
+        is modified. Cached results are shared between calls, so should
+        be copied before being modified. (default 16)
     """
 
-    node = {}
-    edge = {}
-    relation = {}
+    cache_size = 16
 
     def __init__(self, nodes=None, default_node_order='none'):
         if default_node_order not in ('none', 'total'):
             raise ValueError('Default node order must be one of: none, total')
         self.default_node_order = default_node_order
+        self.node = {}
+        self.edge = {}
+        self.relation = {}
+        self._modification_count = 0
+        self._cache = LRUCache(self.cache_size)
+        self._cache_count = 0
+        self._node_interner = Interner()
+        self._edge_interner = Interner()
         if nodes is not None:
             for node in nodes:
-                self.node[node] = POMSet([])
-                self.relation[self.node[node]] = node
+                self.add_node(node)
+
+    @classmethod
+    def from_incidence(cls, edge_ids, node_ids, edge_orders=None,
+                       default_node_order='none', n_jobs=1):
+        """Build a hypergraph in bulk from arrays of incidences, such as
+        the two columns of an (edge, node) edgelist.
+
+        Rows are grouped by edge and by node in a single vectorized pass
+        and every edge and node POMSet is then built directly, rather than
+        grown one label at a time via `add_edge`. The result is the same
+        as calling `add_edge` once per edge, in order of first appearance,
+        with the nodes of each edge in the order they appear.
+
+        Parameters
+        ----------
+
+        edge_ids : array_like of shape (n_incidences,)
+            The edge object of each incidence. Objects must be sortable.
+
+        node_ids : array_like of shape (n_incidences,)
+            The node object of each incidence. Objects must be sortable.
+
+        edge_orders : dict, optional
+            A dictionary mapping edge objects to the POMSet order
+            (a numpy ndarray) of that edge, indexed by the edge's nodes
+            in the order they appear. Edges not in the dictionary are
+            undirected. (default None)
+
+        default_node_order : string, optional
+            A string (either 'none', default or 'total') specifying the
+            ordering of the node POMSets; 'total' orders the edges incident
+            on each node by order of first appearance.
+
+        n_jobs : int, optional
+            The number of threads grouping the incidences by node, each
+            over a range of nodes, or -1 to use every CPU. (default 1)
+
+        Returns
+        -------
+
+        hypergraph : Hypergraph
+            The hypergraph with the given incidences.
+        """
+        incidence = _bulk_incidence(edge_ids, node_ids, None, edge_orders,
+                                    default_node_order, n_jobs)
+        return cls._from_incidence(incidence, default_node_order)
+
+    @classmethod
+    def from_bipartitions(cls, edge_ids, sides, node_ids,
+                          default_node_order='none', n_jobs=1):
+        """Build a hypergraph in bulk from arrays of incidences of edges
+        whose orders are bipartitions, such as emails from a sender to
+        their recipients.
+
+        As for `from_incidence` the arrays are grouped in a single
+        vectorized pass. Each bipartition is stored as the ranks of its
+        incidences, so no order matrix is built. The result is the same as
+        calling `add_bipartition_edge` once per edge, in order of first
+        appearance, with the nodes of each side in the order they appear.
+
+        Parameters
+        ----------
+
+        edge_ids : array_like of shape (n_incidences,)
+            The edge object of each incidence. Objects must be sortable.
+
+        sides : array_like of shape (n_incidences,)
+            The side of the edge's bipartition of each incidence: 0 (or
+            False) for a lower label and 1 (or True) for an upper label.
+
+        node_ids : array_like of shape (n_incidences,)
+            The node object of each incidence. Objects must be sortable.
+
+        default_node_order : string, optional
+            A string (either 'none', default or 'total') specifying the
+            ordering of the node POMSets, as for `from_incidence`.
+
+        n_jobs : int, optional
+            The number of threads grouping the incidences by node, as for
+            `from_incidence`. (default 1)
+
+        Returns
+        -------
+
+        hypergraph : Hypergraph
+            The hypergraph with the given incidences.
+        """
+        sides = np.asarray(sides)
+        if np.any((sides != 0) & (sides != 1)):
+            raise ValueError('Sides must be 0 (lower) or 1 (upper)')
+        incidence = _bulk_incidence(edge_ids, node_ids, sides.astype(INDEX_DTYPE),
+                                    None, default_node_order, n_jobs)
+        return cls._from_incidence(incidence, default_node_order)
+
+    @classmethod
+    def read_edgelist(cls, path, format='pairs', delimiter=None, comments='#',
+                      dtype=np.int64, chunk_size=CHUNK_SIZE, bipartite=False,
+                      default_node_order='none', n_jobs=1):
+        """Read a hypergraph from a text edgelist, which is parsed a chunk
+        of lines at a time and built in bulk with `from_incidence`.
+
+        For example the Enron edgelist in `notebook/`, with one email per
+        line as the ids of its sender and recipients, is read with each
+        email as the bipartition of its sender below its recipients by
+            Hypergraph.read_edgelist(path, format='rows', bipartite=True)
+
+        Parameters
+        ----------
+
+        path : string
+            The file to read; files ending in `.gz` are decompressed.
+
+        format : string, optional
+            Either 'pairs', for one incidence per line as an edge id and a
+            node id, or 'rows', for one edge per line as the list of its
+            node ids, with edges numbered by line. (default 'pairs')
+
+        delimiter : string, optional
+            The field delimiter, or None for any whitespace. (default None)
+
+        comments : string, optional
+            Lines starting with this are skipped, as are blank lines;
+            None for no comments.
+            (default '#')
+
+        dtype : numpy dtype, optional
+            The type to parse ids as, such as an integer type or `str`.
+            (default int64)
+
+        chunk_size : int, optional
+            The number of lines parsed at a time. (default 65536)
+
+        bipartite : bool, optional
+            For the 'rows' format, whether each edge is the bipartition of
+            the first node of its line below the rest, built in bulk with
+            `from_bipartitions`; otherwise edges are undirected.
+            (default False)
+
+        default_node_order : string, optional
+            A string (either 'none', default or 'total') specifying the
+            ordering of the node POMSets, as for `from_incidence`.
+
+        n_jobs : int, optional
+            The number of threads grouping the incidences by node, as for
+            `from_incidence`. (default 1)
+
+        Returns
+        -------
+
+        hypergraph : Hypergraph
+            The hypergraph of the edgelist, of this class.
+        """
+        if bipartite and format != 'rows':
+            raise ValueError('Bipartite edges can only be read from rows')
+        edge_ids, node_ids = read_incidences(path, format=format, delimiter=delimiter,
+                                             comments=comments, dtype=dtype,
+                                             chunk_size=chunk_size)
+        if bipartite:
+            # Rows are numbered consecutively, so each starts where the
+            # edge id changes.
+            sides = np.ones(edge_ids.shape[0], dtype=INDEX_DTYPE)
+            sides[np.flatnonzero(np.diff(edge_ids)) + 1] = 0
+            sides[:1] = 0
+            return cls.from_bipartitions(edge_ids, sides, node_ids,
+                                         default_node_order=default_node_order,
+                                         n_jobs=n_jobs)
+        return cls.from_incidence(edge_ids, node_ids,
+                                  default_node_order=default_node_order,
+                                  n_jobs=n_jobs)
+
+    @classmethod
+    def from_hypergraph(cls, hypergraph):
+        """Build a hypergraph with the same nodes, edges and orders as
+        `hypergraph`, for example to convert between storage engines.
+
+        Parameters
+        ----------
+
+        hypergraph : Hypergraph
+            The hypergraph to copy.
+
+        Returns
+        -------
+
+        hypergraph : Hypergraph
+            A new hypergraph of this class.
+        """
+        return cls._from_incidence(hypergraph.incidence(),
+                                   hypergraph.default_node_order)
+
+    @classmethod
+    def _from_incidence(cls, incidence, default_node_order):
+        result = cls(default_node_order=default_node_order)
+        result._node_interner = Interner.from_array(incidence.node_objects)
+        result._edge_interner = Interner.from_array(incidence.edge_objects)
+
+        # Incidence ids are the interned ids, so the POMSets are built
+        # straight from the id arrays.
+        edge_orders = incidence.all_edge_orders()
+        for edge_id, edge in enumerate(incidence.edge_objects):
+            result.edge[edge] = POMSet._from_label_ids(incidence.nodes_of(edge_id),
+                                                       edge_orders[edge_id],
+                                                       result._node_interner)
+            result.edge[edge]._owner = result
+            result.relation[result.edge[edge]] = edge
+
+        node_orders = incidence.all_node_orders()
+        for node_id, node in enumerate(incidence.node_objects):
+            result.node[node] = POMSet._from_label_ids(incidence.edges_of(node_id),
+                                                       node_orders[node_id],
+                                                       result._edge_interner)
+            result.node[node]._owner = result
+            result.relation[result.node[node]] = node
+
+        return result
+
+    def save(self, path):
+        """Save the hypergraph to the directory `path` in a binary
+        columnar format (see `hypergraph.io.save_incidence`) that `load`
+        can memory map.
+
+        Parameters
+        ----------
+
+        path : string
+            The directory to save to, which is created if needed.
+        """
+        save_incidence(self.incidence(), path,
+                       default_node_order=self.default_node_order)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Load a hypergraph saved with `save`.
+
+        With `mmap` the incidence arrays are memory mapped rather than
+        read, so that opening even a very large hypergraph is fast and
+        only the parts used are paged in. This suits a `SparseHypergraph`,
+        which works on the incidence arrays directly; a `Hypergraph`
+        builds all its POMSets on loading.
+
+        Parameters
+        ----------
+
+        path : string
+            The directory the hypergraph was saved to.
+
+        mmap : bool, optional
+            Whether to memory map the incidence arrays. (default True)
+
+        Returns
+        -------
+
+        hypergraph : Hypergraph
+            The loaded hypergraph, of this class.
+        """
+        incidence, metadata = load_incidence(path, mmap=mmap)
+        return cls._from_incidence(incidence, metadata['default_node_order'])
+
+    def _modified(self):
+        """Record a modification of the hypergraph, so that cached
+        results are discarded."""
+        self._modification_count += 1
+
+    def _cached_result(self, key, compute, *args, **kwargs):
+        """Return the cached result for `key`, computing and caching it
+        with `compute(*args, **kwargs)` if there is none, after emptying
+        the cache if the hypergraph has been modified since it was filled."""
+        if self._cache_count != self._modification_count:
+            self._cache.clear()
+            self._cache_count = self._modification_count
+        result = self._cache.get(key, _MISSING)
+        if result is _MISSING:
+            result = compute(*args, **kwargs)
+            self._cache.put(key, result)
+        return result
+
+    def clear_cache(self):
+        """Discard all cached derived results."""
+        self._cache.clear()
+
+    @cached
+    def incidence(self):
+        """Return the incidence structure of the hypergraph over integer
+        ids, with nodes and edges numbered in iteration order. The result
+        is cached until the hypergraph is modified, and should be treated
+        as read-only.
+
+        Returns
+        -------
+
+        incidence : Incidence
+            The integer incidence arrays of the hypergraph.
+        """
+        return Incidence.from_hypergraph(self)
 
     def node_objects(self):
         """Return a list (or iterable in python3) of the node
@@ -104,7 +420,7 @@ class Hypergraph(object):
             A set of all nodes neighboring the queries node.
         """
         result = set([])
-        for edge in self.node[node]:
+        for edge in self.node[node].support:
             result.update(self.edge[edge].labels)
         return result
 
@@ -126,7 +442,7 @@ class Hypergraph(object):
         """
         result = set([])
         for edge in self.node[node]:
-            for node_index in range(self.edge[edge].multiplcity()):
+            for node_index in range(self.edge[edge].multiplicity(node)):
                 result.update(self.edge[edge].weakly_below(node, node_index))
         return result
 
@@ -148,7 +464,7 @@ class Hypergraph(object):
         """
         result = set([])
         for edge in self.node[node]:
-            for node_index in range(self.edge[edge].multiplcity()):
+            for node_index in range(self.edge[edge].multiplicity(node)):
                 result.update(self.edge[edge].weakly_above(node, node_index))
         return result
 
@@ -171,7 +487,7 @@ class Hypergraph(object):
         """
         result = set([])
         for edge in self.node[node]:
-            for node_index in range(self.edge[edge].multiplcity()):
+            for node_index in range(self.edge[edge].multiplicity(node)):
                 result.update(self.edge[edge].strictly_below(node, node_index))
         return result
 
@@ -194,10 +510,57 @@ class Hypergraph(object):
         """
         result = set([])
         for edge in self.node[node]:
-            for node_index in range(self.edge[edge].multiplcity()):
+            for node_index in range(self.edge[edge].multiplicity(node)):
                 result.update(self.edge[edge].strictly_above(node, node_index))
         return result
 
+    def batch_neighbors(self, nodes=None, relation='neighbors', unique=True,
+                        counts=False):
+        """Get the neighbors of many nodes at once, computed in bulk from
+        the incidence arrays rather than node by node.
+
+        Parameters
+        ----------
+
+        nodes : iterable, optional
+            The nodes to find the neighbors of, or None for every node
+            of the hypergraph in iteration order. (default None)
+
+        relation : string, optional
+            One of 'neighbors', 'weak_predecessors', 'weak_successors',
+            'strict_predecessors' or 'strict_successors', matching the
+            single node method of the same name. (default 'neighbors')
+
+        unique : bool, optional
+            Whether to list each neighbor of a node once, or once per pair
+            of incidences through which they are related. (default True)
+
+        counts : bool, optional
+            Whether to also return the number of shared incidences (for
+            edges without repeated nodes, shared edges) with each
+            neighbor. Requires `unique`. (default False)
+
+        Returns
+        -------
+
+        indptr : numpy ndarray (len(nodes) + 1,)
+            The compressed row pointer; the neighbors of the i-th node
+            are `neighbors[indptr[i]:indptr[i + 1]]`.
+
+        neighbors : numpy ndarray
+            The neighboring node objects.
+
+        shared : numpy ndarray
+            The shared incidence count of each neighbor, only if `counts`.
+        """
+        incidence = self.incidence()
+        if nodes is None:
+            node_ids = np.arange(incidence.n_nodes)
+        else:
+            node_ids = incidence.node_ids(nodes)
+        result = incidence.neighbors(node_ids, relation=relation,
+                                     unique=unique, counts=counts)
+        return (result[0], incidence.node_objects[result[1]]) + result[2:]
 
     def add_node(self, new_node):
         """Add a new node to the hypergraph.
@@ -208,8 +571,11 @@ class Hypergraph(object):
         new_node : object
             The new node to add to the hypergraph
         """
-        self.node[new_node] = POMSet([])
+        self._node_interner.intern(new_node)
+        self.node[new_node] = POMSet([], interner=self._edge_interner)
+        self.node[new_node]._owner = self
         self.relation[self.node[new_node]] = new_node
+        self._modified()
 
     def add_edge(self, new_edge, edge_labels, edge_order=None):
         """Add a new edge to the hypergraph.
@@ -229,21 +595,26 @@ class Hypergraph(object):
             edge will be undirected (but can have dependencies added).
             (default None)
         """
-        self.edge[new_edge] = POMSet(edge_labels, edge_order)
+        self._edge_interner.intern(new_edge)
+        self.edge[new_edge] = POMSet(edge_labels, edge_order,
+                                     interner=self._node_interner)
+        self.edge[new_edge]._owner = self
         self.relation[self.edge[new_edge]] = new_edge
+        self._modified()
 
         for node in edge_labels:
-            if node not in self.node:
-                self.add_node(node)
+            self._attach_incidence(node, new_edge)
+
+    def _attach_incidence(self, node, new_edge):
+        """Add `new_edge` to the POMSet of `node`, adding the node if
+        needed. Under a total node order the new edge is appended as the
+        maximum of the node's chain, which is amortized O(1)."""
+        if node not in self.node:
+            self.add_node(node)
+        if self.default_node_order == 'total':
+            self.node[node].append_label(new_edge)
+        else:
             self.node[node].add_label(new_edge)
-            if self.default_node_order == 'total':
-                last_label = self.node[node].labels[-2]
-                last_label_multiplicity = self.node[node].multiplicity(last_label)
-                new_edge_multiplicity = self.node[node].multiplicity(new_edge)
-                self.node[node].add_dependency(last_label, new_edge,
-                                               from_index=last_label_multiplicity - 1,
-                                               to_index = new_edge_multiplicity - 1)
-
 
     def add_bipartition_edge(self, new_edge, label_bipartition):
         """Add a new edge where the order is a bipartition into
@@ -259,55 +630,103 @@ class Hypergraph(object):
             of all the lower labels. The second is an iterable of all the
             upper labels.
         """
-        self.edge[new_edge] = POMSet(bipartition=label_bipartition)
+        self._edge_interner.intern(new_edge)
+        self.edge[new_edge] = POMSet(bipartition=label_bipartition,
+                                     interner=self._node_interner)
+        self.edge[new_edge]._owner = self
         self.relation[self.edge[new_edge]] = new_edge
+        self._modified()
 
-        for node in label_bipartition[0]:
-            if node not in self.nodes:
-                self.add_node(node)
-            self.node[node].add_label(new_edge)
+        for node in itr.chain(label_bipartition[0], label_bipartition[1]):
+            self._attach_incidence(node, new_edge)
 
-            if self.default_node_order == 'total':
-                last_label = self.node[node].labels[-2]
-                last_label_multiplicity = self.node[node].multiplicity(last_label)
-                new_edge_multiplicity = self.node[node].multiplicity(new_edge)
-                self.node[node].add_dependency(last_label, new_edge,
-                                               from_index=last_label_multiplicity - 1,
-                                               to_index = new_edge_multiplicity - 1)
+    def remove_edge(self, edge):
+        """Remove an edge from the hypergraph, and from the POMSets of the
+        nodes it contains.
 
+        The edge is tombstoned in the POMSet of each of its nodes, which
+        is compacted when next read, so the cost is proportional to the
+        size of the edge, plus one pass over each affected POMSet however
+        many edges are removed from it.
 
-        for node in label_bipartition[1]:
-            if node not in self.nodes:
-                self.add_node(node)
-            self.node[node].add_label(new_edge)
+        Parameters
+        ----------
+
+        edge : object
+            The edge object to remove. A KeyError is raised if it is not
+            in the hypergraph.
+        """
+        pomset = self.edge.pop(edge)
+        self.relation.pop(pomset, None)
+        pomset._owner = None
+        for node in pomset.labels.tolist():
+            self.node[node].remove_label(edge)
+        self._modified()
+
+    def remove_edges_from(self, edges):
+        """Remove each of an iterable of edges from the hypergraph; see
+        `remove_edge`.
+
+        Parameters
+        ----------
 
-            if self.default_node_order == 'total':
-                last_label = self.node[node].labels[-2]
-                last_label_multiplicity = self.node[node].multiplicity(last_label)
-                new_edge_multiplicity = self.node[node].multiplicity(new_edge)
-                self.node[node].add_dependency(last_label, new_edge,
-                                               from_index=last_label_multiplicity - 1,
-                                               to_index = new_edge_multiplicity - 1)
+        edges : iterable
+            The edge objects to remove.
+        """
+        for edge in edges:
+            self.remove_edge(edge)
+
+    def remove_node(self, node):
+        """Remove a node from the hypergraph, and from the POMSets of the
+        edges incident on it. Edges left with no nodes are kept.
+
+        As for `remove_edge`, the cost is proportional to the degree of
+        the node, plus one pass over each affected POMSet.
+
+        Parameters
+        ----------
 
+        node : object
+            The node object to remove. A KeyError is raised if it is not
+            in the hypergraph.
+        """
+        pomset = self.node.pop(node)
+        self.relation.pop(pomset, None)
+        pomset._owner = None
+        for edge in pomset.labels.tolist():
+            self.edge[edge].remove_label(node)
+        self._modified()
 
+    def remove_nodes_from(self, nodes):
+        """Remove each of an iterable of nodes from the hypergraph; see
+        `remove_node`.
+
+        Parameters
+        ----------
+
+        nodes : iterable
+            The node objects to remove.
+        """
+        for node in nodes:
+            self.remove_node(node)
 
     @property
     def dual(self):
-        """Return a new hypergraph that is the dual of the current
-        hypergraph.
+        """Return the dual of the hypergraph, in which the roles of
+        nodes and edges are swapped, as a read-only view over the storage
+        of this hypergraph; nothing is copied, and changes to this
+        hypergraph show through.
 
         Returns
         -------
 
-        dual : Hypergraph
+        dual : DualHypergraph
             The dual of the hypergraph.
         """
-        result = Hypergraph()
-        result.node = self.edge.copy()
-        result.edge = self.node.copy()
-        return result
+        return DualHypergraph(self)
 
     @property
+    @cached
     def networkx_bipartite_representation(self):
         """Return a NetworkX graph of the bipartite representation of the
         hypergraph.
@@ -319,13 +738,55 @@ class Hypergraph(object):
             The bipartite representation graph.
         """
         result = nx.Graph()
-        result.add_nodes_from(self.nodes + self.edges)
-        for edge in self.edges:
+        result.add_nodes_from(self.node)
+        result.add_nodes_from(self.edge)
+        for edge in self.edge:
             for label in self.edge[edge].labels:
                 result.add_edge(edge, label)
 
         return result
 
+    @cached
+    def clique_expansion(self, weighting='count', max_edge_size=None,
+                         as_networkx=False):
+        """Return the clique expansion of the hypergraph, in which every
+        hyperedge becomes a weighted graph clique, as a sparse adjacency
+        matrix computed from the incidence matrix.
+
+        Parameters
+        ----------
+
+        weighting : string or array, optional
+            How much each hyperedge contributes to the weight of the
+            graph edges it creates: 'count' for 1, 'inverse' for
+            `1 / (|e| - 1)` so that large hyperedges do not dominate, or
+            an array with a weight per edge in iteration order.
+            (default 'count')
+
+        max_edge_size : int, optional
+            Hyperedges with more labels than this are left out, or None
+            for no cap. (default None)
+
+        as_networkx : bool, optional
+            Whether to return a NetworkX graph, with the weights as the
+            'weight' attribute of its edges, instead of a matrix.
+            (default False)
+
+        Returns
+        -------
+
+        adjacency : scipy sparse CSR matrix (n_nodes, n_nodes)
+            The symmetric weighted adjacency matrix, with rows and columns
+            indexed by the nodes in iteration order; or a NetworkX Graph
+            if `as_networkx`.
+        """
+        incidence = self.incidence()
+        adjacency = incidence.clique_expansion(weighting, max_edge_size)
+        if as_networkx:
+            return _networkx_graph(sp.triu(adjacency), incidence.node_objects,
+                                   nx.Graph())
+        return adjacency
+
     @property
     def networkx_undirected_cliquification(self):
         """Return a NetworkX graph derived from the hypergraph by
@@ -335,15 +796,55 @@ class Hypergraph(object):
         -------
 
         graph : NetworkX Graph
-            The cliquified graph.
+            The cliquified graph, with the number of hyperedges joining
+            each pair of nodes as the 'weight' attribute of its edges.
         """
-        result = nx.Graph()
-        result.add_nodes_from(self.nodes)
-        for edge in self.edge:
-            for n1, n2 in itr.combinations(self.edge[edge].labels, 2):
-                result.add_edge(n1, n2)
+        return self.clique_expansion(as_networkx=True)
 
-        return result
+    @cached
+    def directed_projection(self, relation='strict', weighting='count',
+                            max_edge_size=None, as_networkx=False):
+        """Return the directed projection of the hypergraph onto its
+        nodes, with an arc from node `i` to node `j` for every hyperedge
+        in which `j` is above `i`, as a sparse adjacency matrix computed
+        in bulk from the orders of the hyperedges.
+
+        Parameters
+        ----------
+
+        relation : string, optional
+            Either 'strict', for arcs to nodes strictly greater than `i`
+            in a hyperedge, or 'weak', for arcs to nodes greater than or
+            unrelated to `i`. (default 'strict')
+
+        weighting : string or array, optional
+            How much each hyperedge contributes to the weight of the arcs
+            it creates, as for `clique_expansion`. (default 'count')
+
+        max_edge_size : int, optional
+            Hyperedges with more labels than this are left out, or None
+            for no cap. (default None)
+
+        as_networkx : bool, optional
+            Whether to return a NetworkX DiGraph, with the weights as the
+            'weight' attribute of its edges, instead of a matrix.
+            (default False)
+
+        Returns
+        -------
+
+        adjacency : scipy sparse CSR matrix (n_nodes, n_nodes)
+            The weighted adjacency matrix, with rows as arc sources and
+            indexed by the nodes in iteration order; or a NetworkX DiGraph
+            if `as_networkx`.
+        """
+        incidence = self.incidence()
+        adjacency = incidence.directed_projection(relation, weighting,
+                                                  max_edge_size)
+        if as_networkx:
+            return _networkx_graph(adjacency, incidence.node_objects,
+                                   nx.DiGraph())
+        return adjacency
 
     @property
     def networkx_weakly_directed_cliquification(self):
@@ -351,25 +852,18 @@ class Hypergraph(object):
         converting hypergraph edges into graph cliques weakly respecting
         directedness  of hyperedges.
 
-        That is, we create a graph edge between node `i` and node `j` if
+        That is, we create a graph edge from node `i` to node `j` if
         there exists a hyperedge that includes nodes `i` and `j` such
         that `j` is greater than or unrelated to `i` in that edge.
 
         Returns
         -------
 
-        graph : NetworkX Graph
-            The cliquified graph.
+        graph : NetworkX DiGraph
+            The cliquified graph, with the number of such hyperedges as
+            the 'weight' attribute of its edges.
         """
-        result = nx.Graph()
-        result.add_nodes_from(self.nodes)
-        for edge in self.edge:
-            for n1 in self.edge[edge].support:
-                for n1_index in range(self.edge[edge].multiplicity(n1)):
-                    for n2 in self.edge[edge].weakly_above(n1, n1_index):
-                        result.add_edge(n1, n2)
-
-        return result
+        return self.directed_projection('weak', as_networkx=True)
 
     @property
     def networkx_strictly_directed_cliquification(self):
@@ -377,54 +871,327 @@ class Hypergraph(object):
         converting hypergraph edges into graph cliques strictly respecting
         directedness  of hyperedges.
 
-        That is, we create a graph edge between node `i` and node `j` if
+        That is, we create a graph edge from node `i` to node `j` if
         there exists a hyperedge that includes nodes `i` and `j` such
         that `j` is strictly greater than `i` in that edge.
 
         Returns
         -------
 
-        graph : NetworkX Graph
-            The cliquified graph.
+        graph : NetworkX DiGraph
+            The cliquified graph, with the number of such hyperedges as
+            the 'weight' attribute of its edges.
         """
-        result = nx.Graph()
-        result.add_nodes_from(self.nodes)
-        for edge in self.edge:
-            for n1 in self.edge[edge].support:
-                for n1_index in range(self.edge[edge].multiplicity(n1)):
-                    for n2 in self.edge[edge].strictly_above(n1, n1_index):
-                        result.add_edge(n1, n2)
+        return self.directed_projection('strict', as_networkx=True)
 
-        return result
+    def breadth_first_search(self, root, directed='undirected', max_depth=None):
+        """Breadth first search of the hypergraph beginning at node `root`.
 
-    def _bfs_recursion(self, search_root_list, directed='undirected'):
-        next_layer = []
-        for node in search_root_list:
-            for e in self.node[node]:
-                if directed == 'undirected':
-                    next_layer.extend(self.edge[e].labels)
-                elif directed == 'weakly':
-                    next_layer.extend(self.edge[e].weakly_above(node))
-                elif directed == 'strictly':
-                    next_layer.extend(self.edge[e].strictly_above(node))
-                else:
-                    ValueError('Directedness must be one of "undirected", weakly", "strictly"')
-
-        if len(next_layer) > 0:
-            result = [next_layer, [self._bfs_recursion(next_layer, directed=directed)]]
-        else:
-            result = [next_layer]
+        The search is iterative, visits each node once, and runs over the
+        integer incidence arrays, so the results are indexed by node id:
+        the nodes in iteration order, as in `incidence().node_objects`.
 
-        return result
+        Parameters
+        ----------
+
+        root : object
+            The node to start the search from.
 
-    def breadth_first_search(self, root, directed='undirected'):
-        """Return a nested list representing the breadth first search of the
-        hypergraph beginning at node `root`.
+        directed : string, optional
+            One of 'undirected', to step to every node of an incident edge,
+            'weakly', to step to nodes greater than or unrelated to the
+            current node in the edge, or 'strictly', to step to strictly
+            greater nodes. (default 'undirected')
+
+        max_depth : int, optional
+            The number of steps after which to stop, or None to search
+            until no more nodes can be reached. (default None)
+
+        Returns
+        -------
+
+        distances : numpy ndarray (n_nodes,)
+            The number of steps from `root` to each node, or -1 for nodes
+            that were not reached.
+
+        parents : numpy ndarray (n_nodes,)
+            The id of the node each node was first reached from, or -1 for
+            `root` and nodes that were not reached.
         """
-        result = [[root], self._bfs_recursion([root], directed=directed)]
-        return result
+        incidence = self.incidence()
+        return breadth_first_search(incidence, incidence.node_ids([root]),
+                                    directed=directed, max_depth=max_depth)
+
+    def distances(self, sources=None, directed='undirected', max_depth=None,
+                  n_jobs=1, chunk_size=64):
+        """Return the breadth first search distances from each of many
+        source nodes to every node, optionally searching in parallel over
+        a pool of processes that share the incidence arrays.
+
+        Parameters
+        ----------
+
+        sources : iterable, optional
+            The nodes to search from, or None for every node of the
+            hypergraph, giving all pairs distances. (default None)
+
+        directed : string, optional
+            The directedness of the search, as for `breadth_first_search`.
+            (default 'undirected')
+
+        max_depth : int, optional
+            The number of steps after which to stop each search, or None.
+            (default None)
+
+        n_jobs : int, optional
+            The number of worker processes, 1 to search in this process,
+            or -1 to use every CPU. (default 1)
+
+        chunk_size : int, optional
+            The number of sources searched per task. (default 64)
+
+        Returns
+        -------
+
+        distances : numpy ndarray (len(sources), n_nodes)
+            The distance from each source to every node, with nodes in
+            iteration order, or -1 for nodes that were not reached.
+        """
+        incidence = self.incidence()
+        return distance_matrix(incidence, self._source_ids(incidence, sources),
+                               directed, max_depth, n_jobs, chunk_size)
+
+    def iter_distances(self, sources=None, directed='undirected', max_depth=None,
+                       n_jobs=1, chunk_size=64):
+        """Generate the breadth first search distances from each of many
+        source nodes a chunk of sources at a time, so that all pairs
+        distances of a large hypergraph need not be held in memory at
+        once. The parameters are as for `distances`.
+
+        Yields
+        ------
+
+        sources : numpy ndarray (n_chunk,)
+            A chunk of the source nodes, in the order given.
+
+        distances : numpy ndarray (n_chunk, n_nodes)
+            The distances from each of those sources to every node, with
+            nodes in iteration order, or -1 for nodes that were not reached.
+        """
+        incidence = self.incidence()
+        for chunk, rows in iter_distances(incidence,
+                                          self._source_ids(incidence, sources),
+                                          directed, max_depth, n_jobs, chunk_size):
+            yield incidence.node_objects[chunk], rows
+
+    def random_walks(self, walk_length, starts=None, walks_per_node=1,
+                     directed='undirected', weighting='count',
+                     random_state=None, out=None):
+        """Return random walks on the hypergraph, such as for node2vec
+        style embeddings. Each step moves from the current node to an
+        incident edge and on to a node of that edge, and all the walks are
+        advanced together over the integer incidence arrays, so the walks
+        are given as node ids: the nodes in iteration order, as in
+        `incidence().node_objects`.
+
+        Parameters
+        ----------
+
+        walk_length : int
+            The number of steps of each walk.
+
+        starts : iterable, optional
+            The nodes to start walks from, or None for every node of the
+            hypergraph. (default None)
+
+        walks_per_node : int, optional
+            The number of walks to start from each node. (default 1)
+
+        directed : string, optional
+            One of 'undirected', to step to any node of the chosen edge,
+            'weakly', to step to a node greater than or unrelated to the
+            current node in the edge, or 'strictly', to step to a strictly
+            greater node. (default 'undirected')
+
+        weighting : string or array, optional
+            How likely each incident edge is to be chosen: 'count' for
+            uniformly, 'size' for in proportion to the size of the edge,
+            'inverse' for in inverse proportion, or an array of weights,
+            one per edge in iteration order. (default 'count')
+
+        random_state : int, numpy RandomState or Generator, optional
+            The seed, or random number generator, for reproducible walks.
+            (default None)
+
+        out : numpy ndarray, optional
+            A preallocated integer array of shape
+            `(len(starts) * walks_per_node, walk_length + 1)` to write the
+            walks to, or None. (default None)
+
+        Returns
+        -------
+
+        walks : numpy ndarray (len(starts) * walks_per_node, walk_length + 1)
+            The node ids visited by each walk, beginning with its start,
+            with the walks from each start consecutive. A walk that reaches
+            a node it cannot step from is padded with -1.
+        """
+        incidence = self.incidence()
+        starts = np.repeat(self._source_ids(incidence, starts), walks_per_node)
+        return random_walks(incidence, starts, walk_length, directed, weighting,
+                            random_state, out)
+
+    def iter_random_walks(self, walk_length, starts=None, walks_per_node=1,
+                          directed='undirected', weighting='count',
+                          random_state=None, chunk_size=65536):
+        """Generate random walks on the hypergraph a chunk of walks at a
+        time, so that many walks can be streamed without holding them all
+        in memory. The parameters are as for `random_walks`; the walks are
+        reproducible for a given seed and `chunk_size`.
+
+        Yields
+        ------
+
+        walks : numpy ndarray (n_chunk, walk_length + 1)
+            The node ids visited by each of a chunk of the walks.
+        """
+        incidence = self.incidence()
+        starts = np.repeat(self._source_ids(incidence, starts), walks_per_node)
+        return iter_random_walks(incidence, starts, walk_length, directed,
+                                 weighting, random_state, chunk_size)
+
+    @cached
+    def pagerank(self, alpha=0.85, directed='undirected', weighting='count',
+                 personalization=None, initial=None, tol=1e-6, max_iter=100):
+        """Return the PageRank of each node: the long run share of time a
+        random walk (as for `random_walks`) spends at the node, when at
+        each step it jumps to a random node with probability `1 - alpha`.
+        It is computed by power iteration over the incidence arrays,
+        without building the clique expansion.
+
+        Parameters
+        ----------
+
+        alpha : float, optional
+            The probability of stepping along an edge rather than
+            jumping. (default 0.85)
+
+        directed : string, optional
+            One of 'undirected', 'weakly' or 'strictly', as for
+            `random_walks`. (default 'undirected')
+
+        weighting : string or array, optional
+            How likely each incident edge is to be stepped along, as for
+            `random_walks`. (default 'count')
+
+        personalization : numpy ndarray, optional
+            The relative probability of jumping to each node, with nodes
+            in iteration order, or None to jump uniformly. (default None)
+
+        initial : numpy ndarray, optional
+            A starting estimate, such as an earlier result for this
+            hypergraph before it was modified, or None. (default None)
+
+        tol : float, optional
+            The tolerance for convergence. (default 1e-6)
+
+        max_iter : int, optional
+            The maximum number of iterations. (default 100)
+
+        Returns
+        -------
+
+        pagerank : numpy ndarray (n_nodes,)
+            The PageRank of each node, in iteration order, summing to 1.
+        """
+        return pagerank(self.incidence(), alpha, directed, weighting,
+                        personalization, initial, tol, max_iter)
+
+    @cached
+    def eigenvector_centrality(self, directed='undirected', weighting='count',
+                               initial=None, tol=1e-6, max_iter=100):
+        """Return the eigenvector centrality of each node in the clique
+        expansion of the hypergraph (or, if directed, in its directed
+        projection), computed by power iteration over the incidence
+        arrays without building the expansion.
+
+        Parameters
+        ----------
+
+        directed : string, optional
+            One of 'undirected', 'weakly' or 'strictly'. (default
+            'undirected')
+
+        weighting : string or array, optional
+            The weight of each edge, as for `clique_expansion`.
+            (default 'count')
+
+        initial : numpy ndarray, optional
+            A starting estimate, such as an earlier result for this
+            hypergraph before it was modified, or None. (default None)
+
+        tol : float, optional
+            The tolerance for convergence. (default 1e-6)
+
+        max_iter : int, optional
+            The maximum number of iterations. (default 100)
+
+        Returns
+        -------
+
+        centrality : numpy ndarray (n_nodes,)
+            The centrality of each node, in iteration order.
+        """
+        return eigenvector_centrality(self.incidence(), directed, weighting,
+                                      initial, tol, max_iter)
+
+    @cached
+    def connected_components(self):
+        """Return the connected component of each node, where nodes are
+        connected if some edge contains both, computed over the incidence
+        arrays rather than via `networkx_bipartite_representation`.
+
+        Returns
+        -------
+
+        labels : numpy ndarray (n_nodes,)
+            The component of each node, in iteration order, with the
+            components numbered in order of their first node.
+        """
+        return connected_components(self.incidence())
+
+    @cached
+    def s_connected_components(self, s=1):
+        """Return the s-connected component of each edge, where edges are
+        s-adjacent if they share at least `s` nodes and s-connected if
+        joined by a chain of s-adjacent edges. The s-connected components
+        of the nodes are those of the edges of the `dual`.
+
+        Parameters
+        ----------
+
+        s : int, optional
+            The number of nodes two edges must share to be adjacent.
+            (default 1)
+
+        Returns
+        -------
+
+        labels : numpy ndarray (n_edges,)
+            The component of each edge, in iteration order, with the
+            components numbered in order of their first edge, or -1 for
+            edges with fewer than `s` distinct nodes.
+        """
+        return s_connected_components(self.incidence(), s)
+
+    @staticmethod
+    def _source_ids(incidence, sources):
+        if sources is None:
+            return np.arange(incidence.n_nodes)
+        return incidence.node_ids(sources)
 
     @property
+    @cached
     def undirected_size_distribution_matrix(self):
         """Return a matrix of size distributions (per node) where the
         (i, j)th entry is number of nodes with i edges of size j
@@ -436,19 +1203,16 @@ class Hypergraph(object):
         dist_matrix : numpy ndarray
             The size distribution matrix
         """
-        result_dict = defaultdict(int)
-        for node in self.nodes:
-            sizes = Counter(self.edge[e].size for e in self.node[node].labels)
-            for i in sizes:
-                j = sizes[i]
-                result_dict[(i, j)] += 1
+        incidence = self.incidence()
+        return _size_distribution(np.repeat(np.arange(incidence.n_nodes),
+                                            incidence.degrees),
+                                  incidence.edge_sizes[incidence.node_edges])
 
-        matrix_dimensions = np.array(result_dict.keys()).max(axis=0)
-        result = np.zeros(matrix_dimensions, dtype=int)
-        for (i, j), count in result_dict.items():
-            result[i, j] = count
-
-        return result
+    @cached
+    def _directed_size_distribution(self, relation):
+        incidence = self.incidence()
+        return _size_distribution(incidence.edge_nodes,
+                                  incidence.order_sizes(relation))
 
     @property
     def weakly_directed_out_size_distribution(self):
@@ -463,27 +1227,13 @@ class Hypergraph(object):
         dist_matrix : numpy ndarray
             The size distribution matrix
         """
-        result_dict = defaultdict(int)
-        for node in self.nodes:
-            for e in self.node[node]:
-                for node_index in range(self.edge[e].multiplicity(node)):
-                    sizes = Counter(len(self.edge[e].weakly_above(node, node_index)))
-                    for i in sizes:
-                        j = sizes[i]
-                        result_dict[(i, j)] += 1
-
-        matrix_dimensions = np.array(result_dict.keys()).max(axis=0)
-        result = np.zeros(matrix_dimensions, dtype=int)
-        for (i, j), count in result_dict.items():
-            result[i, j] = count
-
-        return result
+        return self._directed_size_distribution('weakly_above')
 
     @property
     def weakly_directed_in_size_distribution(self):
         """Return a matrix of size distributions (per node) where
         the (i, j)th entry is the number of nodes with i edges of
-        out size (number of elements weakly below) j incident on
+        in size (number of elements weakly below) j incident on
         the node.
 
         Returns
@@ -492,21 +1242,7 @@ class Hypergraph(object):
         dist_matrix : numpy ndarray
             The size distribution matrix
         """
-        result_dict = defaultdict(int)
-        for node in self.nodes:
-            for e in self.node[node]:
-                for node_index in range(self.edge[e].multiplicity(node)):
-                    sizes = Counter(len(self.edge[e].weakly_below(node, node_index)))
-                    for i in sizes:
-                        j = sizes[i]
-                        result_dict[(i, j)] += 1
-
-        matrix_dimensions = np.array(result_dict.keys()).max(axis=0)
-        result = np.zeros(matrix_dimensions, dtype=int)
-        for (i, j), count in result_dict.items():
-            result[i, j] = count
-
-        return result
+        return self._directed_size_distribution('weakly_below')
 
     @property
     def strictly_directed_out_size_distribution(self):
@@ -521,27 +1257,13 @@ class Hypergraph(object):
         dist_matrix : numpy ndarray
             The size distribution matrix
         """
-        result_dict = defaultdict(int)
-        for node in self.nodes:
-            for e in self.node[node]:
-                for node_index in range(self.edge[e].multiplicity(node)):
-                    sizes = Counter(len(self.edge[e].strictly_above(node, node_index)))
-                    for i in sizes:
-                        j = sizes[i]
-                        result_dict[(i, j)] += 1
-
-        matrix_dimensions = np.array(result_dict.keys()).max(axis=0)
-        result = np.zeros(matrix_dimensions, dtype=int)
-        for (i, j), count in result_dict.items():
-            result[i, j] = count
-
-        return result
+        return self._directed_size_distribution('above')
 
     @property
     def strictly_directed_in_size_distribution(self):
         """Return a matrix of size distributions (per node) where
         the (i, j)th entry is the number of nodes with i edges of
-        out size (number of elements strictly below) j incident on
+        in size (number of elements strictly below) j incident on
         the node.
 
         Returns
@@ -550,23 +1272,178 @@ class Hypergraph(object):
         dist_matrix : numpy ndarray
             The size distribution matrix
         """
-        result_dict = defaultdict(int)
-        for node in self.nodes:
-            for e in self.node[node]:
-                for node_index in range(self.edge[e].multiplicity(node)):
-                    sizes = Counter(len(self.edge[e].strictly_below(node, node_index)))
-                    for i in sizes:
-                        j = sizes[i]
-                        result_dict[(i, j)] += 1
-
-        matrix_dimensions = np.array(result_dict.keys()).max(axis=0)
-        result = np.zeros(matrix_dimensions, dtype=int)
-        for (i, j), count in result_dict.items():
-            result[i, j] = count
-
-        return result
+        return self._directed_size_distribution('below')
 
     @property
     def networkx_flag_digraph(self):
         warn('Not implemented yet!')
         return None
+
+
+class DualHypergraph(Hypergraph):
+    """
+    The dual of a hypergraph, in which each edge is a node and each node
+    an edge, as a read-only view over the storage of the hypergraph.
+
+    The `node` and `edge` attributes are those of the hypergraph swapped,
+    and the incidence is its incidence transposed (see
+    `Incidence.transpose`), which shares the same arrays. No POMSets or
+    arrays are copied, so every method of `Hypergraph` runs on the dual
+    at no extra memory cost, and changes to the hypergraph show through.
+
+    Parameters
+    ----------
+
+    hypergraph : Hypergraph
+        The hypergraph to take the dual of.
+    """
+
+    def __init__(self, hypergraph):
+        self._primal = hypergraph
+        self._primal_incidence = None
+        self._incidence = None
+        self._cache = LRUCache(self.cache_size)
+        self._cache_count = None
+
+    @property
+    def node(self):
+        return self._primal.edge
+
+    @property
+    def edge(self):
+        return self._primal.node
+
+    @property
+    def relation(self):
+        return self._primal.relation
+
+    @property
+    def default_node_order(self):
+        return self._primal.default_node_order
+
+    @property
+    def _node_interner(self):
+        return self._primal._edge_interner
+
+    @property
+    def _modification_count(self):
+        return self._primal._modification_count
+
+    @property
+    def _edge_interner(self):
+        return self._primal._node_interner
+
+    @property
+    def dual(self):
+        """Return the hypergraph this is the dual of."""
+        return self._primal
+
+    def incidence(self):
+        """Return the incidence structure of the dual over integer ids:
+        the incidence of the hypergraph, transposed.
+
+        Returns
+        -------
+
+        incidence : Incidence
+            The integer incidence arrays of the dual.
+        """
+        primal_incidence = self._primal.incidence()
+        if primal_incidence is not self._primal_incidence:
+            self._primal_incidence = primal_incidence
+            self._incidence = primal_incidence.transpose()
+        return self._incidence
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError('The dual of a hypergraph is a read-only view; '
+                        'modify the hypergraph itself instead')
+
+    add_node = _read_only
+    add_edge = _read_only
+    add_bipartition_edge = _read_only
+    remove_edge = _read_only
+    remove_edges_from = _read_only
+    remove_node = _read_only
+    remove_nodes_from = _read_only
+
+
+def _bulk_incidence(edge_ids, node_ids, edge_ranks, edge_orders,
+                    default_node_order, n_jobs=1):
+    """Build the incidence of (edge, node) incidence arrays, with edges
+    and nodes numbered in order of first appearance. With `edge_ranks`
+    the rows of each edge are also ordered by rank. The rows of each node
+    are grouped by `n_jobs` threads (see `Incidence.from_edges`)."""
+    edge_ids = np.asarray(edge_ids)
+    node_ids = np.asarray(node_ids)
+    if edge_ids.ndim != 1 or edge_ids.shape != node_ids.shape:
+        raise ValueError('edge_ids and node_ids must be one dimensional '
+                         'arrays of the same length')
+    if edge_ranks is not None and edge_ranks.shape != edge_ids.shape:
+        raise ValueError('Ranks must have the same length as edge_ids')
+
+    edges, edge_codes = codes_by_first_appearance(edge_ids)
+    nodes, node_codes = codes_by_first_appearance(node_ids)
+    edges = object_array(edges.tolist())
+    nodes = object_array(nodes.tolist())
+
+    # Group rows by edge, preserving row order within each edge (and
+    # rank); the incidence then groups them by node, preserving edge order.
+    if edge_ranks is None:
+        edge_sort = np.argsort(edge_codes, kind='stable')
+    else:
+        edge_sort = np.lexsort((edge_ranks, edge_codes))
+        edge_ranks = edge_ranks[edge_sort]
+    edge_indptr = group_bounds(edge_codes, edges.shape[0])
+
+    # Dense orders are converted to their representation; those that
+    # ranks can express are stored as ranks, as `add_edge` does.
+    orders = {}
+    if edge_orders:
+        if edge_ranks is None:
+            edge_ranks = np.zeros(edge_ids.shape[0], dtype=INDEX_DTYPE)
+        edge_index = dict(zip(edges, range(edges.shape[0])))
+        for edge, order in edge_orders.items():
+            edge_id = edge_index[edge]
+            start, end = edge_indptr[edge_id], edge_indptr[edge_id + 1]
+            order = order_from_dense(order)
+            if order.size != end - start:
+                raise ValueError('The order of edge {} does not match its '
+                                 'number of nodes'.format(edge))
+            ranks = order.ranks()
+            if ranks is None:
+                orders[edge_id] = order
+            else:
+                edge_ranks[start:end] = ranks
+
+    return Incidence.from_edges(nodes.shape[0], edge_indptr,
+                                node_codes[edge_sort],
+                                edge_ranks=edge_ranks,
+                                edge_orders=orders,
+                                default_node_order=default_node_order,
+                                node_objects=nodes, edge_objects=edges,
+                                n_jobs=n_jobs)
+
+
+def _networkx_graph(adjacency, node_objects, graph):
+    """Add the nodes `node_objects` and the weighted edges of the sparse
+    matrix `adjacency` between them to the NetworkX graph `graph`."""
+    adjacency = adjacency.tocoo()
+    graph.add_nodes_from(node_objects)
+    graph.add_weighted_edges_from(zip(node_objects[adjacency.row],
+                                      node_objects[adjacency.col],
+                                      adjacency.data.tolist()))
+    return graph
+
+
+def _size_distribution(node_ids, sizes):
+    """Count, for each size `j`, the nodes with exactly `i` incidences of
+    that size among the incidences (`node_ids`, `sizes`), as a matrix."""
+    if node_ids.shape[0] == 0:
+        return np.zeros((1, 1), dtype=int)
+    n_sizes = int(sizes.max()) + 1
+    keys, counts = np.unique(node_ids.astype(np.int64) * n_sizes + sizes,
+                             return_counts=True)
+    sizes = keys % n_sizes
+    n_counts = int(counts.max()) + 1
+    result = np.bincount(counts * n_sizes + sizes, minlength=n_counts * n_sizes)
+    return result.reshape(n_counts, n_sizes)
@@ -0,0 +1,756 @@
+# -*- coding: utf-8 -*-
+"""
+hypergraph.incidence: Integer-encoded incidence arrays for hypergraphs.
+"""
+# Author: Leland McInnes <leland.mcinnes@gmail.com>
+#
+# License: LGPL v2
+import os
+import numpy as np
+import scipy.sparse as sp
+
+from concurrent.futures import ThreadPoolExecutor
+
+from .orders import order_from_ranks, UnorderedOrder, BipartiteOrder
+
+INDEX_DTYPE = np.int32
+INDPTR_DTYPE = np.int64
+
+
+def codes_by_first_appearance(ids):
+    """Return the distinct values of `ids` in order of first appearance,
+    and the index of each entry of `ids` within those values."""
+    uniques, first, inverse = np.unique(ids, return_index=True,
+                                        return_inverse=True)
+    appearance = np.argsort(first, kind='stable')
+    codes = np.empty(appearance.shape[0], dtype=INDEX_DTYPE)
+    codes[appearance] = np.arange(appearance.shape[0])
+    return uniques[appearance], codes[inverse.ravel()]
+
+def object_array(items):
+    """Return a one dimensional object array of `items`, without numpy
+    interpreting sequence items (such as tuples) as extra dimensions."""
+    items = list(items)
+    result = np.empty(len(items), dtype=object)
+    for index, item in enumerate(items):
+        result[index] = item
+    return result
+
+def group_bounds(codes, n_groups):
+    """Return the boundaries of each group of `codes` once sorted,
+    suitable for use as a compressed row pointer."""
+    bounds = np.zeros(n_groups + 1, dtype=INDPTR_DTYPE)
+    np.cumsum(np.bincount(codes, minlength=n_groups), out=bounds[1:])
+    return bounds
+
+def row_positions(indptr, rows):
+    """Return the positions of the entries of the compressed rows `rows`
+    of `indptr`, concatenated, and the length of each row."""
+    rows = np.asarray(rows, dtype=np.intp)
+    starts = indptr[rows]
+    lengths = indptr[rows + 1] - starts
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return offsets + np.arange(offsets.shape[0]), lengths
+
+def gather_rows(indptr, indices, rows):
+    """Concatenate the compressed rows `rows` of (`indptr`, `indices`)
+    without a Python level loop.
+
+    Returns
+    -------
+
+    gathered : numpy ndarray
+        The concatenated row contents.
+
+    lengths : numpy ndarray
+        The length of each gathered row.
+    """
+    positions, lengths = row_positions(indptr, rows)
+    return indices[positions], lengths
+
+# For each relation of `Incidence.neighbors`: the comparison of the rank
+# of a candidate against the rank of the query node within an edge, and
+# the order representation method giving the same positions.
+_RELATIONS = {
+    'neighbors': (None, None),
+    'weak_successors': (np.greater_equal, 'weakly_above'),
+    'strict_successors': (np.greater, 'above'),
+    'weak_predecessors': (np.less_equal, 'weakly_below'),
+    'strict_predecessors': (np.less, 'below'),
+}
+
+class Incidence(object):
+    """The incidence structure of a hypergraph over integer ids.
+
+    Nodes are numbered `0 .. n_nodes - 1` and edges `0 .. n_edges - 1`.
+    The incidence is held in compressed row form in both directions: the
+    edges incident on node `i` are
+        node_edges[node_indptr[i]:node_indptr[i + 1]]
+    and the nodes of edge `j` are
+        edge_nodes[edge_indptr[j]:edge_indptr[j + 1]]
+    each in the label order of the corresponding POMSet, with repeats
+    for multiplicity.
+
+    Orders are stored per incidence as ranks aligned with `node_edges`
+    and `edge_nodes`: a label is less than another in the same POMSet
+    exactly when its rank is smaller. This covers unordered, bipartite
+    and totally ordered POMSets; any other order is kept, keyed by id,
+    as an order representation keyed by id in `node_orders` or
+    `edge_orders`, and takes precedence over ranks.
+
+    Parameters
+    ----------
+
+    node_indptr, node_edges, node_ranks : numpy ndarray
+        The compressed rows of edges incident on each node.
+
+    edge_indptr, edge_nodes, edge_ranks : numpy ndarray
+        The compressed rows of nodes contained in each edge.
+
+    node_orders, edge_orders : dict, optional
+        Orders that cannot be expressed by ranks. (default None)
+
+    node_objects, edge_objects : numpy ndarray, optional
+        The node and edge objects corresponding to each id. (default None)
+
+    node_slots : numpy ndarray, optional
+        For each entry of `node_edges`, the position in `edge_nodes` of
+        the matching copy of the node in that edge. Derived from the
+        arrays when not given. (default None)
+    """
+
+    def __init__(self, node_indptr, node_edges, node_ranks,
+                 edge_indptr, edge_nodes, edge_ranks,
+                 node_orders=None, edge_orders=None,
+                 node_objects=None, edge_objects=None, node_slots=None):
+        self.node_indptr = node_indptr
+        self.node_edges = node_edges
+        self.node_ranks = node_ranks
+        self.edge_indptr = edge_indptr
+        self.edge_nodes = edge_nodes
+        self.edge_ranks = edge_ranks
+        self.node_orders = node_orders if node_orders is not None else {}
+        self.edge_orders = edge_orders if edge_orders is not None else {}
+        self.node_objects = node_objects
+        self.edge_objects = edge_objects
+        self._node_slots = node_slots
+        self._node_lookup = None
+
+    @property
+    def n_nodes(self):
+        return self.node_indptr.shape[0] - 1
+
+    @property
+    def n_edges(self):
+        return self.edge_indptr.shape[0] - 1
+
+    @property
+    def n_incidences(self):
+        return self.edge_nodes.shape[0]
+
+    @property
+    def degrees(self):
+        """The number of incidences of each node."""
+        return np.diff(self.node_indptr)
+
+    @property
+    def edge_sizes(self):
+        """The number of incidences of each edge."""
+        return np.diff(self.edge_indptr)
+
+    def edges_of(self, node_id):
+        """The edge ids incident on node `node_id`, in label order."""
+        return self.node_edges[self.node_indptr[node_id]:self.node_indptr[node_id + 1]]
+
+    def nodes_of(self, edge_id):
+        """The node ids contained in edge `edge_id`, in label order."""
+        return self.edge_nodes[self.edge_indptr[edge_id]:self.edge_indptr[edge_id + 1]]
+
+    def node_order(self, node_id):
+        """The order representation of the POMSet of node `node_id`, as a
+        new representation that the caller may modify."""
+        if node_id in self.node_orders:
+            return self.node_orders[node_id].copy()
+        return order_from_ranks(
+            self.node_ranks[self.node_indptr[node_id]:self.node_indptr[node_id + 1]])
+
+    def edge_order(self, edge_id):
+        """The order representation of the POMSet of edge `edge_id`, as a
+        new representation that the caller may modify."""
+        if edge_id in self.edge_orders:
+            return self.edge_orders[edge_id].copy()
+        return order_from_ranks(
+            self.edge_ranks[self.edge_indptr[edge_id]:self.edge_indptr[edge_id + 1]])
+
+    def all_node_orders(self):
+        """The order representations of every node's POMSet as a list,
+        equivalent to calling `node_order` for each node but classifying
+        the nodes in bulk."""
+        return _row_orders(self.node_indptr, self.node_ranks, self.node_orders)
+
+    def all_edge_orders(self):
+        """The order representations of every edge's POMSet as a list,
+        equivalent to calling `edge_order` for each edge but classifying
+        the edges in bulk."""
+        return _row_orders(self.edge_indptr, self.edge_ranks, self.edge_orders)
+
+    @property
+    def node_slots(self):
+        """For each entry of `node_edges`, the position in `edge_nodes` of
+        the matching copy of the node in that edge; the k-th copy of an
+        edge in a node's POMSet matches the k-th copy of the node in the
+        edge's POMSet."""
+        if self._node_slots is None:
+            node_side = np.lexsort((np.repeat(np.arange(self.n_nodes), self.degrees),
+                                    self.node_edges))
+            edge_side = np.lexsort((self.edge_nodes,
+                                    np.repeat(np.arange(self.n_edges), self.edge_sizes)))
+            if not (np.array_equal(self.node_edges[node_side],
+                                   np.repeat(np.arange(self.n_edges), self.edge_sizes)[edge_side]) and
+                    np.array_equal(np.repeat(np.arange(self.n_nodes), self.degrees)[node_side],
+                                   self.edge_nodes[edge_side])):
+                raise ValueError('Node and edge incidences do not match')
+            slots = np.empty(self.n_incidences, dtype=INDPTR_DTYPE)
+            slots[node_side] = edge_side
+            self._node_slots = slots
+        return self._node_slots
+
+    def node_ids(self, nodes):
+        """Return the ids of the node objects `nodes` as an array."""
+        if self._node_lookup is None:
+            self._node_lookup = dict(zip(self.node_objects,
+                                         range(self.node_objects.shape[0])))
+        return np.fromiter((self._node_lookup[node] for node in nodes),
+                           dtype=np.intp)
+
+    def neighbors(self, node_ids, relation='neighbors', unique=True,
+                  counts=False):
+        """Find the neighbors of many nodes at once, in bulk over the
+        incidence arrays.
+
+        Parameters
+        ----------
+
+        node_ids : array of int
+            The ids of the nodes to query.
+
+        relation : string, optional
+            Which nodes of each incident edge to return: one of
+            'neighbors' (all of them), 'weak_successors',
+            'strict_successors', 'weak_predecessors' or
+            'strict_predecessors', relative to the query node in the
+            edge's order. (default 'neighbors')
+
+        unique : bool, optional
+            Whether to return each neighbor once per query node, sorted
+            by id, rather than once per pair of incidences relating them.
+            (default True)
+
+        counts : bool, optional
+            Whether to also return, for each neighbor, the number of pairs
+            of incidences relating it to the query node; for edges without
+            repeated nodes this is the number of shared edges.
+            Requires `unique`. (default False)
+
+        Returns
+        -------
+
+        indptr : numpy ndarray (len(node_ids) + 1,)
+            The compressed row pointer; the neighbors of `node_ids[i]` are
+            `indices[indptr[i]:indptr[i + 1]]`.
+
+        indices : numpy ndarray
+            The neighbor node ids.
+
+        shared : numpy ndarray
+            The shared incidence count of each neighbor, only if `counts`.
+        """
+        if relation not in _RELATIONS:
+            raise ValueError('Relation must be one of: {}'.format(
+                ', '.join(sorted(_RELATIONS))))
+        if counts and not unique:
+            raise ValueError('Counts require unique neighbors')
+        compare, method = _RELATIONS[relation]
+        node_ids = np.asarray(node_ids, dtype=np.intp)
+        n_queries = node_ids.shape[0]
+
+        node_positions, degrees = row_positions(self.node_indptr, node_ids)
+        queries = np.repeat(np.arange(n_queries), degrees)
+        edges = self.node_edges[node_positions]
+        if compare is not None and self.edge_orders:
+            general = np.isin(edges, np.fromiter(self.edge_orders, dtype=np.intp))
+        else:
+            general = np.zeros(edges.shape[0], dtype=bool)
+        if compare is not None:
+            slots = self.node_slots[node_positions]
+        else:
+            slots = node_positions
+
+        # Edges ordered by ranks: gather every member of each incident
+        # edge and keep those whose rank compares as required.
+        ranked = ~general
+        positions, sizes = row_positions(self.edge_indptr, edges[ranked])
+        result_queries = np.repeat(queries[ranked], sizes)
+        if compare is not None:
+            keep = compare(self.edge_ranks[positions],
+                           np.repeat(self.edge_ranks[slots[ranked]], sizes))
+            positions = positions[keep]
+            result_queries = result_queries[keep]
+        result_queries = [result_queries]
+        result_nodes = [self.edge_nodes[positions]]
+
+        # Any other order is asked directly, one incidence at a time.
+        for query, edge, slot in zip(queries[general], edges[general], slots[general]):
+            start = self.edge_indptr[edge]
+            found = getattr(self.edge_orders[edge], method)(slot - start)
+            result_queries.append(np.full(found.shape[0], query, dtype=np.intp))
+            result_nodes.append(self.edge_nodes[start + found])
+
+        result_queries = np.concatenate(result_queries)
+        result_nodes = np.concatenate(result_nodes).astype(np.intp)
+        if unique:
+            keys, shared = np.unique(result_queries * max(self.n_nodes, 1) + result_nodes,
+                                     return_counts=True)
+            result_queries = keys // max(self.n_nodes, 1)
+            result_nodes = (keys % max(self.n_nodes, 1)).astype(INDEX_DTYPE)
+        else:
+            order = np.argsort(result_queries, kind='stable')
+            result_queries = result_queries[order]
+            result_nodes = result_nodes[order].astype(INDEX_DTYPE)
+
+        indptr = group_bounds(result_queries, n_queries)
+        if counts:
+            return indptr, result_nodes, shared
+        return indptr, result_nodes
+
+    @property
+    def matrix(self):
+        """The `n_nodes` x `n_edges` incidence matrix as a scipy sparse
+        CSR matrix, with entries counting multiplicity."""
+        result = sp.csr_matrix((np.ones(self.n_incidences, dtype=INDEX_DTYPE),
+                                self.node_edges, self.node_indptr),
+                               shape=(self.n_nodes, self.n_edges), copy=True)
+        result.sum_duplicates()
+        return result
+
+    def transpose(self):
+        """The incidence of the dual hypergraph, in which the roles of
+        nodes and edges are swapped. The arrays, orders and id tables are
+        shared with this incidence, not copied; only `node_slots`, if
+        already known, is inverted to match the swapped sides."""
+        node_slots = None
+        if self._node_slots is not None:
+            node_slots = np.empty(self.n_incidences, dtype=INDPTR_DTYPE)
+            node_slots[self._node_slots] = np.arange(self.n_incidences,
+                                                     dtype=INDPTR_DTYPE)
+        return Incidence(self.edge_indptr, self.edge_nodes, self.edge_ranks,
+                         self.node_indptr, self.node_edges, self.node_ranks,
+                         node_orders=self.edge_orders, edge_orders=self.node_orders,
+                         node_objects=self.edge_objects, edge_objects=self.node_objects,
+                         node_slots=node_slots)
+
+    def order_sizes(self, relation):
+        """For each incidence of an edge, aligned with `edge_nodes`, the
+        number of labels of the edge related to it by `relation`.
+
+        Parameters
+        ----------
+
+        relation : string
+            One of 'weakly_above', 'above', 'weakly_below' or 'below',
+            counting the labels greater than or unrelated to, greater
+            than, less than or unrelated to, or less than the incidence.
+
+        Returns
+        -------
+
+        sizes : numpy ndarray (n_incidences,)
+            The number of related labels, counting the incidence itself
+            for the weak relations.
+        """
+        if relation not in ('weakly_above', 'above', 'weakly_below', 'below'):
+            raise ValueError('Relation must be one of: weakly_above, above, '
+                             'weakly_below, below')
+        slot_edges = np.repeat(np.arange(self.n_edges), self.edge_sizes)
+        starts = self.edge_indptr[slot_edges]
+        sizes = self.edge_sizes[slot_edges]
+
+        # Within each edge, the labels below a rank are those sorting
+        # before it by (edge, rank).
+        span = int(self.edge_ranks.max()) + 1 if self.n_incidences > 0 else 1
+        keys = slot_edges.astype(np.int64) * span + self.edge_ranks
+        sorted_keys = np.sort(keys)
+        if relation in ('weakly_above', 'below'):
+            below = np.searchsorted(sorted_keys, keys, side='left') - starts
+            result = sizes - below if relation == 'weakly_above' else below
+        else:
+            weakly_below = np.searchsorted(sorted_keys, keys, side='right') - starts
+            result = sizes - weakly_below if relation == 'above' else weakly_below
+
+        for edge, order in self.edge_orders.items():
+            lowers, uppers = order.relations()
+            if relation in ('weakly_above', 'below'):
+                counts = np.bincount(uppers, minlength=order.size)
+            else:
+                counts = np.bincount(lowers, minlength=order.size)
+            if relation in ('weakly_above', 'weakly_below'):
+                counts = order.size - counts
+            result[self.edge_indptr[edge]:self.edge_indptr[edge + 1]] = counts
+
+        return result
+
+    def edge_weights(self, weighting='count', max_edge_size=None):
+        """Return a weight per edge for projecting the hypergraph onto
+        its nodes.
+
+        Parameters
+        ----------
+
+        weighting : string or array, optional
+            Either 'count', weighting every edge 1, 'inverse', weighting
+            an edge `e` by `1 / (|e| - 1)` so that each node's total weight
+            from an edge is at most 1, 'size', weighting an edge by `|e|`,
+            or an array of weights, one per edge. (default 'count')
+
+        max_edge_size : int, optional
+            Edges with more incidences than this are given weight 0, or
+            None for no cap. (default None)
+        """
+        sizes = self.edge_sizes
+        if isinstance(weighting, str):
+            if weighting == 'count':
+                weights = np.ones(self.n_edges, dtype=INDEX_DTYPE)
+            elif weighting == 'inverse':
+                weights = 1.0 / np.maximum(sizes - 1, 1)
+            elif weighting == 'size':
+                weights = sizes
+            else:
+                raise ValueError('Weighting must be one of: count, inverse, size')
+        else:
+            weights = np.asarray(weighting)
+            if weights.shape != (self.n_edges,):
+                raise ValueError('Weighting must have one weight per edge')
+        if max_edge_size is not None:
+            weights = np.where(sizes > max_edge_size, 0, weights)
+        return weights
+
+    def clique_expansion(self, weighting='count', max_edge_size=None):
+        """The weighted adjacency matrix of the clique expansion of the
+        hypergraph, computed as the sparse product `H W H^T` of the
+        incidence matrix `H` with the diagonal matrix `W` of edge weights.
+
+        Entry `(i, j)` sums, over every edge, the edge's weight times the
+        number of pairs of distinct incidences of nodes `i` and `j` in
+        it; the diagonal is only non-zero for nodes repeated in an edge.
+
+        Parameters
+        ----------
+
+        weighting : string or array, optional
+            The edge weighting, as for `edge_weights`. (default 'count')
+
+        max_edge_size : int, optional
+            Edges with more incidences than this are left out, or None
+            for no cap. (default None)
+
+        Returns
+        -------
+
+        adjacency : scipy sparse CSR matrix (n_nodes, n_nodes)
+            The symmetric weighted adjacency matrix.
+        """
+        weights = self.edge_weights(weighting, max_edge_size)
+        incidence = self.matrix
+        weighted = incidence @ sp.diags(weights, dtype=weights.dtype)
+        result = (weighted @ incidence.T).tocsr()
+        # A node paired with itself should count pairs of its distinct
+        # copies, m * (m - 1) / 2 for multiplicity m, not m ** 2.
+        excess = (result.diagonal() + weighted.sum(axis=1).A1) / 2
+        result = (result - sp.diags(excess, dtype=result.dtype)).tocsr()
+        result.eliminate_zeros()
+        return result
+
+    def directed_projection(self, relation='strict', weighting='count',
+                            max_edge_size=None):
+        """The weighted adjacency matrix of the directed projection of the
+        hypergraph, with an arc from node `i` to node `j` for each pair of
+        distinct incidences of `i` and `j` in an edge with `j` above `i`.
+
+        Edges whose order is given by ranks are projected in bulk:
+        unordered edges contribute no strict arcs, edges with two ranks
+        (such as bipartitions) contribute the sparse product of their lower
+        and upper incidences, and the pairs of any other ranked edge are
+        compared all at once. Other orders are read from their relations.
+
+        Parameters
+        ----------
+
+        relation : string, optional
+            Either 'strict', for arcs to nodes strictly above, or 'weak',
+            for arcs to nodes above or unrelated. (default 'strict')
+
+        weighting : string or array, optional
+            The edge weighting, as for `edge_weights`. (default 'count')
+
+        max_edge_size : int, optional
+            Edges with more incidences than this are left out, or None
+            for no cap. (default None)
+
+        Returns
+        -------
+
+        adjacency : scipy sparse CSR matrix (n_nodes, n_nodes)
+            The weighted adjacency matrix, with rows as arc sources.
+        """
+        if relation not in ('strict', 'weak'):
+            raise ValueError('Relation must be one of: strict, weak')
+        weights = self.edge_weights(weighting, max_edge_size)
+        shape = (self.n_nodes, self.n_nodes)
+        slot_edges = np.repeat(np.arange(self.n_edges), self.edge_sizes)
+
+        active = weights != 0
+        if self.edge_orders:
+            general = np.zeros(self.n_edges, dtype=bool)
+            general[np.fromiter(self.edge_orders, dtype=np.intp)] = True
+            active &= ~general
+        lowest = np.full(self.n_edges, np.iinfo(INDEX_DTYPE).max, dtype=INDEX_DTYPE)
+        np.minimum.at(lowest, slot_edges, self.edge_ranks)
+        highest = np.full(self.n_edges, np.iinfo(INDEX_DTYPE).min, dtype=INDEX_DTYPE)
+        np.maximum.at(highest, slot_edges, self.edge_ranks)
+        is_lowest = self.edge_ranks == lowest[slot_edges]
+        is_highest = self.edge_ranks == highest[slot_edges]
+        n_middle = np.bincount(slot_edges[~(is_lowest | is_highest)],
+                               minlength=self.n_edges)
+        active &= lowest < highest
+        two_ranks = active & (n_middle == 0)
+        many_ranks = active & (n_middle > 0)
+
+        # Two ranks: every lower incidence is below every upper one.
+        in_two = two_ranks[slot_edges]
+        lower = sp.csr_matrix((np.ones(np.count_nonzero(in_two & is_lowest), dtype=INDEX_DTYPE),
+                               (self.edge_nodes[in_two & is_lowest],
+                                slot_edges[in_two & is_lowest])),
+                              shape=(self.n_nodes, self.n_edges))
+        upper = sp.csr_matrix((np.ones(np.count_nonzero(in_two & is_highest), dtype=INDEX_DTYPE),
+                               (self.edge_nodes[in_two & is_highest],
+                                slot_edges[in_two & is_highest])),
+                              shape=(self.n_nodes, self.n_edges))
+        result = lower @ sp.diags(weights, dtype=weights.dtype) @ upper.T
+
+        # More ranks: compare each incidence with the rest of its edge.
+        sources = np.flatnonzero(many_ranks[slot_edges])
+        targets, sizes = row_positions(self.edge_indptr, slot_edges[sources])
+        sources = np.repeat(sources, sizes)
+        keep = self.edge_ranks[targets] > self.edge_ranks[sources]
+        rows = [self.edge_nodes[sources[keep]]]
+        cols = [self.edge_nodes[targets[keep]]]
+        data = [weights[slot_edges[sources[keep]]]]
+
+        for edge, order in self.edge_orders.items():
+            if weights[edge] == 0:
+                continue
+            lowers, uppers = order.relations()
+            rows.append(self.edge_nodes[self.edge_indptr[edge] + lowers])
+            cols.append(self.edge_nodes[self.edge_indptr[edge] + uppers])
+            data.append(np.full(lowers.shape[0], weights[edge]))
+
+        pairs = sp.coo_matrix((np.concatenate(data).astype(weights.dtype),
+                               (np.concatenate(rows), np.concatenate(cols))),
+                              shape=shape)
+        result = (result + pairs).tocsr()
+
+        # A node is weakly above another exactly when it is not strictly
+        # below it, so the weak arcs are the clique less the reversed
+        # strict arcs; the clique counts a node's own pairs unordered.
+        if relation == 'weak':
+            clique = self.clique_expansion(weights)
+            result = (clique + sp.diags(clique.diagonal(), dtype=clique.dtype) -
+                      result.T).tocsr()
+        result.eliminate_zeros()
+        return result
+
+    @classmethod
+    def from_edges(cls, n_nodes, edge_indptr, edge_nodes, edge_ranks=None,
+                   edge_orders=None, default_node_order='none',
+                   node_objects=None, edge_objects=None, n_jobs=1):
+        """Build the incidence from the nodes of each edge, deriving the
+        edges of each node with a stable sort.
+
+        Each node's edges are ordered by edge id; with
+        `default_node_order='total'` they are also ranked that way. With
+        `n_jobs` greater than one (or -1 for every CPU) the node rows are
+        split into ranges of node ids of about equal numbers of
+        incidences, each sorted by a thread straight into its slice of
+        the node arrays.
+        """
+        edge_nodes = np.asarray(edge_nodes, dtype=INDEX_DTYPE)
+        edge_indptr = np.asarray(edge_indptr, dtype=INDPTR_DTYPE)
+        n_edges = edge_indptr.shape[0] - 1
+        if edge_ranks is None:
+            edge_ranks = np.zeros(edge_nodes.shape[0], dtype=INDEX_DTYPE)
+
+        incidence_edges = np.repeat(np.arange(n_edges, dtype=INDEX_DTYPE),
+                                    np.diff(edge_indptr))
+        node_indptr = group_bounds(edge_nodes, n_nodes)
+        node_sort = np.empty(edge_nodes.shape[0], dtype=np.intp)
+        node_edges = np.empty(edge_nodes.shape[0], dtype=INDEX_DTYPE)
+        if default_node_order == 'total':
+            node_ranks = np.empty(edge_nodes.shape[0], dtype=INDEX_DTYPE)
+        else:
+            node_ranks = np.zeros(edge_nodes.shape[0], dtype=INDEX_DTYPE)
+
+        if n_jobs == -1:
+            n_jobs = os.cpu_count()
+        bounds = _node_shards(node_indptr, n_jobs)
+        shards = [(edge_nodes, incidence_edges, node_indptr, first, last,
+                   node_sort, node_edges,
+                   node_ranks if default_node_order == 'total' else None)
+                  for first, last in zip(bounds[:-1], bounds[1:])]
+        if len(shards) > 1:
+            # Sorting and indexing release the GIL, and every thread
+            # writes its own slice of the node arrays.
+            with ThreadPoolExecutor(max_workers=len(shards)) as executor:
+                list(executor.map(_fill_node_rows, *zip(*shards)))
+        else:
+            for shard in shards:
+                _fill_node_rows(*shard)
+
+        return cls(node_indptr, node_edges, node_ranks,
+                   edge_indptr, edge_nodes, np.asarray(edge_ranks, dtype=INDEX_DTYPE),
+                   edge_orders=edge_orders,
+                   node_objects=node_objects, edge_objects=edge_objects,
+                   node_slots=node_sort)
+
+    @classmethod
+    def from_hypergraph(cls, hypergraph):
+        """Encode the node and edge POMSets of `hypergraph` as an
+        incidence, numbering nodes and edges in iteration order."""
+        node_objects = object_array(hypergraph.node)
+        edge_objects = object_array(hypergraph.edge)
+        node_ids = dict(zip(node_objects, range(node_objects.shape[0])))
+        edge_ids = dict(zip(edge_objects, range(edge_objects.shape[0])))
+
+        node_indptr, node_edges, node_ranks, node_orders = \
+            _encode_pomsets(hypergraph.node.values(), edge_ids)
+        edge_indptr, edge_nodes, edge_ranks, edge_orders = \
+            _encode_pomsets(hypergraph.edge.values(), node_ids)
+
+        return cls(node_indptr, node_edges, node_ranks,
+                   edge_indptr, edge_nodes, edge_ranks,
+                   node_orders=node_orders, edge_orders=edge_orders,
+                   node_objects=node_objects, edge_objects=edge_objects)
+
+
+def _node_shards(node_indptr, n_jobs):
+    """The bounds of at most `n_jobs` ranges of node ids, splitting the
+    incidences of `node_indptr` about equally between them."""
+    n_nodes = node_indptr.shape[0] - 1
+    targets = np.linspace(0, node_indptr[-1], max(n_jobs, 1) + 1)[1:-1]
+    inner = np.searchsorted(node_indptr, targets)
+    return np.unique(np.concatenate(([0], inner, [n_nodes]))).tolist()
+
+
+def _fill_node_rows(edge_nodes, incidence_edges, node_indptr, first, last,
+                    node_sort, node_edges, node_ranks):
+    """Write the rows of the nodes `first .. last - 1` into their slices of
+    `node_sort`, `node_edges` and, unless it is None, `node_ranks`, the
+    rank of each edge of a node being its position in the node's row."""
+    start, end = node_indptr[first], node_indptr[last]
+    if first == 0 and last == node_indptr.shape[0] - 1:
+        positions = np.argsort(edge_nodes, kind='stable')
+    else:
+        positions = np.flatnonzero((edge_nodes >= first) & (edge_nodes < last))
+        positions = positions[np.argsort(edge_nodes[positions], kind='stable')]
+    node_sort[start:end] = positions
+    node_edges[start:end] = incidence_edges[positions]
+    if node_ranks is not None:
+        sizes = np.diff(node_indptr[first:last + 1])
+        node_ranks[start:end] = (np.arange(start, end) -
+                                 np.repeat(node_indptr[first:last], sizes))
+
+
+def _row_orders(indptr, ranks, orders):
+    """The order representation of each compressed row of `ranks`, or a
+    copy of the order in `orders` for the rows it has. Rows with one or two
+    distinct ranks, the unordered and bipartite rows, are found in a single
+    vectorized pass, so that only other rows, and the two label chains,
+    take a call to `order_from_ranks`."""
+    n_rows = indptr.shape[0] - 1
+    sizes = np.diff(indptr)
+    lowest = np.zeros(n_rows, dtype=ranks.dtype)
+    highest = np.zeros(n_rows, dtype=ranks.dtype)
+    nonempty = sizes > 0
+    if ranks.shape[0] > 0:
+        starts = indptr[:-1][nonempty]
+        lowest[nonempty] = np.minimum.reduceat(ranks, starts)
+        highest[nonempty] = np.maximum.reduceat(ranks, starts)
+    rows = np.repeat(np.arange(n_rows), sizes)
+    is_lower = ranks == lowest[rows]
+    is_upper = (ranks == highest[rows]) & ~is_lower
+    two_level = np.bincount(rows, weights=is_lower | is_upper,
+                            minlength=n_rows) == sizes
+    # Two-level rows of two labels are chains, as `order_from_ranks` makes
+    # them.
+    bipartite = two_level & (lowest != highest) & (sizes > 2)
+
+    # The positions of the lower and upper labels of bipartite rows,
+    # grouped by row.
+    positions = np.arange(ranks.shape[0]) - indptr[rows]
+    in_bipartite = bipartite[rows]
+    lower_positions = positions[is_lower & in_bipartite]
+    upper_positions = positions[is_upper & in_bipartite]
+    lower_bounds = group_bounds(rows[is_lower & in_bipartite], n_rows).tolist()
+    upper_bounds = group_bounds(rows[is_upper & in_bipartite], n_rows).tolist()
+
+    result = []
+    for row, size in enumerate(sizes.tolist()):
+        if row in orders:
+            result.append(orders[row].copy())
+        elif not two_level[row] or (size == 2 and lowest[row] != highest[row]):
+            result.append(order_from_ranks(ranks[indptr[row]:indptr[row + 1]]))
+        elif bipartite[row]:
+            result.append(BipartiteOrder(
+                size,
+                lower_positions[lower_bounds[row]:lower_bounds[row + 1]],
+                upper_positions[upper_bounds[row]:upper_bounds[row + 1]]))
+        else:
+            result.append(UnorderedOrder(size))
+    return result
+
+
+def _encode_pomsets(pomsets, label_ids):
+    """Encode an iterable of POMSets as compressed rows of label ids
+    with ranks, and a dict of any orders not expressible by ranks."""
+    pomsets = list(pomsets)
+    indptr = np.zeros(len(pomsets) + 1, dtype=INDPTR_DTYPE)
+    np.cumsum([pomset.size for pomset in pomsets], out=indptr[1:])
+
+    # Interned labels are translated with one array per interner rather
+    # than a dictionary lookup per label.
+    remaps = {}
+    indices = np.zeros(indptr[-1], dtype=INDEX_DTYPE)
+    for index, pomset in enumerate(pomsets):
+        interner = pomset._interner
+        if interner is None:
+            ids = [label_ids[label] for label in pomset.labels]
+        else:
+            if id(interner) not in remaps:
+                remaps[id(interner)] = np.fromiter(
+                    (label_ids.get(label, -1) for label in interner),
+                    dtype=INDEX_DTYPE, count=len(interner))
+            ids = remaps[id(interner)][pomset.label_ids]
+        indices[indptr[index]:indptr[index + 1]] = ids
+    if (indices < 0).any():
+        raise KeyError('POMSet labels are not all in the hypergraph')
+    ranks = np.zeros(indptr[-1], dtype=INDEX_DTYPE)
+    orders = {}
+    for index, pomset in enumerate(pomsets):
+        if pomset.order_kind == 'unordered':
+            continue
+        pomset_ranks = pomset._order.ranks()
+        if pomset_ranks is None:
+            orders[index] = pomset._order.copy()
+        else:
+            ranks[indptr[index]:indptr[index + 1]] = pomset_ranks
+
+    return indptr, indices, ranks, orders
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+hypergraph.interning: Mapping of arbitrary node and edge objects to
+contiguous integer ids.
+"""
+# Author: Leland McInnes <leland.mcinnes@gmail.com>
+#
+# License: LGPL v2
+import numpy as np
+
+from .orders import _grow_capacity
+from .incidence import INDEX_DTYPE
+
+
+class Interner(object):
+    """An interning table assigning each distinct (hashable) object a
+    contiguous integer id, `0, 1, 2, ...` in order of first interning.
+
+    Structures that hold many references to nodes or edges, such as the
+    label arrays of POMSets, can then store compact integer ids, compare
+    them with vectorized integer operations, and translate back to the
+    objects only at the public API. The objects themselves are kept once,
+    in a backing object array whose capacity is doubled as needed.
+
+    Parameters
+    ----------
+
+    objects : iterable, optional
+        Objects to intern, in order, or None. (default None)
+
+    dtype : numpy dtype, optional
+        The integer type of the ids; int32 unless more than 2**31 - 1
+        objects are needed. (default int32)
+    """
+
+    def __init__(self, objects=None, dtype=INDEX_DTYPE):
+        self.dtype = np.dtype(dtype)
+        self._ids = {}
+        self._objects = np.empty(0, dtype=object)
+        self._size = 0
+        if objects is not None:
+            self.intern_all(objects)
+
+    @classmethod
+    def from_array(cls, objects, dtype=INDEX_DTYPE):
+        """Wrap an array of distinct objects, such as a memory-mapped id
+        table, as an interner with ids given by position. The lookup from
+        objects to ids is only built when first needed, and the array is
+        only copied if more objects are interned.
+        """
+        result = cls(dtype=dtype)
+        result._objects = objects
+        result._size = objects.shape[0]
+        result._ids = None
+        return result
+
+    def _lookup(self):
+        if self._ids is None:
+            self._ids = dict(zip(self._objects[:self._size].tolist(),
+                                 range(self._size)))
+        return self._ids
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, obj):
+        return obj in self._lookup()
+
+    def __iter__(self):
+        return iter(self._objects[:self._size])
+
+    def _reserve(self, required_size):
+        capacity = self._objects.shape[0]
+        if required_size <= capacity:
+            return
+        if required_size > np.iinfo(self.dtype).max:
+            raise OverflowError('Too many objects for ids of type {}'.format(self.dtype))
+        new_objects = np.empty(_grow_capacity(capacity, required_size), dtype=object)
+        new_objects[:self._size] = self._objects[:self._size]
+        self._objects = new_objects
+
+    def intern(self, obj):
+        """Return the id of `obj`, assigning it the next id if it has not
+        been interned before."""
+        ids = self._lookup()
+        result = ids.get(obj)
+        if result is None:
+            self._reserve(self._size + 1)
+            result = self._size
+            ids[obj] = result
+            self._objects[result] = obj
+            self._size += 1
+        return result
+
+    def intern_all(self, objects):
+        """Return the ids of `objects` as an array, interning any not
+        seen before."""
+        intern = self.intern
+        return np.fromiter((intern(obj) for obj in objects), dtype=self.dtype)
+
+    def id(self, obj):
+        """Return the id of `obj`, raising KeyError if it has not been
+        interned."""
+        return self._lookup()[obj]
+
+    def get(self, obj, default=None):
+        """Return the id of `obj`, or `default` if it has not been
+        interned."""
+        return self._lookup().get(obj, default)
+
+    def ids(self, objects):
+        """Return the ids of `objects` as an array, raising KeyError if
+        any has not been interned."""
+        ids = self._lookup()
+        return np.fromiter((ids[obj] for obj in objects), dtype=self.dtype)
+
+    def object(self, obj_id):
+        """Return the object with id `obj_id`."""
+        if not 0 <= obj_id < self._size:
+            raise IndexError('No object with id {}'.format(obj_id))
+        return self._objects[obj_id]
+
+    def objects(self, ids=None):
+        """Return the objects with the given ids as an object array, or
+        all interned objects in id order (as a read-only view) if `ids`
+        is None."""
+        if ids is None:
+            result = self._objects[:self._size]
+            result.flags.writeable = False
+            return result
+        return self._objects[:self._size][ids]
@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+"""
+hypergraph.io: Reading and writing hypergraphs.
+"""
+# Author: Leland McInnes <leland.mcinnes@gmail.com>
+#
+# License: LGPL v2
+import os
+import gzip
+import json
+import itertools as itr
+import warnings
+import numpy as np
+
+from .incidence import Incidence, INDEX_DTYPE, INDPTR_DTYPE, object_array
+from .orders import order_from_relations
+
+FORMAT_VERSION = 1
+
+# The default number of lines parsed at a time by `read_incidences`.
+CHUNK_SIZE = 1 << 16
+
+# The incidence arrays, each saved as `<name>.npy`.
+_INCIDENCE_ARRAYS = ('node_indptr', 'node_edges', 'node_ranks', 'node_slots',
+                     'edge_indptr', 'edge_nodes', 'edge_ranks')
+
+
+def save_incidence(incidence, path, **metadata):
+    """Save an incidence to the directory `path` in a binary columnar
+    format that `load_incidence` can memory map.
+
+    Each array is stored in its own `.npy` file: the compressed rows of
+    the incidence in both directions with their ranks, and the id tables
+    `node_objects.npy` and `edge_objects.npy`. Orders given by ranks
+    (unordered, bipartite and total orders, and weak orders generally)
+    are stored by the rank arrays; any other order is stored as the list
+    of its relations, in `node_order_*.npy` and `edge_order_*.npy`.
+    Id tables of numbers or strings are stored as plain arrays; any
+    other objects are pickled. A `metadata.json` file records the layout
+    and any extra `metadata` given.
+
+    Parameters
+    ----------
+
+    incidence : Incidence
+        The incidence to save.
+
+    path : string
+        The directory to save to, which is created if needed.
+    """
+    if not os.path.isdir(path):
+        os.makedirs(path)
+
+    for name in _INCIDENCE_ARRAYS:
+        np.save(os.path.join(path, name + '.npy'), getattr(incidence, name))
+
+    tables = {}
+    for name in ('node_objects', 'edge_objects'):
+        tables[name] = _save_objects(os.path.join(path, name + '.npy'),
+                                     getattr(incidence, name))
+
+    for side in ('node', 'edge'):
+        _save_orders(path, side, getattr(incidence, side + '_orders'))
+
+    metadata = dict(metadata)
+    metadata.update({
+        'format_version': FORMAT_VERSION,
+        'n_nodes': int(incidence.n_nodes),
+        'n_edges': int(incidence.n_edges),
+        'n_incidences': int(incidence.n_incidences),
+        'tables': tables,
+    })
+    with open(os.path.join(path, 'metadata.json'), 'w') as metadata_file:
+        json.dump(metadata, metadata_file, indent=2, sort_keys=True)
+
+
+def load_incidence(path, mmap=True):
+    """Load an incidence saved by `save_incidence`.
+
+    With `mmap` the arrays are opened as read-only `numpy.memmap` arrays,
+    so opening is fast regardless of size and only the parts of the
+    arrays actually used are read from disk. Pickled id tables and orders
+    not given by ranks are always read into memory.
+
+    Only load pickled id tables from trusted sources, since unpickling
+    can execute arbitrary code.
+
+    Parameters
+    ----------
+
+    path : string
+        The directory the incidence was saved to.
+
+    mmap : bool, optional
+        Whether to memory map the arrays rather than read them into
+        memory. (default True)
+
+    Returns
+    -------
+
+    incidence : Incidence
+        The loaded incidence.
+
+    metadata : dict
+        The metadata stored with the incidence.
+    """
+    with open(os.path.join(path, 'metadata.json')) as metadata_file:
+        metadata = json.load(metadata_file)
+    if metadata.get('format_version') != FORMAT_VERSION:
+        raise ValueError('Unsupported hypergraph format version {}'.format(
+            metadata.get('format_version')))
+
+    mmap_mode = 'r' if mmap else None
+    arrays = dict((name, np.load(os.path.join(path, name + '.npy'),
+                                 mmap_mode=mmap_mode))
+                  for name in _INCIDENCE_ARRAYS)
+    objects = {}
+    for name, kind in metadata['tables'].items():
+        if kind == 'pickle':
+            objects[name] = np.load(os.path.join(path, name + '.npy'),
+                                    allow_pickle=True)
+        else:
+            objects[name] = np.load(os.path.join(path, name + '.npy'),
+                                    mmap_mode=mmap_mode)
+
+    incidence = Incidence(arrays['node_indptr'], arrays['node_edges'],
+                          arrays['node_ranks'], arrays['edge_indptr'],
+                          arrays['edge_nodes'], arrays['edge_ranks'],
+                          node_orders=_load_orders(path, 'node', arrays['node_indptr']),
+                          edge_orders=_load_orders(path, 'edge', arrays['edge_indptr']),
+                          node_objects=objects['node_objects'],
+                          edge_objects=objects['edge_objects'],
+                          node_slots=arrays['node_slots'])
+    return incidence, metadata
+
+
+def _save_objects(filename, objects):
+    """Save an id table, as a plain array if the objects are all numbers
+    or all strings and survive the conversion unchanged, or pickled
+    otherwise. Returns which of the two was used."""
+    items = list(objects)
+    if items:
+        try:
+            values = np.array(items)
+        except (ValueError, TypeError):
+            values = None
+        if (values is not None and values.ndim == 1 and
+                values.dtype.kind in 'biufU' and values.tolist() == items):
+            np.save(filename, values)
+            return 'array'
+    np.save(filename, object_array(items), allow_pickle=True)
+    return 'pickle'
+
+
+def _save_orders(path, side, orders):
+    """Save the orders of one side of an incidence as relation lists."""
+    ids = np.array(sorted(orders), dtype=INDEX_DTYPE)
+    relations = [orders[index].relations() for index in ids.tolist()]
+    indptr = np.zeros(ids.shape[0] + 1, dtype=INDPTR_DTYPE)
+    np.cumsum([lowers.shape[0] for lowers, _ in relations], out=indptr[1:])
+    empty = np.zeros(0, dtype=INDEX_DTYPE)
+    lowers = np.concatenate([x[0] for x in relations] + [empty]).astype(INDEX_DTYPE)
+    uppers = np.concatenate([x[1] for x in relations] + [empty]).astype(INDEX_DTYPE)
+    for name, array in (('ids', ids), ('indptr', indptr),
+                        ('lowers', lowers), ('uppers', uppers)):
+        np.save(os.path.join(path, '{}_order_{}.npy'.format(side, name)), array)
+
+
+def _load_orders(path, side, indptr):
+    """Load the orders of one side of an incidence from relation lists,
+    sizing each by the rows of `indptr`."""
+    arrays = dict((name, np.load(os.path.join(path, '{}_order_{}.npy'.format(side, name))))
+                  for name in ('ids', 'indptr', 'lowers', 'uppers'))
+    result = {}
+    for k, index in enumerate(arrays['ids'].tolist()):
+        start, end = arrays['indptr'][k], arrays['indptr'][k + 1]
+        result[index] = order_from_relations(int(indptr[index + 1] - indptr[index]),
+                                             arrays['lowers'][start:end],
+                                             arrays['uppers'][start:end])
+    return result
+
+
+def iter_incidence_chunks(path, format='pairs', delimiter=None, comments='#',
+                          dtype=np.int64, chunk_size=CHUNK_SIZE):
+    """Parse a text edgelist a fixed number of lines at a time, yielding
+    the incidences of each chunk as arrays.
+
+    Parameters
+    ----------
+
+    path : string
+        The file to read; files ending in `.gz` are decompressed.
+
+    format : string, optional
+        Either 'pairs', for one incidence per line as an edge id and a
+        node id, or 'rows', for one edge per line as the list of its node
+        ids, with edges numbered by line (as in the Enron edgelist shipped
+        in `notebook/`). (default 'pairs')
+
+    delimiter : string, optional
+        The field delimiter, or None for any whitespace. (default None)
+
+    comments : string, optional
+        Lines starting with this are skipped, as are blank lines;
+        None for no comments.
+        (default '#')
+
+    dtype : numpy dtype, optional
+        The type to parse ids as, such as an integer type or `str`.
+        (default int64)
+
+    chunk_size : int, optional
+        The number of lines parsed at a time. (default 65536)
+
+    Yields
+    ------
+
+    edge_ids, node_ids : numpy ndarray
+        The edge and node id of each incidence in the chunk.
+    """
+    if format not in ('pairs', 'rows'):
+        raise ValueError('Format must be one of: pairs, rows')
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt') as edgelist:
+        n_lines = 0
+        n_rows = 0
+        while True:
+            lines = list(itr.islice(edgelist, chunk_size))
+            if not lines:
+                break
+            if format == 'pairs':
+                edge_ids, node_ids = _parse_pairs(lines, delimiter, comments, dtype)
+            else:
+                edge_ids, node_ids, rows = _parse_rows(lines, delimiter, comments,
+                                                       dtype, n_rows)
+                n_rows += rows
+            if edge_ids is None:
+                raise ValueError('Could not parse lines {} to {} as {}'.format(
+                    n_lines + 1, n_lines + len(lines), format))
+            n_lines += len(lines)
+            yield edge_ids, node_ids
+
+
+def _parse_pairs(lines, delimiter, comments, dtype):
+    """Parse lines of (edge id, node id) pairs with NumPy's text parser,
+    returning None for the ids if any line is not a pair."""
+    with warnings.catch_warnings():
+        # A chunk of only comments is not worth a warning.
+        warnings.simplefilter('ignore', UserWarning)
+        try:
+            values = np.loadtxt(lines, dtype=dtype, delimiter=delimiter,
+                                comments=comments, ndmin=2)
+        except ValueError:
+            return None, None
+    if values.shape[0] == 0:
+        return np.zeros(0, dtype=dtype), np.zeros(0, dtype=dtype)
+    if values.shape[1] != 2:
+        return None, None
+    return values[:, 0], values[:, 1]
+
+
+def _parse_rows(lines, delimiter, comments, dtype, first_row):
+    """Parse lines each listing the node ids of an edge, numbering the
+    edges from `first_row`, and also return the number of edges. The ids
+    are None if they cannot be parsed. Empty fields, as left by a trailing
+    delimiter, are skipped, and the ids of the whole chunk are converted
+    to `dtype` in one call."""
+    rows = [_row_fields(line, delimiter) for line in lines
+            if comments is None or not line.startswith(comments)]
+    rows = [fields for fields in rows if fields]
+    lengths = np.fromiter((len(fields) for fields in rows),
+                          dtype=np.intp, count=len(rows))
+    edge_ids = np.repeat(np.arange(first_row, first_row + len(rows)), lengths)
+    try:
+        node_ids = np.array(list(itr.chain.from_iterable(rows)), dtype=dtype)
+    except ValueError:
+        return None, None, len(rows)
+    return edge_ids, node_ids, len(rows)
+
+
+def _row_fields(line, delimiter):
+    """The non-empty fields of a line split at `delimiter`, or at
+    whitespace if it is None."""
+    if delimiter is None:
+        return line.split()
+    return [field for field in (part.strip() for part in line.split(delimiter))
+            if field]
+
+
+def read_incidences(path, format='pairs', delimiter=None, comments='#',
+                    dtype=np.int64, chunk_size=CHUNK_SIZE):
+    """Read all the incidences of a text edgelist, parsing it a chunk at
+    a time (see `iter_incidence_chunks`, which takes the same parameters)
+    so that only the parsed arrays, not the text, are held in memory.
+
+    Returns
+    -------
+
+    edge_ids, node_ids : numpy ndarray
+        The edge and node id of each incidence, in file order.
+    """
+    edge_chunks = []
+    node_chunks = []
+    for edge_ids, node_ids in iter_incidence_chunks(path, format, delimiter,
+                                                    comments, dtype, chunk_size):
+        edge_chunks.append(edge_ids)
+        node_chunks.append(node_ids)
+    if not edge_chunks:
+        return np.zeros(0, dtype=dtype), np.zeros(0, dtype=dtype)
+    return np.concatenate(edge_chunks), np.concatenate(node_chunks)
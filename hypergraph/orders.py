@@ -0,0 +1,778 @@
+# -*- coding: utf-8 -*-
+"""
+hypergraph.orders: Representations of the partial orders of POMSets.
+
+Each representation stores the order over label positions `0 .. size - 1`
+in whatever form fits its structure, so that memory scales with the
+relations actually present rather than with `size` squared. Mutating
+methods return the representation to use afterwards, which is either
+the same object or a different representation the order was converted to.
+"""
+# Author: Leland McInnes <leland.mcinnes@gmail.com>
+#
+# License: LGPL v2
+import numpy as np
+import scipy.sparse as sp
+
+# Batches of at most this many relations are added one at a time by
+# `Order.add_relations`
+_SEQUENTIAL_BATCH = 32
+
+
+def _empty_indices():
+    return np.zeros(0, dtype=np.intp)
+
+def _contains(sorted_indices, index):
+    position = np.searchsorted(sorted_indices, index)
+    return position < sorted_indices.shape[0] and sorted_indices[position] == index
+
+def _grow_capacity(capacity, required):
+    """Double `capacity` until it is at least `required`."""
+    capacity = max(capacity, 1)
+    while capacity < required:
+        capacity *= 2
+    return capacity
+
+def _cycle_error():
+    return ValueError('Dependency would create a cycle in the order')
+
+
+class Order(object):
+    """Base class for POMSet order representations.
+
+    Subclasses must provide `size`, `kind`, `above`, `below`, `compare`
+    and the mutating methods `add_labels`, `add_maximum`, `add_relation`,
+    `remove_relation`, `remove_label` and `reversed`, and may override
+    `remove_labels` to remove many labels in one pass.
+    """
+
+    kind = None
+
+    def above(self, index):
+        """Positions strictly greater than position `index`."""
+        raise NotImplementedError()
+
+    def below(self, index):
+        """Positions strictly less than position `index`."""
+        raise NotImplementedError()
+
+    def weakly_above(self, index):
+        """Positions greater than or unrelated to position `index`."""
+        return np.setdiff1d(np.arange(self.size), self.below(index),
+                            assume_unique=True)
+
+    def weakly_below(self, index):
+        """Positions less than or unrelated to position `index`."""
+        return np.setdiff1d(np.arange(self.size), self.above(index),
+                            assume_unique=True)
+
+    def compare(self, index1, index2):
+        """Return 1, 0 or -1 as position `index1` is greater than,
+        unrelated to, or less than position `index2`."""
+        raise NotImplementedError()
+
+    def ranks(self):
+        """Return a rank per position such that one position is less than
+        another exactly when its rank is smaller, or None if the order
+        cannot be expressed this way."""
+        return None
+
+    def relations(self):
+        """Return every relation of the order as two arrays of positions,
+        `(lowers, uppers)`, with `lowers[k]` less than `uppers[k]`."""
+        lowers = [np.full(self.above(index).shape[0], index, dtype=np.intp)
+                  for index in range(self.size)]
+        uppers = [self.above(index) for index in range(self.size)]
+        return (np.concatenate(lowers + [_empty_indices()]),
+                np.concatenate(uppers + [_empty_indices()]))
+
+    def add_relations(self, lowers, uppers):
+        """Add many relations at once, `lowers[k]` less than `uppers[k]`,
+        and close them transitively.
+
+        The closure is taken over only the positions of the new relations,
+        the keys, with the existing order supplying the positions below and
+        above each key, so that its cost scales with the batch rather than
+        with the order. Small batches are then added a relation at a time,
+        keeping the fast paths of `add_relation`; larger ones are added to
+        a `SparseOrder` in a single pass. If the relations would create a
+        cycle a ValueError is raised and the order is left unchanged.
+        """
+        lowers = np.asarray(lowers, dtype=np.intp)
+        uppers = np.asarray(uppers, dtype=np.intp)
+        n_relations = lowers.shape[0]
+        if n_relations == 0:
+            return self
+        elif n_relations == 1:
+            return self.add_relation(int(lowers[0]), int(uppers[0]))
+
+        keys, codes = np.unique(np.concatenate([lowers, uppers]), return_inverse=True)
+        n_keys = keys.shape[0]
+        key_range = np.arange(n_keys)
+        aboves = [self.above(key) for key in keys.tolist()]
+        above_owners = np.repeat(key_range, [above.shape[0] for above in aboves])
+        above_positions = np.concatenate(aboves + [_empty_indices()])
+
+        # The existing relations between keys join the new ones, so that
+        # paths alternating between them are closed and cycles are found.
+        found = np.minimum(np.searchsorted(keys, above_positions), n_keys - 1)
+        is_key = keys[found] == above_positions
+        reach = _transitive_closure(n_keys,
+                                    np.concatenate([above_owners[is_key], codes[:n_relations]]),
+                                    np.concatenate([found[is_key], codes[n_relations:]]))
+
+        if n_relations <= _SEQUENTIAL_BATCH:
+            result = self
+            for lower, upper in zip(lowers.tolist(), uppers.tolist()):
+                result = result.add_relation(lower, upper)
+            return result
+
+        # Every relation of the closed order runs from a position at or
+        # below some key to a position at or above a key it reaches.
+        belows = [self.below(key) for key in keys.tolist()]
+        below_owners = np.repeat(key_range, [below.shape[0] for below in belows])
+        downs = sp.csr_matrix((np.ones(below_owners.shape[0] + n_keys, dtype=np.float32),
+                               (np.concatenate(belows + [keys]),
+                                np.concatenate([below_owners, key_range]))),
+                              shape=(self.size, n_keys))
+        ups = sp.csr_matrix((np.ones(above_owners.shape[0] + n_keys, dtype=np.float32),
+                             (np.concatenate([above_owners, key_range]),
+                              np.concatenate([above_positions, keys]))),
+                            shape=(n_keys, self.size))
+        reach[key_range, key_range] = True
+        rows, columns = (downs @ sp.csr_matrix(reach, dtype=np.float32) @ ups).nonzero()
+        distinct = rows != columns
+        return self.to_sparse()._relate(rows[distinct], columns[distinct])
+
+    def remove_labels(self, indices):
+        """Remove the labels at many positions at once, renumbering the
+        remaining positions to close the gaps. Relations between the
+        remaining labels are unchanged."""
+        result = self
+        for index in np.unique(np.asarray(indices, dtype=np.intp))[::-1]:
+            result = result.remove_label(index)
+        return result
+
+    def to_dense(self):
+        """Return the order as a dense `size` x `size` int8 matrix."""
+        result = np.zeros((self.size, self.size), dtype=np.int8)
+        for index in range(self.size):
+            result[index, self.above(index)] = -1
+            result[index, self.below(index)] = 1
+        return result
+
+    def to_sparse(self):
+        """Return the order as a `SparseOrder`."""
+        return SparseOrder([set(self.above(index).tolist()) for index in range(self.size)],
+                           [set(self.below(index).tolist()) for index in range(self.size)])
+
+
+class UnorderedOrder(Order):
+    """An order in which no labels are related; nothing is stored."""
+
+    kind = 'unordered'
+
+    def __init__(self, size):
+        self.size = size
+
+    def copy(self):
+        return UnorderedOrder(self.size)
+
+    def above(self, index):
+        return _empty_indices()
+
+    def below(self, index):
+        return _empty_indices()
+
+    def weakly_above(self, index):
+        return np.arange(self.size)
+
+    def weakly_below(self, index):
+        return np.arange(self.size)
+
+    def compare(self, index1, index2):
+        return 0
+
+    def ranks(self):
+        return np.zeros(self.size, dtype=np.intp)
+
+    def relations(self):
+        return _empty_indices(), _empty_indices()
+
+    def add_labels(self, count):
+        self.size += count
+        return self
+
+    def add_maximum(self):
+        if self.size <= 1:
+            return ChainOrder(np.arange(self.size + 1))
+        return BipartiteOrder(self.size + 1, np.arange(self.size), [self.size])
+
+    def add_relation(self, lower, upper):
+        if lower == upper:
+            raise _cycle_error()
+        ranks = np.full(self.size, -1, dtype=np.intp)
+        ranks[lower] = 0
+        ranks[upper] = 1
+        return ChainOrder(ranks)
+
+    def remove_relation(self, lower, upper):
+        return self
+
+    def remove_label(self, index):
+        self.size -= 1
+        return self
+
+    def remove_labels(self, indices):
+        self.size -= np.unique(np.asarray(indices, dtype=np.intp)).shape[0]
+        return self
+
+    def reversed(self):
+        return self
+
+
+class BipartiteOrder(Order):
+    """An order in which every label is either lower or upper, and each
+    lower label is less than every upper label. Stored as two sorted
+    index lists.
+
+    Parameters
+    ----------
+
+    size : int
+        The number of labels.
+
+    lower, upper : array_like
+        The positions of the lower and upper labels.
+    """
+
+    kind = 'bipartite'
+
+    def __init__(self, size, lower, upper):
+        self.size = size
+        self.lower = np.sort(np.asarray(lower, dtype=np.intp))
+        self.upper = np.sort(np.asarray(upper, dtype=np.intp))
+
+    def copy(self):
+        return BipartiteOrder(self.size, self.lower.copy(), self.upper.copy())
+
+    def _is_lower(self, index):
+        return _contains(self.lower, index)
+
+    def above(self, index):
+        return self.upper.copy() if self._is_lower(index) else _empty_indices()
+
+    def below(self, index):
+        return _empty_indices() if self._is_lower(index) else self.lower.copy()
+
+    def weakly_above(self, index):
+        return np.arange(self.size) if self._is_lower(index) else self.upper.copy()
+
+    def weakly_below(self, index):
+        return self.lower.copy() if self._is_lower(index) else np.arange(self.size)
+
+    def compare(self, index1, index2):
+        lower1 = self._is_lower(index1)
+        if lower1 == self._is_lower(index2):
+            return 0
+        return -1 if lower1 else 1
+
+    def ranks(self):
+        result = np.zeros(self.size, dtype=np.intp)
+        result[self.upper] = 1
+        return result
+
+    def relations(self):
+        return (np.repeat(self.lower, self.upper.shape[0]),
+                np.tile(self.upper, self.lower.shape[0]))
+
+    def add_labels(self, count):
+        return self.to_sparse().add_labels(count)
+
+    def add_maximum(self):
+        return self.to_sparse().add_maximum()
+
+    def add_relation(self, lower, upper):
+        if self._is_lower(lower) and not self._is_lower(upper):
+            return self
+        return self.to_sparse().add_relation(lower, upper)
+
+    def remove_relation(self, lower, upper):
+        return self.to_sparse().remove_relation(lower, upper)
+
+    def remove_label(self, index):
+        self.lower = self.lower[self.lower != index]
+        self.upper = self.upper[self.upper != index]
+        self.lower[self.lower > index] -= 1
+        self.upper[self.upper > index] -= 1
+        self.size -= 1
+        if self.lower.shape[0] == 0 or self.upper.shape[0] == 0:
+            return UnorderedOrder(self.size)
+        return self
+
+    def remove_labels(self, indices):
+        indices = np.unique(np.asarray(indices, dtype=np.intp))
+        lower = np.setdiff1d(self.lower, indices, assume_unique=True)
+        upper = np.setdiff1d(self.upper, indices, assume_unique=True)
+        self.lower = lower - np.searchsorted(indices, lower)
+        self.upper = upper - np.searchsorted(indices, upper)
+        self.size -= indices.shape[0]
+        if self.lower.shape[0] == 0 or self.upper.shape[0] == 0:
+            return UnorderedOrder(self.size)
+        return self
+
+    def reversed(self):
+        return BipartiteOrder(self.size, self.upper, self.lower)
+
+
+class ChainOrder(Order):
+    """A total order on some of the labels, stored as a rank vector:
+    one label is less than another exactly when its rank is smaller.
+    Labels with rank -1 are not part of the chain and are unrelated to
+    every other label.
+
+    Ranks of the chain are kept as `0 .. n_ranked - 1`, alongside the
+    inverse permutation from rank to position, so comparisons are rank
+    comparisons and above/below queries are slices. Both are held in
+    capacity-doubled buffers so that appending a new maximum is
+    amortized O(1).
+
+    Parameters
+    ----------
+
+    ranks : array_like
+        The rank of each label, or -1 for labels outside the chain.
+        Only the relative order of the ranks is used.
+    """
+
+    kind = 'total'
+
+    def __init__(self, ranks):
+        ranks = np.asarray(ranks, dtype=np.intp)
+        ranked = np.nonzero(ranks >= 0)[0]
+        self._size = ranks.shape[0]
+        self._n_ranked = ranked.shape[0]
+        self._by_rank = ranked[np.argsort(ranks[ranked], kind='stable')]
+        self._ranks = np.full(self._size, -1, dtype=np.intp)
+        self._ranks[self._by_rank] = np.arange(self._n_ranked)
+
+    @property
+    def size(self):
+        return self._size
+
+    def copy(self):
+        result = ChainOrder.__new__(ChainOrder)
+        result._size = self._size
+        result._n_ranked = self._n_ranked
+        result._ranks = self._ranks[:self._size].copy()
+        result._by_rank = self._chain().copy()
+        return result
+
+    def _chain(self):
+        return self._by_rank[:self._n_ranked]
+
+    def _unranked(self):
+        return np.nonzero(self._ranks[:self._size] < 0)[0]
+
+    def _reserve(self, size, n_ranked):
+        if size > self._ranks.shape[0]:
+            ranks = np.full(_grow_capacity(self._ranks.shape[0], size), -1, dtype=np.intp)
+            ranks[:self._size] = self._ranks[:self._size]
+            self._ranks = ranks
+        if n_ranked > self._by_rank.shape[0]:
+            by_rank = np.zeros(_grow_capacity(self._by_rank.shape[0], n_ranked), dtype=np.intp)
+            by_rank[:self._n_ranked] = self._chain()
+            self._by_rank = by_rank
+
+    def _append_to_chain(self, index):
+        self._reserve(self._size, self._n_ranked + 1)
+        self._ranks[index] = self._n_ranked
+        self._by_rank[self._n_ranked] = index
+        self._n_ranked += 1
+
+    def above(self, index):
+        rank = self._ranks[index]
+        if rank < 0:
+            return _empty_indices()
+        return self._by_rank[rank + 1:self._n_ranked]
+
+    def below(self, index):
+        rank = self._ranks[index]
+        if rank < 0:
+            return _empty_indices()
+        return self._by_rank[:rank]
+
+    def weakly_above(self, index):
+        rank = self._ranks[index]
+        if rank < 0:
+            return np.arange(self._size)
+        elif self._n_ranked == self._size:
+            return self._by_rank[rank:self._n_ranked]
+        return np.concatenate([self._unranked(), self._by_rank[rank:self._n_ranked]])
+
+    def weakly_below(self, index):
+        rank = self._ranks[index]
+        if rank < 0:
+            return np.arange(self._size)
+        elif self._n_ranked == self._size:
+            return self._by_rank[:rank + 1]
+        return np.concatenate([self._unranked(), self._by_rank[:rank + 1]])
+
+    def compare(self, index1, index2):
+        rank1 = self._ranks[index1]
+        rank2 = self._ranks[index2]
+        if rank1 < 0 or rank2 < 0:
+            return 0
+        return int(np.sign(rank1 - rank2))
+
+    def ranks(self):
+        if self._n_ranked == self._size:
+            return self._ranks[:self._size].copy()
+        elif self._n_ranked <= 1:
+            return np.zeros(self._size, dtype=np.intp)
+        return None
+
+    def relations(self):
+        lower_ranks, upper_ranks = np.triu_indices(self._n_ranked, 1)
+        chain = self._chain()
+        return chain[lower_ranks], chain[upper_ranks]
+
+    def add_labels(self, count):
+        self._reserve(self._size + count, self._n_ranked)
+        self._ranks[self._size:self._size + count] = -1
+        self._size += count
+        return self
+
+    def add_maximum(self):
+        if self._n_ranked < self._size:
+            return self.to_sparse().add_maximum()
+        self._reserve(self._size + 1, self._n_ranked)
+        self._size += 1
+        self._append_to_chain(self._size - 1)
+        return self
+
+    def add_relation(self, lower, upper):
+        if lower == upper:
+            raise _cycle_error()
+        lower_rank = self._ranks[lower]
+        upper_rank = self._ranks[upper]
+
+        if lower_rank >= 0 and upper_rank >= 0:
+            if lower_rank < upper_rank:
+                return self
+            raise _cycle_error()
+        elif self._n_ranked == 0:
+            self._append_to_chain(lower)
+            self._append_to_chain(upper)
+            return self
+        elif upper_rank < 0 and lower_rank == self._n_ranked - 1:
+            self._append_to_chain(upper)
+            return self
+        elif lower_rank < 0 and upper_rank == 0:
+            self._ranks[self._chain()] += 1
+            self._by_rank = np.concatenate([[lower], self._chain()])
+            self._ranks[lower] = 0
+            self._n_ranked += 1
+            return self
+
+        return self.to_sparse().add_relation(lower, upper)
+
+    def remove_relation(self, lower, upper):
+        if self.compare(lower, upper) == 0:
+            return self
+        return self.to_sparse().remove_relation(lower, upper)
+
+    def remove_label(self, index):
+        rank = self._ranks[index]
+        chain = self._chain()
+        if rank >= 0:
+            self._ranks[chain[rank + 1:]] -= 1
+            chain = np.delete(chain, rank)
+            self._n_ranked -= 1
+        chain[chain > index] -= 1
+        self._by_rank = chain
+        self._ranks = np.delete(self._ranks[:self._size], index)
+        self._size -= 1
+        return self
+
+    def remove_labels(self, indices):
+        indices = np.unique(np.asarray(indices, dtype=np.intp))
+        return ChainOrder(np.delete(self._ranks[:self._size], indices))
+
+    def reversed(self):
+        ranks = self._ranks[:self._size].copy()
+        ranked = ranks >= 0
+        ranks[ranked] = self._n_ranked - 1 - ranks[ranked]
+        return ChainOrder(ranks)
+
+
+# Classification of a label by whether anything is above or below it
+_ISOLATED, _LOWER, _UPPER, _MIXED = range(4)
+
+
+class SparseOrder(Order):
+    """A general partial order stored as the adjacency of its
+    transitively closed relation: for each label the set of labels
+    above it and the set of labels below it.
+
+    The number of relations and the number of labels with nothing
+    related, with only labels above, with only labels below, and with
+    both are maintained incrementally, so checking whether the order has
+    become unordered, bipartite or a chain after a mutation is O(1).
+
+    Parameters
+    ----------
+
+    above, below : list of sets
+        For each position, the positions strictly above and strictly
+        below it.
+    """
+
+    kind = 'sparse'
+
+    def __init__(self, above, below):
+        self._above = above
+        self._below = below
+        self._count_states()
+
+    @property
+    def size(self):
+        return len(self._above)
+
+    def copy(self):
+        return SparseOrder([set(x) for x in self._above],
+                           [set(x) for x in self._below])
+
+    def _state(self, index):
+        return (bool(self._above[index]) + 2 * bool(self._below[index]))
+
+    def _count_states(self):
+        self._n_relations = sum(len(x) for x in self._above)
+        self._state_counts = [0, 0, 0, 0]
+        for index in range(self.size):
+            self._state_counts[self._state(index)] += 1
+
+    def _restate(self, index, old_state):
+        self._state_counts[old_state] -= 1
+        self._state_counts[self._state(index)] += 1
+
+    def above(self, index):
+        return np.array(sorted(self._above[index]), dtype=np.intp)
+
+    def below(self, index):
+        return np.array(sorted(self._below[index]), dtype=np.intp)
+
+    def compare(self, index1, index2):
+        if index2 in self._above[index1]:
+            return -1
+        elif index2 in self._below[index1]:
+            return 1
+        return 0
+
+    def to_sparse(self):
+        return self
+
+    def _simplified(self):
+        """Return a simpler representation of this order if there is one."""
+        if self._n_relations == 0:
+            return UnorderedOrder(self.size)
+
+        n_related = self.size - self._state_counts[_ISOLATED]
+        if self._n_relations == n_related * (n_related - 1) // 2:
+            ranks = [len(below) if (below or above) else -1
+                     for above, below in zip(self._above, self._below)]
+            return ChainOrder(ranks)
+
+        n_lower = self._state_counts[_LOWER]
+        n_upper = self._state_counts[_UPPER]
+        if n_lower + n_upper == self.size and self._n_relations == n_lower * n_upper:
+            lower = [index for index in range(self.size) if not self._below[index]]
+            upper = [index for index in range(self.size) if self._below[index]]
+            return BipartiteOrder(self.size, lower, upper)
+
+        return self
+
+    def add_labels(self, count):
+        self._above.extend(set() for _ in range(count))
+        self._below.extend(set() for _ in range(count))
+        self._state_counts[_ISOLATED] += count
+        return self
+
+    def add_maximum(self):
+        new_index = self.size
+        for above in self._above:
+            above.add(new_index)
+        self._above.append(set())
+        self._below.append(set(range(new_index)))
+        self._count_states()
+        return self._simplified()
+
+    def _relate(self, lowers, uppers):
+        """Add the relations `lowers[k]` less than `uppers[k]`, which
+        together with the order must be transitively closed and acyclic."""
+        for lower, upper in zip(lowers.tolist(), uppers.tolist()):
+            self._above[lower].add(upper)
+            self._below[upper].add(lower)
+        self._count_states()
+        return self._simplified()
+
+    def add_relation(self, lower, upper):
+        lows = self._below[lower] | {lower}
+        highs = self._above[upper] | {upper}
+        if not lows.isdisjoint(highs):
+            raise _cycle_error()
+        for index in lows:
+            state = self._state(index)
+            n_above = len(self._above[index])
+            self._above[index] |= highs
+            self._n_relations += len(self._above[index]) - n_above
+            self._restate(index, state)
+        for index in highs:
+            state = self._state(index)
+            self._below[index] |= lows
+            self._restate(index, state)
+        return self._simplified()
+
+    def remove_relation(self, lower, upper):
+        if upper in self._above[lower]:
+            lower_state = self._state(lower)
+            upper_state = self._state(upper)
+            self._above[lower].discard(upper)
+            self._below[upper].discard(lower)
+            self._n_relations -= 1
+            self._restate(lower, lower_state)
+            self._restate(upper, upper_state)
+        return self._simplified()
+
+    def remove_label(self, index):
+        def renumber(positions):
+            return set(x - 1 if x > index else x for x in positions if x != index)
+        self._above = [renumber(x) for i, x in enumerate(self._above) if i != index]
+        self._below = [renumber(x) for i, x in enumerate(self._below) if i != index]
+        self._count_states()
+        return self._simplified()
+
+    def remove_labels(self, indices):
+        indices = np.unique(np.asarray(indices, dtype=np.intp))
+        positions = np.arange(self.size)
+        renumbered = positions - np.searchsorted(indices, positions)
+        renumbered[indices] = -1
+        renumbered = renumbered.tolist()
+        def renumber(positions):
+            return set(x for x in (renumbered[y] for y in positions) if x >= 0)
+        kept = np.setdiff1d(positions, indices, assume_unique=True).tolist()
+        self._above = [renumber(self._above[i]) for i in kept]
+        self._below = [renumber(self._below[i]) for i in kept]
+        self._count_states()
+        return self._simplified()
+
+    def reversed(self):
+        return SparseOrder(self._below, self._above)
+
+
+def _transitive_closure(size, lowers, uppers):
+    """Return the transitive closure of the relations `lowers[k]` less
+    than `uppers[k]` on `size` positions as a dense boolean matrix, by a
+    sweep in reverse topological order, raising a ValueError if the
+    relations contain a cycle."""
+    pairs = np.unique(lowers * size + uppers)
+    lowers = pairs // size
+    uppers = pairs % size
+    indptr = np.zeros(size + 1, dtype=np.intp)
+    np.cumsum(np.bincount(lowers, minlength=size), out=indptr[1:])
+
+    in_degree = np.bincount(uppers, minlength=size)
+    ready = np.flatnonzero(in_degree == 0).tolist()
+    topological = []
+    while ready:
+        index = ready.pop()
+        topological.append(index)
+        successors = uppers[indptr[index]:indptr[index + 1]]
+        in_degree[successors] -= 1
+        ready.extend(successors[in_degree[successors] == 0].tolist())
+    if len(topological) < size:
+        raise _cycle_error()
+
+    reach = np.zeros((size, size), dtype=bool)
+    for index in reversed(topological):
+        successors = uppers[indptr[index]:indptr[index + 1]]
+        if successors.shape[0] > 0:
+            reach[index] = reach[successors].any(axis=0)
+            reach[index, successors] = True
+    return reach
+
+def _order_from_reach(size, involved, reach):
+    """Return the representation of the order on `size` labels in which
+    `involved[i]` is less than `involved[j]` exactly when `reach[i, j]`,
+    and all other labels are unrelated. `reach` must be transitively
+    closed and acyclic."""
+    rows, columns = np.nonzero(reach)
+    return order_from_relations(size, involved[rows], involved[columns])
+
+def order_from_relations(size, lowers, uppers):
+    """Return the representation of the order on `size` labels in which
+    position `lowers[k]` is less than position `uppers[k]`, and no other
+    positions are related. The relations must be transitively closed,
+    acyclic and distinct, such as those given by `Order.relations`."""
+    lowers = np.asarray(lowers, dtype=np.intp)
+    uppers = np.asarray(uppers, dtype=np.intp)
+    n_above = np.bincount(lowers, minlength=size)
+    n_below = np.bincount(uppers, minlength=size)
+    n_relations = lowers.shape[0]
+    if n_relations == 0:
+        return UnorderedOrder(size)
+
+    related = (n_above > 0) | (n_below > 0)
+    n_related = related.sum()
+    if n_relations == n_related * (n_related - 1) // 2:
+        ranks = np.full(size, -1, dtype=np.intp)
+        ranks[related] = n_below[related]
+        return ChainOrder(ranks)
+
+    lower = related & (n_below == 0)
+    upper = related & (n_above == 0)
+    if (n_related == size and lower.sum() + upper.sum() == size
+            and n_relations == lower.sum() * upper.sum()):
+        return BipartiteOrder(size, np.flatnonzero(lower), np.flatnonzero(upper))
+
+    above = [set() for _ in range(size)]
+    below = [set() for _ in range(size)]
+    for lower, upper in zip(lowers.tolist(), uppers.tolist()):
+        above[lower].add(upper)
+        below[upper].add(lower)
+    return SparseOrder(above, below)
+
+def order_from_dense(order):
+    """Return the representation of a dense POMSet order matrix, where
+    `order[i, j]` is 1, 0 or -1 as label `i` is greater than, unrelated
+    to, or less than label `j`."""
+    order = np.asarray(order)
+    return _order_from_reach(order.shape[0], np.arange(order.shape[0]), order == -1)
+
+def order_from_ranks(ranks):
+    """Return the representation of the order in which one label is less
+    than another exactly when its rank is smaller."""
+    ranks = np.asarray(ranks)
+    if ranks.shape[0] == 0:
+        return UnorderedOrder(0)
+    lowest = ranks.min()
+    highest = ranks.max()
+    if lowest == highest:
+        return UnorderedOrder(ranks.shape[0])
+
+    # Two distinct ranks, the common case of bipartitions, need no sort.
+    # With one label at each, the order is a chain, as when built by
+    # adding the relation to an unordered pair.
+    lower = ranks == lowest
+    upper = ranks == highest
+    if np.count_nonzero(lower) + np.count_nonzero(upper) == ranks.shape[0]:
+        if ranks.shape[0] == 2:
+            return ChainOrder(upper.astype(np.intp))
+        return BipartiteOrder(ranks.shape[0], np.flatnonzero(lower),
+                              np.flatnonzero(upper))
+
+    distinct = np.unique(ranks)
+    if distinct.shape[0] == ranks.shape[0]:
+        return ChainOrder(np.searchsorted(distinct, ranks))
+    return SparseOrder([set(np.nonzero(ranks > rank)[0].tolist()) for rank in ranks],
+                       [set(np.nonzero(ranks < rank)[0].tolist()) for rank in ranks])
@@ -8,34 +8,14 @@ hyperedges (and directed hypernodes).
 # License: LGPL v2 
 import numpy as np
 
-def _is_bipartitite_order(order):
-    for row in order:
-        if np.any(row == -1) and any(row == 1):
-            return False
-        elif np.all(row == 0):
-            return False
-
-    return True
-
-def _get_bipartition(order):
-    result = [[],[]]
-    for index, row in enumerate(order):
-        if np.any(row == -1):
-            result[0].append(index)
-        elif np.any(row == 1):
-            result[1].append(index)
-        else:
-            raise ValueError("Order must be bipartite")
-
-    return result
-
-def _make_order_from_bipartition(bipartition):
-    order_size = len(bipartition[0]) + len(bipartition[1])
-    result = np.zeros((order_size, order_size), dtype=np.int8)
-    for index in bipartition[0]:
-        result[index, bipartition[1]] = -1
-        result[bipartition[1], index] = 1
-
+from .orders import (Order, UnorderedOrder, BipartiteOrder, order_from_dense,
+                     _grow_capacity)
+
+def _position_index(labels):
+    """Map each distinct label to the sorted list of its positions."""
+    result = {}
+    for position, label in enumerate(labels):
+        result.setdefault(label, []).append(position)
     return result
 
 class POMSet (object):
@@ -48,51 +28,220 @@ class POMSet (object):
         order[i,j] == 1  <==> labels[i] > label[j]
         order[i,j] == 0  <==> label[i] is unrelated to label[j]
         order[i,j] == -1 <==> label[i] < label[j]
+    or as an `Order` representation from `hypergraph.orders`. Internally
+    the order is held in a representation suited to its structure
+    (unordered, bipartite, total or general sparse), and the dense
+    matrix is only built when the `order` attribute is accessed.
 
     The `size` of a POMSet is the number of labels.
     The `support` of a POMSet is the set of distinct labels.
     The `cardinality` of a POMSet is the size of the support.
-    """
 
-    def __init__(self, labels=None, order=None, bipartition=None):
+    Labels are held in a backing buffer whose capacity is doubled as
+    needed, so that appending labels is amortized O(size); `labels` is
+    a view of the first `size` entries. Removed labels are tombstoned,
+    and dropped from the buffer and the order together the next time the
+    labels or order are read, so a run of removals costs a single pass.
 
-        if labels is not None:
-            self.labels = np.array(labels, dtype=object)
-        elif bipartition is not None:
-            self.labels = np.hstack([np.array(bipartition[0]),
-                                     np.array(bipartition[1])])
-        else:
-            self.labels = np.array([], dtype=object)
+    If an `Interner` is given, the buffer holds the integer id of each
+    label instead of the label object, so that label lookups are integer
+    comparisons and each label takes 4 bytes. Labels are interned as they
+    are added, and the public methods still take and return label objects.
+    """
 
-        self.size = len(self.labels)
-        self.support = set(self.labels)
-        self.cardinality = len(self.support)
+    def __init__(self, labels=None, order=None, bipartition=None,
+                 interner=None):
+
+        self._interner = interner
+        self._owner = None
+        self._read_only = False
+        if bipartition is not None and labels is None:
+            labels = list(bipartition[0]) + list(bipartition[1])
+        if labels is None:
+            labels = []
+        if interner is not None:
+            self._labels = interner.intern_all(labels)
+        else:
+            self._labels = np.array(labels, dtype=object)
 
-        self._is_unordered = False
-        self._is_bipartite = False
-        self._bipartition = None
+        self._size = len(self._labels)
+        self._removed = []
+        self._position_cache = None
 
         if bipartition is not None:
             assert(order is None)
-            assert(sum(len(x) for x in bipartition) == len(self.labels))
-            self._is_bipartite = True
-            self._bipartition = bipartition
-            self.order = _make_order_from_bipartition(bipartition)
-
+            assert(sum(len(x) for x in bipartition) == self.size)
+            n_lower = len(bipartition[0])
+            self._order = BipartiteOrder(self.size, np.arange(n_lower),
+                                         np.arange(n_lower, self.size))
+        elif isinstance(order, Order):
+            assert(order.size == self.size)
+            self._order = order.copy()
         elif order is not None:
-            assert(order.shape[0] == len(self.labels))
-            self.order = order
-
-            if np.all(self.order == 0):
-                self._is_unordered = True
-
-            if _is_bipartitite_order(self.order):
-                self._is_bipartite = True
-                self._bipartition = _get_bipartition(self.order)
-
+            assert(order.shape[0] == self.size)
+            self._order = order_from_dense(order)
         else:
-            self.order = np.zeros((self.size, self.size), dtype=np.int8)
-            self._is_unordered = True
+            self._order = UnorderedOrder(self.size)
+
+    @classmethod
+    def _from_label_ids(cls, label_ids, order, interner):
+        """Build an interned POMSet directly from the ids of its labels
+        in `interner` and an order representation, which the POMSet takes
+        ownership of."""
+        result = cls.__new__(cls)
+        result._interner = interner
+        result._owner = None
+        result._read_only = False
+        result._labels = np.asarray(label_ids, dtype=interner.dtype)
+        result._size = result._labels.shape[0]
+        result._removed = []
+        result._position_cache = None
+        result._order = order
+        return result
+
+    @property
+    def size(self):
+        """The number of labels."""
+        self._compact()
+        return self._size
+
+    @property
+    def labels(self):
+        """The labels of the POMSet as a numpy array (a view of the
+        backing buffer, unless the labels are interned)."""
+        size = self.size
+        if self._interner is not None:
+            return self._interner.objects(self._labels[:size])
+        return self._labels[:size]
+
+    @property
+    def label_ids(self):
+        """The interned ids of the labels as a numpy array (a view of the
+        backing buffer), or None if the labels are not interned."""
+        if self._interner is None:
+            return None
+        size = self.size
+        return self._labels[:size]
+
+    @property
+    def support(self):
+        """The set of distinct labels."""
+        if self._interner is not None:
+            return set(self._interner.objects(list(self._positions)))
+        return set(self._positions)
+
+    @property
+    def cardinality(self):
+        """The number of distinct labels."""
+        return len(self._positions)
+
+    @property
+    def order(self):
+        """The order of the POMSet as a dense `size` x `size` numpy array."""
+        self._compact()
+        return self._order.to_dense()
+
+    @property
+    def order_kind(self):
+        """The kind of representation of the order: one of 'unordered',
+        'bipartite', 'total' or 'sparse'."""
+        self._compact()
+        return self._order.kind
+
+    def __iter__(self):
+        return iter(self.labels)
+
+    def __len__(self):
+        return self.size
+
+    def _check_writable(self):
+        """Raise a TypeError if the POMSet is a read-only view, such as
+        those of a `SparseHypergraph`."""
+        if self._read_only:
+            raise TypeError('This POMSet is a read-only view of a hypergraph; '
+                            'modify the hypergraph itself instead')
+
+    def _modified(self):
+        """Notify the hypergraph owning the POMSet, if any, that it has
+        been modified, so that results derived from it are discarded."""
+        if self._owner is not None:
+            self._owner._modified()
+
+    def _compact(self):
+        """Drop the tombstoned labels from the label buffer and the order
+        in a single pass."""
+        if not self._removed:
+            return
+        removed = np.array(self._removed, dtype=np.intp)
+        self._removed = []
+        keep = np.ones(self._size, dtype=bool)
+        keep[removed] = False
+        new_size = self._size - removed.shape[0]
+        if self._labels.base is not None:
+            # The labels are a view of incidence arrays the POMSet does not
+            # own, possibly memory mapped, so they are copied, not written.
+            self._labels = self._labels[:self._size][keep]
+        else:
+            self._labels[:new_size] = self._labels[:self._size][keep]
+            if self._interner is None:
+                self._labels[new_size:self._size] = None
+        self._size = new_size
+        self._position_cache = None
+        self._order = self._order.remove_labels(removed)
+
+    def _reserve(self, required_size):
+        """Ensure the label buffer can hold at least `required_size`
+        labels, doubling its capacity if it cannot."""
+        capacity = self._labels.shape[0]
+        if required_size <= capacity:
+            return
+
+        new_capacity = _grow_capacity(capacity, required_size)
+
+        new_labels = np.empty(new_capacity, dtype=self._labels.dtype)
+        size = self.size
+        new_labels[:size] = self._labels[:size]
+        self._labels = new_labels
+
+    @property
+    def _positions(self):
+        """The position index of the labels, built when first needed so
+        that POMSets built in bulk whose labels are never looked up do not
+        pay for it, and then kept up to date as labels are added."""
+        if self._position_cache is None:
+            size = self.size
+            self._position_cache = _position_index(self._labels[:size].tolist())
+        return self._position_cache
+
+    def _key(self, element):
+        """The key of `element` in the label buffer: its interned id, or
+        the element itself if labels are not interned."""
+        if self._interner is not None:
+            return self._interner.get(element)
+        return element
+
+    def _labels_at(self, positions):
+        """The label objects at the given positions."""
+        if self._interner is not None:
+            return self._interner.objects(self._labels[positions])
+        return self._labels[positions]
+
+    def _append_to_labels(self, new_label):
+        self._reserve(self.size + 1)
+        if self._interner is not None:
+            new_label = self._interner.intern(new_label)
+
+        new_index = self.size
+        self._labels[new_index] = new_label
+        if self._position_cache is not None:
+            self._position_cache.setdefault(new_label, []).append(new_index)
+
+        self._size += 1
+
+    def _position(self, element, element_index=0):
+        """Return the position in `labels` of the `element_index` copy
+        of `element`, raising IndexError if there is no such copy."""
+        return self._positions.get(self._key(element), ())[element_index]
 
     def multiplicity(self, element):
         """Return the number of occurences of `element` in the POMSet.
@@ -109,7 +258,7 @@ class POMSet (object):
         multiplicity : int
             The multiplicity of `element` in this POMSet.
         """
-        return np.sum(self.labels == element)
+        return len(self._positions.get(self._key(element), ()))
 
     def reverse_order(self):
         """Perform an in place order reversal on the POMSet.
@@ -117,8 +266,9 @@ class POMSet (object):
         Thus if previously i > j, this method will result in
         i < j in the POMSet order.
         """
-        if not self._is_unordered:
-            self.order = self.order.T
+        self._check_writable()
+        self._order = self._order.reversed()
+        self._modified()
 
     def weakly_above(self, element, element_index=0):
         """Get all elements of the POMSet that are weakly above `element`.
@@ -144,32 +294,9 @@ class POMSet (object):
         labels_above : numpy ndarray
             A numpy array of label objects weakly above `element`
         """
-        if self._is_unordered:
-            return self.labels.copy()
-
-        label_index = np.where(self.labels == element)[0][element_index]
-
-        if self._is_bipartite:
-            if label_index in self._bipartition[0]:
-                return self.labels.copy()
-            else:
-                return self.labels[self._bipartition[1]]
-
-        return self.labels[~(self.order[label_index] == -1)]
-
-    def _indices_strictly_above(self, element, element_index=0):
-        if self._is_unordered:
-            return np.array([], dtype=int)
-
-        label_index = np.where(self.labels == element)[0][element_index]
-
-        if self._is_bipartite:
-            if label_index in self._bipartition[0]:
-                return np.array(self._bipartition[1])
-            else:
-                return np.array([], dtype=int)
-
-        return np.where(self.order[label_index] == 1)[0]
+        self._compact()
+        label_index = self._position(element, element_index)
+        return self._labels_at(self._order.weakly_above(label_index))
 
     def strictly_above(self, element, element_index=0):
         """Get all elements of the POMSet that are strictly above `element`.
@@ -195,18 +322,9 @@ class POMSet (object):
         labels_above : numpy ndarray
             A numpy array of label objects strictly above `element`
         """
-        if self._is_unordered:
-            return np.array([], dtype=object)
-
-        label_index = np.where(self.labels == element)[0][element_index]
-
-        if self._is_bipartite:
-            if label_index in self._bipartition[0]:
-                return self.labels[self._bipartition[1]]
-            else:
-                return np.array([], dtype=object)
-
-        return self.labels[(self.order[label_index] == 1)]
+        self._compact()
+        label_index = self._position(element, element_index)
+        return self._labels_at(self._order.above(label_index))
 
     def weakly_below(self, element, element_index=0):
         """Get all elements of the POMSet that are weakly below `element`.
@@ -232,32 +350,9 @@ class POMSet (object):
         labels_below : numpy ndarray
             A numpy array of label objects weakly below `element`
         """
-        if self._is_unordered:
-            return self.labels.copy()
-
-        label_index = np.where(self.labels == element)[0][element_index]
-
-        if self._is_bipartite:
-            if label_index in self._bipartition[1]:
-                return self.labels.copy()
-            else:
-                return self.labels[self._bipartition[0]]
-
-        return self.labels[~(self.order[label_index] == 1)]
-
-    def _indices_strictly_below(self, element, element_index=0):
-        if self._is_unordered:
-            return np.array([], dtype=int)
-
-        label_index = np.where(self.labels == element)[0][element_index]
-
-        if self._is_bipartite:
-            if label_index in self._bipartition[1]:
-                return self.labels[self._bipartition[0]]
-            else:
-                return np.array([], dtype=int)
-
-        return np.where(self.order[label_index] == -1)[0]
+        self._compact()
+        label_index = self._position(element, element_index)
+        return self._labels_at(self._order.weakly_below(label_index))
 
     def strictly_below(self, element, element_index=0):
         """Get all elements of the POMSet that are strictly below `element`.
@@ -283,18 +378,9 @@ class POMSet (object):
         labels_below : numpy ndarray
             A numpy array of label objects strictly below `element`
         """
-        if self._is_unordered:
-            return np.array([], dtype=object)
-
-        label_index = np.where(self.labels == element)[0][element_index]
-
-        if self._is_bipartite:
-            if label_index in self._bipartition[1]:
-                return self.labels[self._bipartition[0]]
-            else:
-                return np.array([], dtype=object)
-
-        return self.labels[(self.order[label_index] == -1)]
+        self._compact()
+        label_index = self._position(element, element_index)
+        return self._labels_at(self._order.below(label_index))
 
     def weakly_greater_than(self, element1, element2, element1_index=0, element2_index=0):
         """Report whether `element1` is weakly greater than `element2`.
@@ -328,11 +414,9 @@ class POMSet (object):
         weakly_greater_than : boolean
             Whether `element1` is weakly greater than `element2`
         """
-        if self._is_unordered:
-            return True
-        label_index1 = np.where(self.labels == element1)[0][element1_index]
-        label_index2 = np.where(self.labels == element2)[0][element2_index]
-        return self.order[label_index1, label_index2] >= 0
+        label_index1 = self._position(element1, element1_index)
+        label_index2 = self._position(element2, element2_index)
+        return self._order.compare(label_index1, label_index2) >= 0
 
     def strictly_greater_than(self, element1, element2, element1_index=0, element2_index=0):
         """Report whether `element1` is strictly greater than `element2`.
@@ -364,11 +448,9 @@ class POMSet (object):
         strictly_greater_than : boolean
             Whether `element1` is strictly greater than `element2`
         """
-        if self._is_unordered:
-            return False
-        label_index1 = np.where(self.labels == element1)[0][element1_index]
-        label_index2 = np.where(self.labels == element2)[0][element2_index]
-        return self.order[label_index1, label_index2] > 0
+        label_index1 = self._position(element1, element1_index)
+        label_index2 = self._position(element2, element2_index)
+        return self._order.compare(label_index1, label_index2) > 0
 
     def weakly_less_than(self, element1, element2, element1_index=0, element2_index=0):
         """Report whether `element1` is weakly less than `element2`.
@@ -402,11 +484,9 @@ class POMSet (object):
         weakly_less_than : boolean
             Whether `element1` is weakly less than `element2`
         """
-        if self._is_unordered:
-            return True
-        label_index1 = np.where(self.labels == element1)[0][element1_index]
-        label_index2 = np.where(self.labels == element2)[0][element2_index]
-        return self.order[label_index1, label_index2] <= 0
+        label_index1 = self._position(element1, element1_index)
+        label_index2 = self._position(element2, element2_index)
+        return self._order.compare(label_index1, label_index2) <= 0
 
     def strictly_less_than(self, element1, element2, element1_index=0, element2_index=0):
         """Report whether `element1` is strictly less than `element2`.
@@ -438,11 +518,9 @@ class POMSet (object):
         strictly_less_than : boolean
             Whether `element1` is strictly less than `element2`
         """
-        if self._is_unordered:
-            return False
-        label_index1 = np.where(self.labels == element1)[0][element1_index]
-        label_index2 = np.where(self.labels == element2)[0][element2_index]
-        return self.order[label_index1, label_index2] < 0
+        label_index1 = self._position(element1, element1_index)
+        label_index2 = self._position(element2, element2_index)
+        return self._order.compare(label_index1, label_index2) < 0
 
     def add_label(self, new_label):
         """Add a new element to the POMSet. The added element will be
@@ -456,24 +534,26 @@ class POMSet (object):
         new_label : object
             The new element to add to the POMSet.
         """
-        new_label_array = np.empty(self.size + 1, dtype=object)
-        new_label_array[:-1] = self.labels
-        del self.labels
-        self.labels = new_label_array
-        self.labels[-1] = new_label
+        self._check_writable()
+        self._append_to_labels(new_label)
+        self._order = self._order.add_labels(1)
+        self._modified()
 
-        self.size = len(self.labels)
-        self.support.add(new_label)
-        self.cardinality = len(self.support)
+    def append_label(self, new_label):
+        """Add a new element to the POMSet that is greater than every
+        existing element. For a totally ordered POMSet this just assigns
+        the next rank, and is amortized O(1).
 
-        new_order = np.zeros((self.size, self.size), dtype=np.int8)
-        if self.order.shape[0] > 0:
-            new_order[:-1][:,:-1] = self.order
-        del self.order
-        self.order = new_order
+        Parameters
+        ----------
 
-        self._is_bipartite = False
-        self._bipartition = None
+        new_label : object
+            The new element to add to the POMSet.
+        """
+        self._check_writable()
+        self._append_to_labels(new_label)
+        self._order = self._order.add_maximum()
+        self._modified()
 
     def add_dependency(self, from_label, to_label, from_index=0, to_index=0):
         """Add a new dependency relation to the POMSet. This states that
@@ -502,23 +582,12 @@ class POMSet (object):
             within the label list. (default 0)
 
         """
-        from_label_index = np.where(self.labels == from_label)[0][from_index]
-        to_label_index = np.where(self.labels == to_label)[0][to_index]
-
-        self.order[from_label_index, to_label_index] = -1
-        self.order[to_label_index, from_label_index] = 1
+        self._check_writable()
+        from_label_index = self._position(from_label, from_index)
+        to_label_index = self._position(to_label, to_index)
 
-        self.order[from_label_index, self._indices_strictly_above(to_label, to_index)] = -1
-        self.order[to_label_index, self._indices_strictly_below(from_label, from_index)] = 1
-
-        self._is_unordered = False
-
-        if _is_bipartitite_order(self.order):
-            self._is_bipartite = True
-            self._bipartition = _get_bipartition(self.order)
-        else:
-            self._is_bipartite = False
-            self._bipartition = None
+        self._order = self._order.add_relation(from_label_index, to_label_index)
+        self._modified()
 
     def add_labels_from(self, new_label_list):
         """
@@ -533,20 +602,23 @@ class POMSet (object):
         new_label_list : iterable
             The new labels to be added
         """
-        labels_to_add = np.array(new_label_list)
-        self.labels = np.hstack((self.labels, labels_to_add))
+        self._check_writable()
+        labels_to_add = list(new_label_list)
+        new_size = self.size + len(labels_to_add)
+        self._reserve(new_size)
+        if self._interner is not None:
+            labels_to_add = self._interner.intern_all(labels_to_add).tolist()
 
-        self.size = len(self.labels)
-        self.support.update(new_label_list)
-        self.cardinality = len(self.support)
+        positions = self._position_cache
+        for index, label in enumerate(labels_to_add, self.size):
+            self._labels[index] = label
+            if positions is not None:
+                positions.setdefault(label, []).append(index)
 
-        new_order = np.zeros((self.size, self.size), dtype=np.int8)
-        new_order[:-1][:,:-1] = self.order
-        del self.order
-        self.order = new_order
+        self._size = new_size
 
-        self._is_bipartite = False
-        self._bipartition = None
+        self._order = self._order.add_labels(len(labels_to_add))
+        self._modified()
 
     def add_dependencies_from(self, new_dependencies_list):
         """Add a number of new dependency relations from an iterable
@@ -555,6 +627,10 @@ class POMSet (object):
             `(from_label, from_index, to_label, to_index)`
         See the documentation for `add_dependency` for more detail.
 
+        The dependencies are added and transitively closed together (see
+        `Order.add_relations`). If together they would create a cycle a
+        ValueError is raised and the POMSet is left unchanged.
+
         Parameters
         ----------
 
@@ -562,8 +638,13 @@ class POMSet (object):
             The new dependences to be added, each dependency specified
             as a 4-tuple of `(from_label, from_index, to_label, to_index)`.
         """
-        for args in new_dependencies_list:
-            self.add_dependency(args[0], args[2], args[1], args[3])
+        self._check_writable()
+        dependencies = list(new_dependencies_list)
+        lowers = [self._position(args[0], args[1]) for args in dependencies]
+        uppers = [self._position(args[2], args[3]) for args in dependencies]
+
+        self._order = self._order.add_relations(lowers, uppers)
+        self._modified()
 
     def remove_label(self, label_to_remove, label_index=0):
         """Remove a label from the POMSet, updating dependency
@@ -581,11 +662,19 @@ class POMSet (object):
             e.g. `element_index=3` will select the third copy of label_to_remove
             within the label list. (default 0)
         """
-        label_to_remove_index = np.where(self.labels == label_to_remove)[0][label_index]
-        selection = range(label_to_remove_index) + range(label_to_remove_index + 1, self.order.shape[0])
-
-        self.order = self.order[selection, :][:, selection]
-        self.labels = self.labels[selection]
+        self._check_writable()
+        key = self._key(label_to_remove)
+        positions = self._positions.get(key, [])
+        label_to_remove_index = positions[label_index]
+
+        # Tombstone the label; the buffer and order are compacted when
+        # next read. Positions of the other labels are unchanged until
+        # then, so the position index stays valid.
+        del positions[label_index]
+        if not positions:
+            del self._positions[key]
+        self._removed.append(label_to_remove_index)
+        self._modified()
 
     def remove_dependency(self, from_label, to_label, from_index=0, to_index=0):
         """Remove a dependency from the POMSet.
@@ -611,18 +700,9 @@ class POMSet (object):
             e.g. `to_index=3` will select the third copy of to_element
             within the label list. (default 0)
         """
-        from_label_index = np.where(self.labels == from_label)[0][from_index]
-        to_label_index = np.where(self.labels == to_label)[0][to_index]
+        self._check_writable()
+        from_label_index = self._position(from_label, from_index)
+        to_label_index = self._position(to_label, to_index)
 
-        self.order[from_label_index, to_label_index] = 0
-        self.order[to_label_index, from_label_index] = 0
-
-        if np.all(self.order == 0):
-            self._is_unordered = True
-
-        if _is_bipartitite_order(self.order):
-            self._is_bipartite = True
-            self._bipartition = _get_bipartition(self.order)
-        else:
-            self._is_bipartite = False
-            self._bipartition = None
\ No newline at end of file
+        self._order = self._order.remove_relation(from_label_index, to_label_index)
+        self._modified()
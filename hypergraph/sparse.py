@@ -0,0 +1,525 @@
+# -*- coding: utf-8 -*-
+"""
+hypergraph.sparse: A hypergraph storage engine backed by integer sparse
+incidence arrays.
+"""
+# Author: Leland McInnes <leland.mcinnes@gmail.com>
+#
+# License: LGPL v2
+import numpy as np
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+from .pomset import POMSet
+from .hypergraph import Hypergraph
+from .incidence import Incidence, INDEX_DTYPE, INDPTR_DTYPE, object_array
+from .interning import Interner
+from .cache import LRUCache
+from .orders import order_from_dense
+
+
+class _POMSetView(Mapping):
+    """A read-only mapping from the node (or edge) objects of a
+    `SparseHypergraph` to their POMSets, which are built from index slices
+    of the incidence arrays on access. The POMSets are read-only, and the
+    same POMSet is returned for a key, and kept in the `relation` of the
+    hypergraph, until the hypergraph is next modified."""
+
+    def __init__(self, hypergraph, nodes):
+        self._hypergraph = hypergraph
+        self._nodes = nodes
+        self._pomsets = {}
+        self._pomsets_count = None
+
+    def _interner(self):
+        if self._nodes:
+            return self._hypergraph._node_interner
+        else:
+            return self._hypergraph._edge_interner
+
+    def __getitem__(self, key):
+        hypergraph = self._hypergraph
+        if self._pomsets_count != hypergraph._modification_count:
+            for pomset in self._pomsets.values():
+                hypergraph.relation.pop(pomset, None)
+            self._pomsets = {}
+            self._pomsets_count = hypergraph._modification_count
+        if key in self._pomsets:
+            return self._pomsets[key]
+
+        index = self._interner().id(key)
+        incidence = hypergraph.incidence()
+        if self._nodes:
+            result = POMSet._from_label_ids(incidence.edges_of(index),
+                                            incidence.node_order(index),
+                                            hypergraph._edge_interner)
+        else:
+            result = POMSet._from_label_ids(incidence.nodes_of(index),
+                                            incidence.edge_order(index),
+                                            hypergraph._node_interner)
+        result._read_only = True
+        self._pomsets[key] = result
+        hypergraph.relation[result] = key
+        return result
+
+    def __contains__(self, key):
+        return key in self._interner()
+
+    def __iter__(self):
+        return iter(self._interner())
+
+    def __len__(self):
+        return len(self._interner())
+
+
+class SparseHypergraph(Hypergraph):
+    """
+    A directed hypergraph that stores its incidence as integer encoded
+    sparse arrays (see `Incidence`) rather than as dictionaries of
+    POMSets, for a much smaller memory footprint on large hypergraphs.
+
+    The public API is that of `Hypergraph`; the `node` and `edge`
+    attributes are read-only mappings that build the POMSet of a node or
+    edge from slices of the incidence arrays when it is accessed. Such
+    POMSets are read-only, raising a TypeError if modified; modify the
+    hypergraph itself instead. The `relation` dictionary holds the
+    POMSets accessed since the hypergraph was last modified.
+
+    Additions are buffered and merged into the incidence arrays the next
+    time they are read, so it is best to add edges in batches, or to use
+    `from_incidence` or `from_hypergraph`.
+
+    Parameters
+    ----------
+
+    nodes : iterable, optional
+        An iterable of nodes to initialize the hypergraph with, or None.
+        (default None)
+
+    default_node_order : string, optional
+        A string (either 'none', default or 'total') specifying the ordering
+        of the POMSets within the hypergraph
+    """
+
+    def __init__(self, nodes=None, default_node_order='none'):
+        if default_node_order not in ('none', 'total'):
+            raise ValueError('Default node order must be one of: none, total')
+        self.default_node_order = default_node_order
+
+        self.node = _POMSetView(self, nodes=True)
+        self.edge = _POMSetView(self, nodes=False)
+        self.relation = {}
+        self._modification_count = 0
+        self._cache = LRUCache(self.cache_size)
+        self._cache_count = 0
+
+        self._node_interner = Interner()
+        self._edge_interner = Interner()
+
+        self._incidence = Incidence.from_edges(0, np.zeros(1, dtype=INDPTR_DTYPE),
+                                               np.zeros(0, dtype=INDEX_DTYPE),
+                                               node_objects=object_array([]),
+                                               edge_objects=object_array([]))
+        self._pending_nodes = []
+        self._pending_ranks = []
+        self._pending_orders = {}
+        self._stale = False
+
+        if nodes is not None:
+            for node in nodes:
+                self.add_node(node)
+
+    @classmethod
+    def _from_incidence(cls, incidence, default_node_order):
+        result = cls(default_node_order=default_node_order)
+        result._node_interner = Interner.from_array(incidence.node_objects)
+        result._edge_interner = Interner.from_array(incidence.edge_objects)
+        result._incidence = incidence
+        return result
+
+    def incidence(self):
+        """Return the incidence structure of the hypergraph over integer
+        ids. This is the storage of the hypergraph itself, not a copy,
+        and should be treated as read-only.
+
+        Returns
+        -------
+
+        incidence : Incidence
+            The integer incidence arrays of the hypergraph.
+        """
+        if self._stale:
+            self._merge_pending()
+        return self._incidence
+
+    def _node_id(self, node):
+        if node not in self._node_interner:
+            self._stale = True
+            self._modified()
+        return self._node_interner.intern(node)
+
+    def _merge_pending(self):
+        """Merge buffered additions into the incidence arrays."""
+        old = self._incidence
+        n_nodes = len(self._node_interner)
+        n_old_edges = old.n_edges
+
+        if self._pending_nodes:
+            new_nodes = np.concatenate(self._pending_nodes)
+            new_edge_ranks = np.concatenate(self._pending_ranks)
+            new_sizes = [len(nodes) for nodes in self._pending_nodes]
+        else:
+            new_nodes = np.zeros(0, dtype=INDEX_DTYPE)
+            new_edge_ranks = np.zeros(0, dtype=INDEX_DTYPE)
+            new_sizes = []
+
+        edge_indptr = np.concatenate([old.edge_indptr,
+                                      old.edge_indptr[-1] + np.cumsum(new_sizes,
+                                                                      dtype=INDPTR_DTYPE)])
+        edge_nodes = np.concatenate([old.edge_nodes, new_nodes])
+        edge_ranks = np.concatenate([old.edge_ranks, new_edge_ranks])
+        edge_orders = dict(old.edge_orders)
+        edge_orders.update(self._pending_orders)
+
+        # New edges have the largest ids, so a stable sort by node of the
+        # existing node rows followed by the new incidences appends each
+        # new edge at the end of its nodes' POMSets.
+        new_edges = np.repeat(np.arange(n_old_edges, n_old_edges + len(new_sizes),
+                                        dtype=INDEX_DTYPE), new_sizes)
+        old_nodes = np.repeat(np.arange(old.n_nodes, dtype=INDEX_DTYPE),
+                              old.degrees)
+        if self.default_node_order == 'total':
+            top_rank = np.full(n_nodes, -1, dtype=INDEX_DTYPE)
+            np.maximum.at(top_rank, old_nodes, old.node_ranks)
+            new_sort = np.argsort(new_nodes, kind='stable')
+            new_bounds = np.searchsorted(new_nodes[new_sort], np.arange(n_nodes))
+            within = np.empty(new_nodes.shape[0], dtype=INDEX_DTYPE)
+            within[new_sort] = np.arange(new_nodes.shape[0]) - new_bounds[new_nodes[new_sort]]
+            new_node_ranks = top_rank[new_nodes] + 1 + within
+        else:
+            new_node_ranks = np.zeros(new_nodes.shape[0], dtype=INDEX_DTYPE)
+
+        all_nodes = np.concatenate([old_nodes, new_nodes])
+        node_sort = np.argsort(all_nodes, kind='stable')
+        node_indptr = np.zeros(n_nodes + 1, dtype=INDPTR_DTYPE)
+        np.cumsum(np.bincount(all_nodes, minlength=n_nodes), out=node_indptr[1:])
+        node_edges = np.concatenate([old.node_edges, new_edges])[node_sort]
+        node_ranks = np.concatenate([old.node_ranks, new_node_ranks])[node_sort]
+        node_slots = np.concatenate([old.node_slots,
+                                     old.n_incidences + np.arange(new_nodes.shape[0],
+                                                                  dtype=INDPTR_DTYPE)])[node_sort]
+
+        node_orders = {}
+        new_degrees = np.bincount(new_nodes, minlength=n_nodes)
+        for node_id, order in old.node_orders.items():
+            node_orders[node_id] = _extend_order(order, new_degrees[node_id],
+                                                 self.default_node_order == 'total')
+
+        self._incidence = Incidence(node_indptr, node_edges, node_ranks,
+                                    edge_indptr, edge_nodes, edge_ranks,
+                                    node_orders=node_orders, edge_orders=edge_orders,
+                                    node_objects=self._node_interner.objects(),
+                                    edge_objects=self._edge_interner.objects(),
+                                    node_slots=node_slots)
+        self._pending_nodes = []
+        self._pending_ranks = []
+        self._pending_orders = {}
+        self._stale = False
+
+    def _append_edge(self, new_edge, edge_labels, ranks, order=None):
+        if new_edge in self._edge_interner:
+            raise ValueError('Edge {} is already in the hypergraph'.format(new_edge))
+        node_ids = np.array([self._node_id(node) for node in edge_labels],
+                            dtype=INDEX_DTYPE)
+        edge_id = self._edge_interner.intern(new_edge)
+        if order is not None:
+            self._pending_orders[edge_id] = order
+        self._pending_nodes.append(node_ids)
+        self._pending_ranks.append(np.asarray(ranks, dtype=INDEX_DTYPE))
+        self._stale = True
+        self._modified()
+
+    def add_node(self, new_node):
+        """Add a new node to the hypergraph.
+
+        Parameters
+        ----------
+
+        new_node : object
+            The new node to add to the hypergraph
+        """
+        self._node_id(new_node)
+
+    def add_edge(self, new_edge, edge_labels, edge_order=None):
+        """Add a new edge to the hypergraph.
+
+        Parameters
+        ----------
+        new_edge : object
+            The edge object to add to the hypergraph.
+
+        edge_labels : iterable
+            An iterable of node objects that the edge relates.
+            If the objects are not already nodes of the hypergraph
+            then new nodes will be added to the hypergraph for them.
+
+        edge_order : numpy ndarray (len(edge_labels), len(edge_labels)), optional
+            The POMSET order of the edge, or None. If None the
+            edge will be undirected.
+            (default None)
+        """
+        edge_labels = list(edge_labels)
+        if edge_order is None:
+            self._append_edge(new_edge, edge_labels, np.zeros(len(edge_labels)))
+            return
+
+        edge_order = order_from_dense(edge_order)
+        ranks = edge_order.ranks()
+        if ranks is None:
+            self._append_edge(new_edge, edge_labels, np.zeros(len(edge_labels)),
+                              order=edge_order)
+        else:
+            self._append_edge(new_edge, edge_labels, ranks)
+
+    def add_bipartition_edge(self, new_edge, label_bipartition):
+        """Add a new edge where the order is a bipartition into
+        lower and upper elements.
+
+        Parameters
+        ----------
+        new_edge : object
+            The edge object to add to the hypergraph.
+
+        label_bipartition : list or tuple of iterables
+            A list or tuple with two elements. The first is an iterable
+            of all the lower labels. The second is an iterable of all the
+            upper labels.
+        """
+        lower = list(label_bipartition[0])
+        upper = list(label_bipartition[1])
+        ranks = np.repeat([0, 1], [len(lower), len(upper)])
+        self._append_edge(new_edge, lower + upper, ranks)
+
+    def remove_edge(self, edge):
+        """Remove an edge from the hypergraph.
+
+        Each removal is a pass over the incidence arrays, so it is best to
+        remove edges in batches with `remove_edges_from`.
+
+        Parameters
+        ----------
+
+        edge : object
+            The edge object to remove. A KeyError is raised if it is not
+            in the hypergraph.
+        """
+        self.remove_edges_from([edge])
+
+    def remove_edges_from(self, edges):
+        """Remove an iterable of edges from the hypergraph in a single
+        pass over the incidence arrays.
+
+        Parameters
+        ----------
+
+        edges : iterable
+            The edge objects to remove.
+        """
+        self._remove(edge_ids=self._edge_interner.ids(edges))
+
+    def remove_node(self, node):
+        """Remove a node from the hypergraph, and from the edges incident
+        on it. Edges left with no nodes are kept.
+
+        Each removal is a pass over the incidence arrays, so it is best to
+        remove nodes in batches with `remove_nodes_from`.
+
+        Parameters
+        ----------
+
+        node : object
+            The node object to remove. A KeyError is raised if it is not
+            in the hypergraph.
+        """
+        self.remove_nodes_from([node])
+
+    def remove_nodes_from(self, nodes):
+        """Remove an iterable of nodes from the hypergraph in a single
+        pass over the incidence arrays.
+
+        Parameters
+        ----------
+
+        nodes : iterable
+            The node objects to remove.
+        """
+        self._remove(node_ids=self._node_interner.ids(nodes))
+
+    def _remove(self, node_ids=(), edge_ids=()):
+        """Remove nodes and edges by id, renumbering those that remain in
+        their existing order."""
+        old = self.incidence()
+        node_keep = np.ones(old.n_nodes, dtype=bool)
+        node_keep[np.asarray(node_ids, dtype=np.intp)] = False
+        edge_keep = np.ones(old.n_edges, dtype=bool)
+        edge_keep[np.asarray(edge_ids, dtype=np.intp)] = False
+
+        edge_indptr, edge_nodes, edge_ranks, edge_orders, edge_kept = \
+            _filter_rows(old.edge_indptr, old.edge_nodes, old.edge_ranks,
+                         old.edge_orders, edge_keep, node_keep)
+        node_indptr, node_edges, node_ranks, node_orders, node_kept = \
+            _filter_rows(old.node_indptr, old.node_edges, old.node_ranks,
+                         old.node_orders, node_keep, edge_keep)
+
+        # The same incidences are kept on both sides, so each kept slot
+        # moves to its position among the kept edge incidences.
+        slot_map = np.cumsum(edge_kept, dtype=INDPTR_DTYPE) - 1
+        node_slots = slot_map[old.node_slots[node_kept]]
+
+        self._node_interner = Interner.from_array(old.node_objects[node_keep])
+        self._edge_interner = Interner.from_array(old.edge_objects[edge_keep])
+        self._incidence = Incidence(node_indptr, node_edges, node_ranks,
+                                    edge_indptr, edge_nodes, edge_ranks,
+                                    node_orders=node_orders, edge_orders=edge_orders,
+                                    node_objects=self._node_interner.objects(),
+                                    edge_objects=self._edge_interner.objects(),
+                                    node_slots=node_slots)
+        self._modified()
+
+    def _related(self, node, relation):
+        incidence = self.incidence()
+        _, nodes = incidence.neighbors([self._node_interner.id(node)],
+                                       relation=relation)
+        return set(incidence.node_objects[nodes])
+
+    def neighbors(self, node):
+        """Get a set of neighboring nodes.
+
+        Parameters
+        ----------
+
+        node : object
+            The node to find the neighbors of.
+
+        Returns
+        -------
+
+        neighbors : set
+            A set of all nodes neighboring the queries node.
+        """
+        return self._related(node, 'neighbors')
+
+    def weak_predecessors(self, node):
+        """Get a set of neighboring nodes weakly below the current node
+        in any incident edges.
+
+        Parameters
+        ----------
+
+        node : object
+            The node to find the neighbors of.
+
+        Returns
+        -------
+
+        neighbors : set
+            A set of all nodes that are weak predecessors of the queries node.
+        """
+        return self._related(node, 'weak_predecessors')
+
+    def weak_successors(self, node):
+        """Get a set of neighboring nodes weakly above the current node
+        in any incident edges.
+
+        Parameters
+        ----------
+
+        node : object
+            The node to find the neighbors of.
+
+        Returns
+        -------
+
+        neighbors : set
+            A set of all nodes that are weak successors of the queries node.
+        """
+        return self._related(node, 'weak_successors')
+
+    def strict_predecessors(self, node):
+        """Get a set of neighboring nodes strictly below the current node
+        in any incident edges.
+
+        Parameters
+        ----------
+
+        node : object
+            The node to find the neighbors of.
+
+        Returns
+        -------
+
+        neighbors : set
+            A set of all nodes that are predecessors to the queries node.
+        """
+        return self._related(node, 'strict_predecessors')
+
+    def strict_successors(self, node):
+        """Get a set of neighboring nodes strictly above the current node
+        in any incident edges.
+
+        Parameters
+        ----------
+
+        node : object
+            The node to find the neighbors of.
+
+        Returns
+        -------
+
+        neighbors : set
+            A set of all nodes that are successors to the queries node.
+        """
+        return self._related(node, 'strict_successors')
+
+
+def _filter_rows(indptr, indices, ranks, orders, row_keep, index_keep):
+    """Filter one side of an incidence to the rows in `row_keep` and the
+    entries in `index_keep`, renumbering both, and return the new
+    compressed rows, ranks and orders along with the mask of kept
+    entries."""
+    rows = np.repeat(np.arange(indptr.shape[0] - 1), np.diff(indptr))
+    kept = row_keep[rows] & index_keep[indices]
+    row_map = np.cumsum(row_keep) - 1
+    index_map = np.cumsum(index_keep) - 1
+
+    n_rows = int(row_keep.sum())
+    new_indptr = np.zeros(n_rows + 1, dtype=INDPTR_DTYPE)
+    np.cumsum(np.bincount(row_map[rows[kept]], minlength=n_rows), out=new_indptr[1:])
+
+    new_orders = {}
+    for row, order in orders.items():
+        if not row_keep[row]:
+            continue
+        dropped = np.flatnonzero(~kept[indptr[row]:indptr[row + 1]])
+        if dropped.shape[0] > 0:
+            order = order.copy().remove_labels(dropped)
+        new_orders[int(row_map[row])] = order
+
+    return (new_indptr, index_map[indices[kept]].astype(INDEX_DTYPE),
+            ranks[kept], new_orders, kept)
+
+
+def _extend_order(order, n_new, above_all):
+    """Extend an order representation with `n_new` extra labels, either
+    unrelated to all others or each above every label before it."""
+    if n_new == 0:
+        return order
+    elif not above_all:
+        return order.copy().add_labels(n_new)
+    result = order.copy()
+    for _ in range(n_new):
+        result = result.add_maximum()
+    return result
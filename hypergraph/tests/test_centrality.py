@@ -0,0 +1,74 @@
+"""
+Tests for PageRank and eigenvector centrality, against dense
+computations over the per node POMSets.
+"""
+import networkx as nx
+import numpy as np
+
+from hypergraph import SparseHypergraph
+
+from .test_hypergraph import random_hypergraph
+
+
+def reference_transitions(graph, directed):
+    """The transition matrix of the random walk of `pagerank`, from the
+    POMSets: a uniformly chosen incident edge, then a uniformly chosen
+    node of the edge (or, directed, one strictly above the current node).
+    Nodes with no step are left as zero rows."""
+    nodes = list(graph.node)
+    index = dict((node, position) for position, node in enumerate(nodes))
+    result = np.zeros((len(nodes), len(nodes)))
+    for node in nodes:
+        steps = []
+        for edge in graph.node[node]:
+            if directed == 'undirected':
+                targets = list(graph.edge[edge].labels)
+            else:
+                targets = list(graph.edge[edge].strictly_above(node))
+            if targets:
+                steps.append(targets)
+        for targets in steps:
+            for target in targets:
+                result[index[node], index[target]] += 1.0 / len(steps) / len(targets)
+    return result
+
+
+def reference_pagerank(graph, alpha, directed):
+    transitions = reference_transitions(graph, directed)
+    n_nodes = transitions.shape[0]
+    transitions[transitions.sum(axis=1) == 0] = 1.0 / n_nodes
+    google = alpha * transitions + (1 - alpha) / n_nodes
+    values, vectors = np.linalg.eig(google.T)
+    result = np.real(vectors[:, np.argmax(np.real(values))])
+    return result / result.sum()
+
+
+def test_pagerank():
+    graph = random_hypergraph(np.random.RandomState(0))
+    sparse = SparseHypergraph.from_hypergraph(graph)
+    for directed in ('undirected', 'strictly'):
+        expected = reference_pagerank(graph, 0.85, directed)
+        for hypergraph in (graph, sparse):
+            result = hypergraph.pagerank(directed=directed, tol=1e-12, max_iter=1000)
+            assert np.allclose(result, expected, atol=1e-8)
+
+
+def test_eigenvector_centrality():
+    graph = random_hypergraph(np.random.RandomState(0), isolated=0, n_nodes=20,
+                              n_edges=30)
+    expansion = nx.Graph()
+    expansion.add_nodes_from(graph.node)
+    for edge in graph.edge.values():
+        labels = list(edge.labels)
+        for first in range(len(labels)):
+            for second in range(first + 1, len(labels)):
+                weight = expansion.get_edge_data(labels[first], labels[second],
+                                                 {'weight': 0})['weight']
+                expansion.add_edge(labels[first], labels[second], weight=weight + 1)
+    reference = nx.eigenvector_centrality_numpy(expansion, weight='weight')
+    expected = np.array([reference[node] for node in graph.node])
+
+    sparse = SparseHypergraph.from_hypergraph(graph)
+    for hypergraph in (graph, sparse):
+        result = hypergraph.eigenvector_centrality(tol=1e-12, max_iter=5000)
+        assert np.allclose(result, expected, atol=1e-6)
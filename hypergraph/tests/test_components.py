@@ -0,0 +1,57 @@
+"""
+Tests for connected and s-connected components, against networkx.
+"""
+import networkx as nx
+import numpy as np
+
+from hypergraph import SparseHypergraph
+
+from .test_hypergraph import random_hypergraph
+
+
+def assert_same_partition(labels, components, objects):
+    """Assert `labels` of `objects` group them as the sets `components`,
+    numbered in order of their first object."""
+    groups = {}
+    for label, item in zip(labels, objects):
+        groups.setdefault(label, set()).add(item)
+    assert (set(frozenset(group) for group in groups.values()) ==
+            set(frozenset(component) for component in components))
+    assert list(labels[np.sort(np.unique(labels, return_index=True)[1])]) == \
+        list(range(len(groups)))
+
+
+def test_connected_components():
+    for seed in range(3):
+        graph = random_hypergraph(np.random.RandomState(seed), n_nodes=40, n_edges=15,
+                                  max_size=3)
+        clique = nx.Graph()
+        clique.add_nodes_from(graph.node)
+        for edge in graph.edge.values():
+            labels = list(edge.labels)
+            clique.add_edges_from(zip(labels[:-1], labels[1:]))
+        expected = list(nx.connected_components(clique))
+        for hypergraph in (graph, SparseHypergraph.from_hypergraph(graph)):
+            assert_same_partition(hypergraph.connected_components(), expected,
+                                  list(graph.node))
+
+
+def test_s_connected_components():
+    graph = random_hypergraph(np.random.RandomState(0), n_nodes=12, n_edges=20,
+                              max_size=5)
+    edges = list(graph.edge)
+    supports = dict((edge, graph.edge[edge].support) for edge in edges)
+    for s in (1, 2, 3):
+        eligible = [edge for edge in edges if len(supports[edge]) >= s]
+        adjacency = nx.Graph()
+        adjacency.add_nodes_from(eligible)
+        for first in range(len(eligible)):
+            for second in range(first + 1, len(eligible)):
+                if len(supports[eligible[first]] & supports[eligible[second]]) >= s:
+                    adjacency.add_edge(eligible[first], eligible[second])
+        expected = list(nx.connected_components(adjacency))
+        for hypergraph in (graph, SparseHypergraph.from_hypergraph(graph)):
+            labels = hypergraph.s_connected_components(s)
+            kept = labels >= 0
+            assert [edges[index] for index in np.flatnonzero(kept)] == eligible
+            assert_same_partition(labels[kept], expected, eligible)
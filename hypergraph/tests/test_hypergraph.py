@@ -0,0 +1,473 @@
+"""
+Tests for the Hypergraph class and its storage engines.
+"""
+import tempfile
+from collections import Counter
+
+import numpy as np
+
+from hypergraph import Hypergraph, SparseHypergraph, Interner, POMSet
+
+chain_order = np.array([[0, -1, -1],
+                        [1, 0, -1],
+                        [1, 1, 0]])
+
+sparse_order = np.array([[0, -1, -1, 0],
+                         [1, 0, 0, 0],
+                         [1, 0, 0, 0],
+                         [0, 0, 0, 0]])
+
+
+def random_order(random_state, size):
+    """A random dense order on `size` labels: unordered, a bipartition,
+    a total order or a general partial order."""
+    kind = random_state.randint(4)
+    if kind == 0:
+        ranks = np.zeros(size, dtype=int)
+    elif kind == 1:
+        ranks = random_state.randint(0, 2, size)
+    elif kind == 2:
+        ranks = random_state.permutation(size)
+    else:
+        # Labels related exactly when both are on the same side of a
+        # random split and ordered by a random permutation within it.
+        ranks = random_state.permutation(size)
+        sides = random_state.randint(0, 2, size)
+        return np.where(sides[:, None] == sides[None, :],
+                        np.sign(ranks[:, None] - ranks[None, :]), 0)
+    return np.sign(ranks[:, None] - ranks[None, :])
+
+
+def random_edges(random_state, n_nodes=30, n_edges=25, max_size=6):
+    """Random edges as (edge, nodes, dense order) triples, each with
+    distinct nodes."""
+    result = []
+    for edge in range(n_edges):
+        size = random_state.randint(1, max_size + 1)
+        nodes = random_state.choice(n_nodes, size, replace=False).tolist()
+        result.append(('e{}'.format(edge), nodes, random_order(random_state, size)))
+    return result
+
+
+def random_hypergraph(random_state, cls=Hypergraph, isolated=2, **kwargs):
+    """A random hypergraph of the class `cls`, built edge by edge, with
+    `isolated` extra nodes in no edge."""
+    result = cls()
+    for edge, nodes, order in random_edges(random_state, **kwargs):
+        result.add_edge(edge, nodes, order)
+    for node in range(isolated):
+        result.add_node('isolated{}'.format(node))
+    return result
+
+
+def assert_same_hypergraph(first, second):
+    """Assert two hypergraphs have the same nodes and edges, in the same
+    iteration order, with the same POMSets."""
+    assert list(first.node) == list(second.node)
+    assert list(first.edge) == list(second.edge)
+    for mapping in ('node', 'edge'):
+        for key in getattr(first, mapping):
+            first_pomset = getattr(first, mapping)[key]
+            second_pomset = getattr(second, mapping)[key]
+            assert list(first_pomset.labels) == list(second_pomset.labels)
+            assert np.array_equal(first_pomset.order, second_pomset.order)
+
+
+def assert_same_incidence(first, second):
+    """Assert two hypergraphs have the same incidence arrays, with the same
+    order of each row, however it is represented."""
+    first = first.incidence()
+    second = second.incidence()
+    for name in ('node_indptr', 'node_edges', 'edge_indptr', 'edge_nodes',
+                 'node_objects', 'edge_objects'):
+        assert np.array_equal(getattr(first, name), getattr(second, name)), name
+    for name in ('all_node_orders', 'all_edge_orders'):
+        for first_order, second_order in zip(getattr(first, name)(),
+                                             getattr(second, name)()):
+            assert np.array_equal(first_order.to_dense(), second_order.to_dense())
+
+
+def test_from_incidence_matches_add_edge():
+    for seed in range(5):
+        edges = random_edges(np.random.RandomState(seed))
+        edge_ids = [edge for edge, nodes, _ in edges for _ in nodes]
+        node_ids = [node for _, nodes, _ in edges for node in nodes]
+        edge_orders = dict((edge, order) for edge, _, order in edges)
+        for cls in (Hypergraph, SparseHypergraph):
+            incremental = cls()
+            for edge, nodes, order in edges:
+                incremental.add_edge(edge, nodes, order)
+            bulk = cls.from_incidence(edge_ids, node_ids, edge_orders=edge_orders)
+            assert_same_hypergraph(incremental, bulk)
+            assert_same_incidence(incremental, bulk)
+            for edge in incremental.edge:
+                assert incremental.edge[edge].order_kind == bulk.edge[edge].order_kind
+
+    # A two label chain is a total order however it is built.
+    pomset = POMSet(['x', 'y'])
+    pomset.add_dependency('x', 'y')
+    for cls in (Hypergraph, SparseHypergraph):
+        bulk = cls.from_incidence(['e', 'e', 'f', 'f', 'f'], ['x', 'y', 'x', 'y', 'z'],
+                                  edge_orders={'e': pomset.order,
+                                               'f': [[0, -1, -1], [1, 0, 0], [1, 0, 0]]})
+        assert bulk.edge['e'].order_kind == pomset.order_kind == 'total'
+        assert bulk.edge['f'].order_kind == 'bipartite'
+
+
+def test_from_incidence_in_parallel():
+    edges = random_edges(np.random.RandomState(0), n_nodes=50, n_edges=60)
+    edge_ids = [edge for edge, nodes, _ in edges for _ in nodes]
+    node_ids = [node for _, nodes, _ in edges for node in nodes]
+    for cls in (Hypergraph, SparseHypergraph):
+        for default_node_order in ('none', 'total'):
+            serial = cls.from_incidence(edge_ids, node_ids,
+                                        default_node_order=default_node_order)
+            for n_jobs in (2, 7, -1):
+                parallel = cls.from_incidence(edge_ids, node_ids,
+                                              default_node_order=default_node_order,
+                                              n_jobs=n_jobs)
+                assert_same_hypergraph(serial, parallel)
+                assert_same_incidence(serial, parallel)
+                for name in ('node_ranks', 'node_slots'):
+                    assert np.array_equal(getattr(serial.incidence(), name),
+                                          getattr(parallel.incidence(), name))
+
+
+def test_engine_parity():
+    for seed in range(5):
+        graph = random_hypergraph(np.random.RandomState(seed))
+        sparse = random_hypergraph(np.random.RandomState(seed), SparseHypergraph)
+        assert_same_hypergraph(graph, sparse)
+        assert_same_incidence(graph, sparse)
+        for node in graph.node:
+            assert graph.neighbors(node) == sparse.neighbors(node)
+            for relation in ('weak_predecessors', 'weak_successors',
+                             'strict_predecessors', 'strict_successors'):
+                assert (getattr(graph, relation)(node) ==
+                        getattr(sparse, relation)(node))
+        assert np.array_equal(graph.undirected_size_distribution_matrix,
+                              sparse.undirected_size_distribution_matrix)
+        assert np.array_equal(graph.strictly_directed_out_size_distribution,
+                              sparse.strictly_directed_out_size_distribution)
+        assert (graph.clique_expansion() != sparse.clique_expansion()).nnz == 0
+
+
+def test_sparse_extends_general_node_orders():
+    graph = Hypergraph(default_node_order='total')
+    for edge in range(4):
+        graph.add_edge(edge, [0, 1, edge + 2])
+    graph.node[0].remove_dependency(0, 2)
+    sparse = SparseHypergraph.from_hypergraph(graph)
+    assert 0 in sparse.incidence().node_orders
+    for hypergraph in (graph, sparse):
+        hypergraph.add_edge('new', [0, 1])
+        hypergraph.add_edge('newer', [0])
+    assert_same_hypergraph(graph, sparse)
+    assert_same_incidence(graph, sparse)
+
+
+def test_mutation_through_pomsets():
+    for cls in (Hypergraph, SparseHypergraph):
+        graph = cls()
+        graph.add_edge('a', [1, 2, 3])
+        graph.add_edge('b', [3, 4])
+        assert graph.strict_successors(1) == set()
+        assert graph.relation[graph.edge['a']] == 'a'
+        assert graph.relation[graph.node[3]] == 3
+        mutations = [lambda: graph.edge['a'].add_dependency(1, 2),
+                     lambda: graph.edge['a'].append_label(4),
+                     lambda: graph.edge['b'].remove_label(4),
+                     lambda: graph.node[3].reverse_order()]
+        for mutation in mutations:
+            if cls is Hypergraph:
+                mutation()
+            else:
+                try:
+                    mutation()
+                except TypeError:
+                    pass
+                else:
+                    assert False, 'A SparseHypergraph POMSet should be read-only'
+        if cls is Hypergraph:
+            assert graph.strict_successors(1) == set([2, 4])
+            assert list(graph.edge['b']) == [3]
+            assert graph.node[3].order_kind == 'unordered'
+        else:
+            assert graph.strict_successors(1) == set()
+            assert list(graph.edge['a']) == [1, 2, 3]
+            assert list(graph.edge['b']) == [3, 4]
+            assert list(graph.node[3]) == ['a', 'b']
+
+    sparse = SparseHypergraph()
+    sparse.add_edge('a', [1, 2])
+    pomset = sparse.edge['a']
+    assert sparse.edge['a'] is pomset
+    sparse.add_edge('b', [2, 3])
+    assert sparse.edge['a'] is not pomset
+    assert pomset not in sparse.relation
+
+
+def test_batch_neighbors_matches_neighbors():
+    graph = random_hypergraph(np.random.RandomState(0))
+    for relation in ('neighbors', 'weak_predecessors', 'weak_successors',
+                     'strict_predecessors', 'strict_successors'):
+        indptr, neighbors = graph.batch_neighbors(relation=relation)
+        for index, node in enumerate(graph.node):
+            assert (set(neighbors[indptr[index]:indptr[index + 1]]) ==
+                    getattr(graph, relation)(node))
+
+
+def test_clique_expansion():
+    graph = random_hypergraph(np.random.RandomState(0))
+    nodes = list(graph.node)
+    expected = np.zeros((len(nodes), len(nodes)))
+    for edge in graph.edge.values():
+        for first in edge.labels:
+            for second in edge.labels:
+                if first != second:
+                    expected[nodes.index(first), nodes.index(second)] += 1
+    assert np.array_equal(graph.clique_expansion().toarray(), expected)
+    networkx_graph = graph.networkx_undirected_cliquification
+    for first, second, data in networkx_graph.edges(data=True):
+        assert data['weight'] == expected[nodes.index(first), nodes.index(second)]
+    assert networkx_graph.number_of_edges() == np.count_nonzero(np.triu(expected))
+
+
+def test_directed_projection():
+    graph = random_hypergraph(np.random.RandomState(0))
+    nodes = list(graph.node)
+    for relation, method in (('strict', 'strictly_above'), ('weak', 'weakly_above')):
+        expected = np.zeros((len(nodes), len(nodes)))
+        for edge in graph.edge.values():
+            for node in edge.labels:
+                for target in getattr(edge, method)(node):
+                    if target != node:
+                        expected[nodes.index(node), nodes.index(target)] += 1
+        assert np.array_equal(graph.directed_projection(relation).toarray(), expected)
+    strict = graph.networkx_strictly_directed_cliquification
+    assert set(strict.edges()) == set((nodes[i], nodes[j]) for i, j in
+                                      zip(*np.nonzero(graph.directed_projection().toarray())))
+
+
+def _reference_size_distribution(graph, sizes_of):
+    counts = Counter()
+    for node in graph.node:
+        for size, count in Counter(sizes_of(node)).items():
+            counts[count, size] += 1
+    result = np.zeros((max(key[0] for key in counts) + 1,
+                       max(key[1] for key in counts) + 1), dtype=int)
+    for key, count in counts.items():
+        result[key] = count
+    return result
+
+
+def test_size_distributions():
+    graph = random_hypergraph(np.random.RandomState(0))
+    expected = _reference_size_distribution(
+        graph, lambda node: [graph.edge[edge].size for edge in graph.node[node]])
+    assert np.array_equal(graph.undirected_size_distribution_matrix, expected)
+    for name, method in (('weakly_directed_out_size_distribution', 'weakly_above'),
+                         ('weakly_directed_in_size_distribution', 'weakly_below'),
+                         ('strictly_directed_out_size_distribution', 'strictly_above'),
+                         ('strictly_directed_in_size_distribution', 'strictly_below')):
+        expected = _reference_size_distribution(
+            graph, lambda node: [len(getattr(graph.edge[edge], method)(node))
+                                 for edge in graph.node[node]])
+        assert np.array_equal(getattr(graph, name), expected), name
+
+
+def test_interner():
+    interner = Interner(['a', 'b'])
+    assert interner.intern('c') == 2
+    assert interner.intern('a') == 0
+    assert list(interner.intern_all(['b', 'd'])) == [1, 3]
+    assert list(interner.objects([3, 0])) == ['d', 'a']
+    assert interner.get('e') is None
+    assert 'd' in interner and len(interner) == 4
+    for label in range(100):
+        interner.intern((label,))
+    assert interner.id((99,)) == 103
+    wrapped = Interner.from_array(np.array(['x', 'y'], dtype=object))
+    assert wrapped.id('y') == 1 and wrapped.intern('z') == 2
+
+
+def test_interned_labels():
+    graph = random_hypergraph(np.random.RandomState(0))
+    for edge in graph.edge:
+        pomset = graph.edge[edge]
+        assert pomset._interner is graph._node_interner
+        assert list(graph._node_interner.objects(pomset.label_ids)) == list(pomset.labels)
+
+
+def test_from_incidence_dense_orders():
+    for cls in (Hypergraph, SparseHypergraph):
+        bulk = cls.from_incidence(['e'] * 3 + ['f'] * 4, [1, 2, 3, 1, 2, 3, 4],
+                                  edge_orders={'e': chain_order, 'f': sparse_order})
+        incremental = cls()
+        incremental.add_edge('e', [1, 2, 3], chain_order)
+        incremental.add_edge('f', [1, 2, 3, 4], sparse_order)
+
+        for relation in ('strict_successors', 'weak_predecessors'):
+            bulk_result = bulk.incidence().neighbors(np.arange(4), relation=relation)
+            incremental_result = incremental.incidence().neighbors(np.arange(4),
+                                                                   relation=relation)
+            for bulk_array, incremental_array in zip(bulk_result, incremental_result):
+                assert np.array_equal(bulk_array, incremental_array)
+
+    bulk = Hypergraph.from_incidence(['e'] * 3 + ['f'] * 4, [1, 2, 3, 1, 2, 3, 4],
+                                     edge_orders={'e': chain_order, 'f': sparse_order})
+    assert bulk.edge['e'].order_kind == 'total'
+    assert list(bulk.edge['e'].strictly_above(1)) == [2, 3]
+    assert list(bulk.edge['f'].strictly_above(1)) == [2, 3]
+    assert np.array_equal(bulk.edge['f'].order, sparse_order)
+
+
+def test_save_load():
+    graph = random_hypergraph(np.random.RandomState(0))
+    with tempfile.TemporaryDirectory() as directory:
+        graph.save(directory)
+        for mmap in (True, False):
+            for cls in (Hypergraph, SparseHypergraph):
+                loaded = cls.load(directory, mmap=mmap)
+                assert_same_hypergraph(graph, loaded)
+                assert_same_incidence(graph, loaded)
+                del loaded
+
+
+def test_dual():
+    graph = random_hypergraph(np.random.RandomState(0))
+    dual = graph.dual
+    assert list(dual.node) == list(graph.edge)
+    assert list(dual.edge) == list(graph.node)
+    assert dual.dual is graph
+    for edge in graph.edge:
+        assert list(dual.node[edge].labels) == list(graph.edge[edge].labels)
+    assert (dual.incidence().matrix != graph.incidence().matrix.T).nnz == 0
+    graph.add_edge('new', [0, 1])
+    assert 'new' in dual.node
+    assert dual.incidence().n_nodes == graph.incidence().n_edges
+    try:
+        dual.add_edge('edge', ['e0'])
+    except TypeError:
+        pass
+    else:
+        assert False, 'The dual should be read-only'
+
+
+def test_cache_invalidated_by_modification():
+    graph = random_hypergraph(np.random.RandomState(0))
+    components = graph.connected_components()
+    graph.add_edge('joined', [0, 'isolated0'])
+    assert graph.connected_components().shape[0] == components.shape[0]
+    node_ids = dict((node, index) for index, node in enumerate(graph.node))
+    labels = graph.connected_components()
+    assert labels[node_ids[0]] == labels[node_ids['isolated0']]
+
+
+def test_remove():
+    graph = Hypergraph()
+    graph.add_edge('a', [1, 2, 3], chain_order)
+    graph.add_edge('b', [1, 3])
+    graph.add_edge('c', [2, 3, 4])
+    graph.remove_edge('b')
+    graph.remove_node(2)
+    assert list(graph.edge) == ['a', 'c']
+    assert list(graph.node) == [1, 3, 4]
+    assert list(graph.edge['a']) == [1, 3]
+    assert np.array_equal(graph.edge['a'].order, [[0, -1], [1, 0]])
+    assert list(graph.edge['c']) == [3, 4]
+    assert list(graph.node[3]) == ['a', 'c']
+    assert graph.neighbors(1) == set([1, 3])
+
+
+def _remove_some(graph):
+    graph.remove_edges_from(['e3', 'e7', 'e20'])
+    graph.remove_nodes_from([0, 5, 11, 'isolated0'])
+
+
+def test_remove_matches_across_engines():
+    for seed in range(5):
+        reference = random_hypergraph(np.random.RandomState(seed))
+        _remove_some(reference)
+        for cls in (Hypergraph, SparseHypergraph):
+            graph = random_hypergraph(np.random.RandomState(seed), cls)
+            _remove_some(graph)
+            assert_same_hypergraph(reference, graph)
+            assert_same_incidence(reference, graph)
+
+
+def test_remove_after_load():
+    for mmap in (True, False):
+        for cls in (Hypergraph, SparseHypergraph):
+            source = random_hypergraph(np.random.RandomState(0))
+            reference = random_hypergraph(np.random.RandomState(0))
+            _remove_some(reference)
+            with tempfile.TemporaryDirectory() as directory:
+                source.save(directory)
+                loaded = cls.load(directory, mmap=mmap)
+                assert_same_hypergraph(source, loaded)
+                _remove_some(loaded)
+                assert_same_hypergraph(reference, loaded)
+                assert_same_incidence(reference, loaded)
+                # The saved hypergraph is unchanged.
+                assert_same_hypergraph(source, cls.load(directory, mmap=mmap))
+                del loaded
+
+
+def test_remove_after_from_hypergraph():
+    for cls in (Hypergraph, SparseHypergraph):
+        source = Hypergraph()
+        source.add_edge('a', [1, 2, 3])
+        source.add_edge('b', [1, 3])
+        source.add_edge('c', [2, 3])
+        node_edges = source.incidence().node_edges.copy()
+
+        copy = cls.from_hypergraph(source)
+        copy.remove_edge('a')
+        copy.remove_node(2)
+        assert np.array_equal(source.incidence().node_edges, node_edges)
+        assert sorted(source.edge) == ['a', 'b', 'c']
+        assert list(source.node[3]) == ['a', 'b', 'c']
+        assert sorted(copy.edge) == ['b', 'c']
+        assert list(copy.node[3]) == ['b', 'c']
+        assert list(copy.edge['c']) == [3]
+
+    source = random_hypergraph(np.random.RandomState(0))
+    reference = random_hypergraph(np.random.RandomState(0))
+    distances = source.distances()
+    for cls in (Hypergraph, SparseHypergraph):
+        copy = cls.from_hypergraph(source)
+        _remove_some(copy)
+        assert_same_hypergraph(source, reference)
+        assert np.array_equal(source.distances(), distances)
+
+
+def test_remove_after_from_incidence():
+    edge_ids = np.array([0, 0, 0, 1, 1])
+    node_ids = np.array([5, 6, 7, 5, 7])
+    graph = Hypergraph.from_incidence(edge_ids, node_ids)
+    graph.remove_node(6)
+    graph.remove_edge(1)
+    assert np.array_equal(edge_ids, [0, 0, 0, 1, 1])
+    assert np.array_equal(node_ids, [5, 6, 7, 5, 7])
+    assert list(graph.edge[0]) == [5, 7]
+    assert list(graph.node[5]) == [0]
+
+
+def test_from_bipartitions_matches_add_bipartition_edge():
+    random_state = np.random.RandomState(0)
+    edge_ids = np.repeat(np.arange(20), 4)
+    node_ids = random_state.randint(0, 15, edge_ids.shape[0])
+    sides = random_state.randint(0, 2, edge_ids.shape[0])
+    for cls in (Hypergraph, SparseHypergraph):
+        incremental = cls()
+        for edge in range(20):
+            rows = edge_ids == edge
+            incremental.add_bipartition_edge(edge, (node_ids[rows & (sides == 0)],
+                                                    node_ids[rows & (sides == 1)]))
+        bulk = cls.from_bipartitions(edge_ids, sides, node_ids)
+        assert list(incremental.edge) == list(bulk.edge)
+        for edge in incremental.edge:
+            assert np.array_equal(incremental.edge[edge].order, bulk.edge[edge].order)
+            assert (sorted(incremental.edge[edge].labels) ==
+                    sorted(bulk.edge[edge].labels))
@@ -0,0 +1,69 @@
+"""
+Tests for reading, saving and loading hypergraphs.
+"""
+import os
+import tempfile
+
+import numpy as np
+
+from hypergraph import Hypergraph
+from hypergraph.io import read_incidences
+
+
+def _write_edgelist(directory, text):
+    path = os.path.join(directory, 'edges.txt')
+    with open(path, 'w') as edgelist:
+        edgelist.write(text)
+    return path
+
+
+def test_read_rows_without_comments():
+    with tempfile.TemporaryDirectory() as directory:
+        path = _write_edgelist(directory, '1 2 3\n\n4 5\n')
+        edge_ids, node_ids = read_incidences(path, format='rows', comments=None)
+    assert np.array_equal(edge_ids, [0, 0, 0, 1, 1])
+    assert np.array_equal(node_ids, [1, 2, 3, 4, 5])
+
+
+def test_read_rows_with_trailing_delimiters():
+    with tempfile.TemporaryDirectory() as directory:
+        path = _write_edgelist(directory, '1,2,3,\n4, 5 ,\n6\n')
+        for dtype in (np.int64, str):
+            edge_ids, node_ids = read_incidences(path, format='rows', delimiter=',',
+                                                 dtype=dtype)
+            assert np.array_equal(edge_ids, [0, 0, 0, 1, 1, 2])
+            assert list(node_ids) == list(np.array([1, 2, 3, 4, 5, 6], dtype=dtype))
+
+        path = _write_edgelist(directory, '1 2 3 \n4\t5\t\n')
+        edge_ids, node_ids = read_incidences(path, format='rows')
+    assert np.array_equal(edge_ids, [0, 0, 0, 1, 1])
+    assert np.array_equal(node_ids, [1, 2, 3, 4, 5])
+
+
+def test_read_pairs_without_comments():
+    with tempfile.TemporaryDirectory() as directory:
+        path = _write_edgelist(directory, '0 1\n0 2\n\n1 3\n')
+        edge_ids, node_ids = read_incidences(path, format='pairs', comments=None)
+    assert np.array_equal(edge_ids, [0, 0, 1])
+    assert np.array_equal(node_ids, [1, 2, 3])
+
+
+def test_read_edgelist_in_chunks():
+    random_state = np.random.RandomState(0)
+    pairs = random_state.randint(0, 20, (100, 2))
+    rows = [random_state.randint(0, 20, random_state.randint(1, 6)) for _ in range(30)]
+    with tempfile.TemporaryDirectory() as directory:
+        path = _write_edgelist(directory, '# edge node\n' + ''.join(
+            '{} {}\n'.format(edge, node) for edge, node in pairs))
+        for chunk_size in (1, 7, 1000):
+            edge_ids, node_ids = read_incidences(path, chunk_size=chunk_size)
+            assert np.array_equal(edge_ids, pairs[:, 0])
+            assert np.array_equal(node_ids, pairs[:, 1])
+
+        path = _write_edgelist(directory, ''.join(
+            ' '.join(map(str, row)) + '\n' for row in rows))
+        for chunk_size in (1, 7, 1000):
+            graph = Hypergraph.read_edgelist(path, format='rows', chunk_size=chunk_size)
+            assert list(graph.edge) == list(range(30))
+            for edge, row in enumerate(rows):
+                assert list(graph.edge[edge].labels) == list(row)
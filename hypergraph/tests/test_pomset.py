@@ -0,0 +1,146 @@
+"""
+Tests for POMSets and their order representations.
+"""
+import numpy as np
+
+from hypergraph import POMSet
+from hypergraph.orders import (UnorderedOrder, BipartiteOrder, ChainOrder,
+                               _SEQUENTIAL_BATCH)
+
+
+def test_add_labels_grow_buffer():
+    pomset = POMSet()
+    for label in range(100):
+        pomset.add_label(label)
+    pomset.add_labels_from(range(100, 250))
+    assert pomset.size == 250
+    assert list(pomset.labels) == list(range(250))
+    assert pomset.order_kind == 'unordered'
+    assert pomset.order.shape == (250, 250)
+    assert not pomset.order.any()
+
+
+def test_label_positions():
+    pomset = POMSet(['a', 'b', 'a', 'c'])
+    pomset.add_dependency('a', 'b', from_index=1)
+    pomset.add_label('a')
+    assert pomset.multiplicity('a') == 3
+    assert pomset.multiplicity('d') == 0
+    assert pomset.cardinality == 3
+    assert pomset.support == set(['a', 'b', 'c'])
+    assert pomset.strictly_less_than('a', 'b', element1_index=1)
+    assert not pomset.strictly_less_than('a', 'b')
+    pomset.remove_label('a')
+    assert list(pomset.labels) == ['b', 'a', 'c', 'a']
+    assert pomset.strictly_less_than('a', 'b')
+    assert pomset.multiplicity('a') == 2
+
+
+def test_order_representations():
+    pomset = POMSet(['a', 'b', 'c', 'd'])
+    assert pomset.order_kind == 'unordered'
+    pomset.add_dependency('a', 'b')
+    assert pomset.order_kind == 'total'
+    pomset.add_dependency('b', 'c')
+    assert pomset.order_kind == 'total'
+    pomset.add_dependency('d', 'c')
+    assert pomset.order_kind == 'sparse'
+    expected = np.array([[0, -1, -1, 0],
+                         [1, 0, -1, 0],
+                         [1, 1, 0, 1],
+                         [0, 0, -1, 0]])
+    assert np.array_equal(pomset.order, expected)
+    assert np.array_equal(POMSet(list('abcd'), order=expected).order, expected)
+
+    bipartite = POMSet(bipartition=(['a', 'b'], ['c']))
+    assert bipartite.order_kind == 'bipartite'
+    assert list(bipartite.strictly_above('a')) == ['c']
+    assert list(bipartite.weakly_above('a')) == ['a', 'b', 'c']
+
+
+def test_append_label():
+    pomset = POMSet(['start'])
+    for label in range(200):
+        pomset.append_label(label)
+    assert pomset.order_kind == 'total'
+    assert pomset.size == 201
+    assert list(pomset.strictly_above(198)) == [199]
+    assert list(pomset.strictly_below('start')) == []
+    assert pomset.strictly_less_than('start', 199)
+
+
+def test_order_classification():
+    pomset = POMSet(['a', 'b', 'c', 'd'])
+    pomset.add_dependency('a', 'c')
+    pomset.add_dependency('a', 'd')
+    pomset.add_dependency('b', 'c')
+    assert pomset.order_kind == 'sparse'
+    pomset.add_dependency('b', 'd')
+    assert pomset.order_kind == 'bipartite'
+    pomset.remove_dependency('b', 'd')
+    assert pomset.order_kind == 'sparse'
+    pomset.remove_label('b')
+    assert pomset.order_kind == 'bipartite'
+    pomset.remove_label('a')
+    assert pomset.order_kind == 'unordered'
+
+
+def _random_relations(random_state, size, n_relations):
+    """Random relations consistent with a random total order."""
+    permutation = random_state.permutation(size)
+    lowers = random_state.randint(0, size, n_relations)
+    uppers = random_state.randint(0, size, n_relations)
+    keep = permutation[lowers] < permutation[uppers]
+    return permutation, lowers[keep], uppers[keep]
+
+
+def test_add_relations_matches_add_relation():
+    random_state = np.random.RandomState(0)
+    for trial in range(60):
+        size = random_state.randint(2, 40)
+        n_relations = random_state.randint(2, 4 * _SEQUENTIAL_BATCH)
+        permutation, lowers, uppers = _random_relations(random_state, size, n_relations)
+        half = permutation < size // 2
+        ranks = np.where(half, permutation, -1)
+        for base in (UnorderedOrder(size), ChainOrder(ranks),
+                     BipartiteOrder(size, np.flatnonzero(half), np.flatnonzero(~half))):
+            sequential = base.copy()
+            for lower, upper in zip(lowers, uppers):
+                sequential = sequential.add_relation(lower, upper)
+            batched = base.copy().add_relations(lowers, uppers)
+            assert batched.kind == sequential.kind
+            assert np.array_equal(batched.to_dense(), sequential.to_dense())
+
+
+def test_add_relations_cycle():
+    random_state = np.random.RandomState(1)
+    for n_relations in (8, 4 * _SEQUENTIAL_BATCH):
+        _, lowers, uppers = _random_relations(random_state, 30, n_relations)
+        order = UnorderedOrder(30).add_relations(lowers, uppers)
+        dense = order.to_dense()
+        try:
+            order.add_relations(np.append(lowers, uppers[0]),
+                                np.append(uppers, lowers[0]))
+        except ValueError:
+            pass
+        else:
+            assert False, 'A cycle should raise a ValueError'
+        assert np.array_equal(order.to_dense(), dense)
+
+    # A cycle through an existing relation
+    chain = ChainOrder(np.arange(10))
+    try:
+        chain.add_relations([9, 1], [0, 2])
+    except ValueError:
+        pass
+    else:
+        assert False, 'A cycle should raise a ValueError'
+    assert np.array_equal(chain.ranks(), np.arange(10))
+
+
+def test_add_dependencies_from():
+    pomset = POMSet(['a', 'b', 'c', 'd'])
+    pomset.add_dependencies_from([('a', 0, 'b', 0), ('b', 0, 'c', 0)])
+    assert pomset.order_kind == 'total'
+    assert sorted(pomset.strictly_above('a')) == ['b', 'c']
+    assert list(pomset.strictly_above('d')) == []
@@ -0,0 +1,124 @@
+"""
+Tests for breadth first search, distances and random walks, against
+searches over the per node neighbor methods.
+"""
+import networkx as nx
+import numpy as np
+
+from concurrent.futures import ProcessPoolExecutor
+
+from hypergraph import SparseHypergraph
+from hypergraph import traversal
+
+from .test_hypergraph import random_hypergraph
+
+# The per node method giving the nodes one step of a search can reach
+_STEPS = {
+    'undirected': 'neighbors',
+    'weakly': 'weak_successors',
+    'strictly': 'strict_successors',
+}
+
+
+def reference_distances(graph, directed):
+    """All pairs distances by networkx over the steps of a search."""
+    nodes = list(graph.node)
+    steps = nx.DiGraph()
+    steps.add_nodes_from(nodes)
+    for node in nodes:
+        steps.add_edges_from((node, neighbor)
+                             for neighbor in getattr(graph, _STEPS[directed])(node)
+                             if neighbor != node)
+    result = np.full((len(nodes), len(nodes)), -1)
+    for row, source in enumerate(nodes):
+        lengths = nx.single_source_shortest_path_length(steps, source)
+        for column, node in enumerate(nodes):
+            result[row, column] = lengths.get(node, -1)
+    return result
+
+
+def test_breadth_first_search():
+    for seed in range(3):
+        graph = random_hypergraph(np.random.RandomState(seed), n_edges=15)
+        nodes = list(graph.node)
+        for directed in ('undirected', 'weakly', 'strictly'):
+            expected = reference_distances(graph, directed)
+            for row, root in enumerate(nodes):
+                distances, parents = graph.breadth_first_search(root, directed)
+                assert np.array_equal(distances, expected[row])
+                # Each node is reached from a node one step closer.
+                for node in np.flatnonzero(distances > 0):
+                    assert distances[parents[node]] == distances[node] - 1
+                    assert nodes[node] in getattr(graph, _STEPS[directed])(
+                        nodes[parents[node]])
+                assert np.all(parents[distances <= 0] == -1)
+
+
+def test_breadth_first_search_max_depth():
+    graph = random_hypergraph(np.random.RandomState(0), n_edges=15)
+    full, _ = graph.breadth_first_search(0)
+    limited, _ = graph.breadth_first_search(0, max_depth=1)
+    assert np.array_equal(limited, np.where(full <= 1, full, -1))
+
+
+def test_distances():
+    graph = random_hypergraph(np.random.RandomState(0))
+    sparse = SparseHypergraph.from_hypergraph(graph)
+    for directed in ('undirected', 'strictly'):
+        expected = reference_distances(graph, directed)
+        assert np.array_equal(graph.distances(directed=directed), expected)
+        assert np.array_equal(sparse.distances(directed=directed), expected)
+        assert np.array_equal(graph.distances(directed=directed, n_jobs=2,
+                                              chunk_size=8), expected)
+
+    sources = [3, 1, 4]
+    rows = [list(graph.node).index(source) for source in sources]
+    chunks = list(graph.iter_distances(sources, chunk_size=2))
+    assert [len(chunk) for chunk, _ in chunks] == [2, 1]
+    assert list(np.concatenate([chunk for chunk, _ in chunks])) == sources
+    assert np.array_equal(np.vstack([distances for _, distances in chunks]),
+                          reference_distances(graph, 'undirected')[rows])
+
+
+class _CountingExecutor(ProcessPoolExecutor):
+    """A process pool counting the chunks submitted to it."""
+    submitted = 0
+
+    def submit(self, *args, **kwargs):
+        _CountingExecutor.submitted += 1
+        return super().submit(*args, **kwargs)
+
+
+def test_iter_distances_bounds_chunks_in_flight():
+    graph = random_hypergraph(np.random.RandomState(0))
+    expected = reference_distances(graph, 'undirected')
+    traversal.ProcessPoolExecutor, original = _CountingExecutor, traversal.ProcessPoolExecutor
+    try:
+        _CountingExecutor.submitted = 0
+        chunks = graph.iter_distances(n_jobs=2, chunk_size=2)
+        _, distances = next(chunks)
+        assert _CountingExecutor.submitted == 2
+        rows = [distances] + [distances for _, distances in chunks]
+    finally:
+        traversal.ProcessPoolExecutor = original
+    assert _CountingExecutor.submitted > 2
+    assert np.array_equal(np.vstack(rows), expected)
+
+
+def test_random_walks():
+    graph = random_hypergraph(np.random.RandomState(0))
+    nodes = list(graph.node)
+    for directed in ('undirected', 'strictly'):
+        walks = graph.random_walks(5, walks_per_node=2, directed=directed,
+                                   random_state=0)
+        assert walks.shape == (2 * len(nodes), 6)
+        assert np.array_equal(walks[:, 0], np.repeat(np.arange(len(nodes)), 2))
+        assert np.array_equal(walks, graph.random_walks(5, walks_per_node=2,
+                                                        directed=directed,
+                                                        random_state=0))
+        for walk in walks:
+            for current, step in zip(walk[:-1], walk[1:]):
+                if current == -1:
+                    assert step == -1
+                elif step != -1:
+                    assert nodes[step] in getattr(graph, _STEPS[directed])(nodes[current])
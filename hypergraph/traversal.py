@@ -0,0 +1,528 @@
+# -*- coding: utf-8 -*-
+"""
+hypergraph.traversal: Traversals of hypergraphs over their integer
+incidence arrays.
+"""
+# Author: Leland McInnes <leland.mcinnes@gmail.com>
+#
+# License: LGPL v2
+import os
+import numpy as np
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from .incidence import Incidence, INDEX_DTYPE, row_positions
+
+# For each directedness of a traversal: which side of `searchsorted`
+# finds the end of the run of an edge's incidences reachable from a rank,
+# and the order representation method giving the same positions.
+_DIRECTEDNESS = {
+    'undirected': (None, None),
+    'weakly': ('right', 'weakly_above'),
+    'strictly': ('left', 'above'),
+}
+
+
+class _RankIndex(object):
+    """The incidences of each edge sorted by decreasing rank, so that the
+    incidences of an edge above (or weakly above) a given rank are a
+    prefix of its run, found by a binary search on `keys`.
+    """
+
+    def __init__(self, incidence=None):
+        if incidence is None:
+            return
+        slot_edges = np.repeat(np.arange(incidence.n_edges), incidence.edge_sizes)
+        ranks = incidence.edge_ranks
+        self.top = int(ranks.max()) if ranks.shape[0] > 0 else 0
+        self.span = self.top + 1
+        self.slots = np.lexsort((-ranks.astype(np.int64), slot_edges))
+        self.keys = (slot_edges[self.slots].astype(np.int64) * self.span +
+                     (self.top - ranks[self.slots]))
+
+    def ends(self, edges, ranks, side):
+        """The end of the run of each edge in `edges` reachable from the
+        matching rank in `ranks`."""
+        return np.searchsorted(self.keys,
+                               edges.astype(np.int64) * self.span + (self.top - ranks),
+                               side=side)
+
+
+def _check_directedness(directed):
+    if directed not in _DIRECTEDNESS:
+        raise ValueError('Directedness must be one of "undirected", "weakly", "strictly"')
+
+
+def breadth_first_search(incidence, sources, directed='undirected',
+                         max_depth=None):
+    """Breadth first search of a hypergraph from one or more source nodes,
+    over its integer incidence arrays.
+
+    The search advances a whole frontier at a time. Each edge remembers
+    how far through its incidences it has already been expanded, so every
+    incidence is visited at most once and the search takes
+    O(n_nodes + n_incidences) time for edges whose order is given by
+    ranks. Edges with other orders are expanded from each incidence at
+    most once.
+
+    Parameters
+    ----------
+
+    incidence : Incidence
+        The incidence arrays of the hypergraph.
+
+    sources : int or array of int
+        The id (or ids) of the node(s) to search from.
+
+    directed : string, optional
+        One of 'undirected', to step to every node of an incident edge,
+        'weakly', to step to nodes greater than or unrelated to the current
+        node in the edge, or 'strictly', to step to strictly greater nodes.
+        (default 'undirected')
+
+    max_depth : int, optional
+        The number of steps after which to stop, or None to search until
+        no more nodes can be reached. (default None)
+
+    Returns
+    -------
+
+    distances : numpy ndarray (n_nodes,)
+        The number of steps from the nearest source to each node, or -1
+        for nodes that were not reached.
+
+    parents : numpy ndarray (n_nodes,)
+        The node each node was first reached from, or -1 for sources and
+        nodes that were not reached.
+    """
+    _check_directedness(directed)
+    return _breadth_first_search(incidence, _RankIndex(incidence), sources,
+                                 directed, max_depth)
+
+
+def _breadth_first_search(incidence, rank_index, sources, directed, max_depth):
+    side, method = _DIRECTEDNESS[directed]
+    distances = np.full(incidence.n_nodes, -1, dtype=INDEX_DTYPE)
+    parents = np.full(incidence.n_nodes, -1, dtype=INDEX_DTYPE)
+    expanded = incidence.edge_indptr[:-1].copy()
+    general = np.zeros(incidence.n_edges, dtype=bool)
+    if method is not None and incidence.edge_orders:
+        general[np.fromiter(incidence.edge_orders, dtype=np.intp)] = True
+    general_expanded = set()
+
+    frontier = np.unique(np.atleast_1d(np.asarray(sources, dtype=np.intp)))
+    distances[frontier] = 0
+    depth = 0
+    while frontier.shape[0] > 0 and (max_depth is None or depth < max_depth):
+        positions, degrees = row_positions(incidence.node_indptr, frontier)
+        queries = np.repeat(frontier, degrees)
+        edges = incidence.node_edges[positions]
+        if side is None:
+            slots = positions
+            ends = incidence.edge_indptr[edges + 1]
+        else:
+            slots = incidence.node_slots[positions]
+            ends = rank_index.ends(edges, incidence.edge_ranks[slots], side)
+
+        # Of the queries reaching further into an edge than before, keep
+        # the one reaching furthest and expand only the new part.
+        useful = (ends > expanded[edges]) & ~general[edges]
+        useful_edges = edges[useful]
+        by_reach = np.lexsort((-ends[useful], useful_edges))
+        reached, first = np.unique(useful_edges[by_reach], return_index=True)
+        best = np.flatnonzero(useful)[by_reach[first]]
+        starts = expanded[reached]
+        lengths = ends[best] - starts
+        expanded[reached] = ends[best]
+        found = [incidence.edge_nodes[rank_index.slots[_ranges(starts, lengths)]]]
+        found_parents = [np.repeat(queries[best], lengths)]
+
+        for query, edge, slot in zip(queries[general[edges]],
+                                     edges[general[edges]],
+                                     slots[general[edges]]):
+            if slot in general_expanded:
+                continue
+            general_expanded.add(slot)
+            start = incidence.edge_indptr[edge]
+            above = getattr(incidence.edge_orders[edge], method)(slot - start)
+            found.append(incidence.edge_nodes[start + above])
+            found_parents.append(np.full(above.shape[0], query, dtype=np.intp))
+
+        found = np.concatenate(found)
+        found_parents = np.concatenate(found_parents)
+        new = distances[found] < 0
+        frontier, first = np.unique(found[new], return_index=True)
+        depth += 1
+        distances[frontier] = depth
+        parents[frontier] = found_parents[new][first]
+
+    return distances, parents
+
+
+def iter_distances(incidence, sources, directed='undirected', max_depth=None,
+                   n_jobs=1, chunk_size=64):
+    """Breadth first search distances from each of many source nodes,
+    generated a chunk of sources at a time.
+
+    With `n_jobs` greater than one the chunks are searched by a pool of
+    worker processes. The incidence arrays are copied once into shared
+    memory, which every worker attaches to, so only the ids of the
+    sources and the resulting distances pass between processes. At most
+    `n_jobs` chunks are searched ahead of the one last yielded, so the
+    rows held at once stay bounded however slowly they are consumed.
+
+    Parameters
+    ----------
+
+    incidence : Incidence
+        The incidence arrays of the hypergraph.
+
+    sources : array of int
+        The ids of the nodes to search from.
+
+    directed : string, optional
+        The directedness of the search, as for `breadth_first_search`.
+        (default 'undirected')
+
+    max_depth : int, optional
+        The number of steps after which to stop each search, or None.
+        (default None)
+
+    n_jobs : int, optional
+        The number of worker processes, 1 to search in this process, or
+        -1 to use every CPU. (default 1)
+
+    chunk_size : int, optional
+        The number of sources searched per task. (default 64)
+
+    Yields
+    ------
+
+    sources : numpy ndarray (n_chunk,)
+        The ids of a chunk of sources, in the order given.
+
+    distances : numpy ndarray (n_chunk, n_nodes)
+        The distances from each of those sources to every node, or -1
+        for nodes that were not reached.
+    """
+    _check_directedness(directed)
+    sources = np.asarray(sources, dtype=np.intp)
+    chunks = [sources[start:start + chunk_size]
+              for start in range(0, sources.shape[0], chunk_size)]
+    rank_index = _RankIndex(incidence)
+    if n_jobs == -1:
+        n_jobs = os.cpu_count()
+
+    if n_jobs is None or n_jobs <= 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            yield chunk, _distance_rows(incidence, rank_index, chunk,
+                                        directed, max_depth)
+        return
+
+    blocks, specs = _share({
+        'node_indptr': incidence.node_indptr,
+        'node_edges': incidence.node_edges,
+        'node_ranks': incidence.node_ranks,
+        'node_slots': incidence.node_slots,
+        'edge_indptr': incidence.edge_indptr,
+        'edge_nodes': incidence.edge_nodes,
+        'edge_ranks': incidence.edge_ranks,
+        'rank_slots': rank_index.slots,
+        'rank_keys': rank_index.keys,
+    })
+    try:
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_attach,
+                                 initargs=(specs, incidence.edge_orders,
+                                           rank_index.top)) as executor:
+            # At most `n_jobs` chunks are in flight, so that rows are not
+            # computed faster than the caller consumes them.
+            pending = deque()
+            for chunk in chunks:
+                if len(pending) >= n_jobs:
+                    done, future = pending.popleft()
+                    yield done, future.result()
+                pending.append((chunk, executor.submit(_worker_distance_rows, chunk,
+                                                       directed, max_depth)))
+            while pending:
+                done, future = pending.popleft()
+                yield done, future.result()
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+
+def distance_matrix(incidence, sources, directed='undirected', max_depth=None,
+                    n_jobs=1, chunk_size=64):
+    """Breadth first search distances from each of many source nodes, as
+    a dense matrix; see `iter_distances`.
+
+    Returns
+    -------
+
+    distances : numpy ndarray (len(sources), n_nodes)
+        The distance from each source to every node, or -1 for nodes
+        that were not reached.
+    """
+    result = np.empty((len(sources), incidence.n_nodes), dtype=INDEX_DTYPE)
+    start = 0
+    for chunk, rows in iter_distances(incidence, sources, directed, max_depth,
+                                      n_jobs, chunk_size):
+        result[start:start + chunk.shape[0]] = rows
+        start += chunk.shape[0]
+    return result
+
+
+def _distance_rows(incidence, rank_index, sources, directed, max_depth):
+    result = np.empty((sources.shape[0], incidence.n_nodes), dtype=INDEX_DTYPE)
+    for row, source in enumerate(sources):
+        result[row] = _breadth_first_search(incidence, rank_index, source,
+                                            directed, max_depth)[0]
+    return result
+
+
+def random_walks(incidence, starts, walk_length, directed='undirected',
+                 weighting='count', random_state=None, out=None):
+    """Random walks on a hypergraph, each step moving from the current
+    node to an incident edge and then to a node of that edge. All the
+    walkers are advanced together, a step at a time, with vectorized
+    lookups into the incidence arrays.
+
+    Parameters
+    ----------
+
+    incidence : Incidence
+        The incidence arrays of the hypergraph.
+
+    starts : array of int
+        The id of the node each walker starts from; repeat an id to start
+        several walks from a node.
+
+    walk_length : int
+        The number of steps of each walk.
+
+    directed : string, optional
+        One of 'undirected', to step to any node of the chosen edge,
+        'weakly', to step to a node greater than or unrelated to the
+        current node in the edge, or 'strictly', to step to a strictly
+        greater node. Directed walks only choose edges with a node to step
+        to. (default 'undirected')
+
+    weighting : string or array, optional
+        How likely each incident edge is to be chosen, as the edge weights
+        of `Incidence.edge_weights`: 'count' for uniformly, 'size' for in
+        proportion to the size of the edge, 'inverse', or an array of
+        weights, one per edge. (default 'count')
+
+    random_state : int, numpy RandomState or Generator, optional
+        The seed, or random number generator, for reproducible walks.
+        (default None)
+
+    out : numpy ndarray (len(starts), walk_length + 1), optional
+        A preallocated integer array to write the walks to, or None.
+        (default None)
+
+    Returns
+    -------
+
+    walks : numpy ndarray (len(starts), walk_length + 1)
+        The ids of the nodes visited by each walk, beginning with its
+        start. A walk that reaches a node it cannot step from is padded
+        with -1.
+    """
+    _check_directedness(directed)
+    starts = np.asarray(starts, dtype=np.intp)
+    if out is None:
+        out = np.empty((starts.shape[0], walk_length + 1), dtype=INDEX_DTYPE)
+    elif out.shape != (starts.shape[0], walk_length + 1):
+        raise ValueError('out must have shape (len(starts), walk_length + 1)')
+    _Walker(incidence, directed, weighting).walk(starts, _random_state(random_state),
+                                                 out)
+    return out
+
+
+def iter_random_walks(incidence, starts, walk_length, directed='undirected',
+                      weighting='count', random_state=None, chunk_size=65536):
+    """Random walks on a hypergraph, as for `random_walks`, generated a
+    chunk of walkers at a time so that many walks can be streamed without
+    holding them all in memory. The walks are reproducible for a given
+    seed and `chunk_size`.
+
+    Yields
+    ------
+
+    walks : numpy ndarray (n_chunk, walk_length + 1)
+        The walks of a chunk of the walkers, in the order of `starts`.
+    """
+    _check_directedness(directed)
+    starts = np.asarray(starts, dtype=np.intp)
+    walker = _Walker(incidence, directed, weighting)
+    random_state = _random_state(random_state)
+    for start in range(0, starts.shape[0], chunk_size):
+        chunk = starts[start:start + chunk_size]
+        out = np.empty((chunk.shape[0], walk_length + 1), dtype=INDEX_DTYPE)
+        yield walker.walk(chunk, random_state, out)
+
+
+def _random_state(random_state):
+    if isinstance(random_state, (np.random.RandomState, np.random.Generator)):
+        return random_state
+    return np.random.default_rng(random_state)
+
+
+class _Walker(object):
+    """The tables for advancing random walkers over an incidence.
+
+    An edge is chosen from a node's incidences in proportion to their
+    weights by a binary search of the cumulative weights, or uniformly
+    when unweighted. A node is then chosen uniformly from a run of
+    `targets`: for undirected walks the incidences of the edge itself,
+    and for directed walks the incidences above the walker's own, which
+    for edges ordered by rank are a prefix of the edge in `_RankIndex`
+    order.
+    """
+
+    def __init__(self, incidence, directed, weighting):
+        self.incidence = incidence
+        side, method = _DIRECTEDNESS[directed]
+        if side is None:
+            self.targets = None
+            usable = None
+        else:
+            self.begin, self.lengths, self.targets = _step_table(incidence, side,
+                                                                 method)
+            usable = self.lengths[incidence.node_slots] > 0
+
+        if usable is None and isinstance(weighting, str) and weighting == 'count':
+            self.cumulative = None
+            return
+        weights = incidence.edge_weights(weighting)[incidence.node_edges]
+        weights = weights.astype(np.float64)
+        if usable is not None:
+            weights[~usable] = 0.0
+        self.cumulative = np.cumsum(weights)
+        bounds = np.concatenate([[0.0], self.cumulative])
+        self.row_offsets = bounds[incidence.node_indptr[:-1]]
+        self.row_weights = bounds[incidence.node_indptr[1:]] - self.row_offsets
+        # The last incidence of each node that can be chosen, against
+        # rounding in the search.
+        self.row_last = np.full(incidence.n_nodes, -1, dtype=np.intp)
+        chosen = np.flatnonzero(weights > 0)
+        self.row_last[np.repeat(np.arange(incidence.n_nodes),
+                                incidence.degrees)[chosen]] = chosen
+
+    def walk(self, starts, random_state, out):
+        incidence = self.incidence
+        out[:, 0] = starts
+        rows = np.arange(starts.shape[0])
+        current = starts
+        for step in range(1, out.shape[1]):
+            uniform = random_state.random((2, rows.shape[0]))
+            if self.cumulative is None:
+                begin = incidence.node_indptr[current]
+                counts = incidence.node_indptr[current + 1] - begin
+                alive = counts > 0
+                positions = begin + (uniform[0] * counts).astype(np.intp)
+            else:
+                alive = self.row_weights[current] > 0
+                targets = (self.row_offsets[current] +
+                           uniform[0] * self.row_weights[current])
+                # Searching for the targets in sorted order is several
+                # times faster, as successive searches share cache lines.
+                order = np.argsort(targets)
+                positions = np.empty(targets.shape[0], dtype=np.intp)
+                positions[order] = np.searchsorted(self.cumulative, targets[order],
+                                                   side='right')
+                positions = np.minimum(positions, self.row_last[current])
+
+            if not alive.all():
+                out[rows[~alive], step:] = -1
+                rows = rows[alive]
+                positions = positions[alive]
+                uniform = uniform[:, alive]
+
+            if self.targets is None:
+                edges = incidence.node_edges[positions]
+                begin = incidence.edge_indptr[edges]
+                counts = incidence.edge_indptr[edges + 1] - begin
+                chosen = begin + (uniform[1] * counts).astype(np.intp)
+            else:
+                slots = incidence.node_slots[positions]
+                chosen = self.targets[self.begin[slots] +
+                                      (uniform[1] * self.lengths[slots]).astype(np.intp)]
+            current = incidence.edge_nodes[chosen]
+            out[rows, step] = current
+        return out
+
+
+def _step_table(incidence, side, method):
+    """For each incidence of an edge, aligned with `edge_nodes`, the run
+    `targets[begin:begin + length]` of the positions of the incidences of
+    the edge above it."""
+    rank_index = _RankIndex(incidence)
+    slot_edges = np.repeat(np.arange(incidence.n_edges), incidence.edge_sizes)
+    begin = incidence.edge_indptr[slot_edges]
+    lengths = rank_index.ends(slot_edges, incidence.edge_ranks, side) - begin
+
+    targets = [rank_index.slots]
+    offset = incidence.n_incidences
+    for edge, order in incidence.edge_orders.items():
+        start = incidence.edge_indptr[edge]
+        for index in range(order.size):
+            above = getattr(order, method)(index)
+            begin[start + index] = offset
+            lengths[start + index] = above.shape[0]
+            targets.append(start + above)
+            offset += above.shape[0]
+    return begin, lengths, np.concatenate(targets)
+
+
+def _share(arrays):
+    """Copy each of `arrays` into a new shared memory block, returning the
+    blocks and what a worker needs to attach to them."""
+    blocks = []
+    specs = {}
+    for key, array in arrays.items():
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+        blocks.append(block)
+        specs[key] = (block.name, array.shape, array.dtype.str)
+    return blocks, specs
+
+
+# The shared incidence of a worker process, set up by `_attach`.
+_worker = {}
+
+def _attach(specs, edge_orders, top):
+    blocks = []
+    arrays = {}
+    for key, (name, shape, dtype) in specs.items():
+        block = shared_memory.SharedMemory(name=name)
+        blocks.append(block)
+        arrays[key] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+    rank_index = _RankIndex()
+    rank_index.top = top
+    rank_index.span = top + 1
+    rank_index.slots = arrays['rank_slots']
+    rank_index.keys = arrays['rank_keys']
+    _worker['blocks'] = blocks
+    _worker['rank_index'] = rank_index
+    _worker['incidence'] = Incidence(arrays['node_indptr'], arrays['node_edges'],
+                                     arrays['node_ranks'], arrays['edge_indptr'],
+                                     arrays['edge_nodes'], arrays['edge_ranks'],
+                                     edge_orders=edge_orders,
+                                     node_slots=arrays['node_slots'])
+
+
+def _worker_distance_rows(sources, directed, max_depth):
+    return _distance_rows(_worker['incidence'], _worker['rank_index'],
+                          sources, directed, max_depth)
+
+
+def _ranges(starts, lengths):
+    """Concatenate the ranges `starts[i] .. starts[i] + lengths[i]`."""
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return offsets + np.arange(offsets.shape[0])
@@ -21,16 +21,19 @@ configuration = {
         'Operating System :: POSIX',
         'Operating System :: Unix',
         'Operating System :: MacOS',
-        'Programming Language :: Python :: 2.7',
-        'Programming Language :: Python :: 3.4',
+        'Programming Language :: Python :: 3',
+        'Programming Language :: Python :: 3 :: Only',
+        'Programming Language :: Python :: 3.8',
     ],
     'keywords' : 'hypergraph graph network community pomset',
     'url' : 'http://github.com/lmcinnes/hypergrapg',
     'maintainer' : 'Leland McInnes',
     'maintainer_email' : 'leland.mcinnes@gmail.com',
     'license' : 'BSD',
-    'packages' : ['hypergraph'],
-    'install_requires' : ['numpy>=1.5',
+    'packages' : ['hypergraph', 'hypergraph.tests'],
+    'python_requires' : '>=3.8',
+    'install_requires' : ['numpy>=1.17',
+    					  'scipy>=0.14',
     					  'networkx>=1.9.1'],
     'ext_modules' : [],
     'test_suite' : 'nose.collector',